@@ -0,0 +1,76 @@
+"""
+Recall vs. latency of the vector index types selectable with `embedding.index`.
+
+Builds a VectorIndex of each type over N clustered random vectors, then runs
+the same queries against each and reports build time, mean query latency
+and recall@k against the exact (flat) results, for a few settings of the
+query-time knob (HNSW efSearch, IVF nprobe).
+
+Usage:
+    python benchmarks/bench_ann_index.py [--nodes 100000] [--dim 128] [--queries 200] [--k 10]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from chatcli.core.vector_index import VectorIndex, index_spec
+
+
+def clustered(n, dim, centers=200, rank=16, seed=0):
+    # Text embeddings occupy a low-dimensional, clustered part of their space; mimic that.
+    rng = np.random.default_rng(0)
+    means = rng.normal(size=(centers, rank)) * 3
+    basis = rng.normal(size=(rank, dim))
+    rng = np.random.default_rng(seed)
+    latent = means[rng.integers(0, centers, n)] + rng.normal(size=(n, rank))
+    return (latent @ basis + 0.1 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+def run(index, queries, k):
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append([nid for nid, _ in index.search(query, top_k=k)])
+    return results, (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nodes", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    vectors = clustered(args.nodes, args.dim)
+    queries = clustered(args.queries, args.dim, seed=1)
+    items = [(f"n{i}", v) for i, v in enumerate(vectors)]
+
+    configs = {
+        "flat": ({"index": "flat"}, "-", [None]),
+        "hnsw": ({"index": "hnsw"}, "efSearch", [16, 64, 256]),
+        "ivf": ({"index": "ivf"}, "nprobe", [1, 8, 32]),
+        "ivfpq": ({"index": "ivfpq", "pq_m": 16}, "nprobe", [1, 8, 32]),
+    }
+    truth = None
+    print(f"{args.nodes} vectors, dim {args.dim}, recall@{args.k} vs. exact search")
+    for name, (cfg, knob, values) in configs.items():
+        start = time.perf_counter()
+        index = VectorIndex.build(items, cfg)
+        built = time.perf_counter() - start
+        for value in values:
+            if value is not None:
+                key = "ef_search" if name == "hnsw" else "nprobe"
+                index.tune({**index_spec(cfg, args.nodes, args.dim), key: value})
+            results, latency = run(index, queries, args.k)
+            if truth is None:
+                truth = results
+            recall = np.mean([len(set(r) & set(t)) / args.k for r, t in zip(results, truth)])
+            setting = f"{knob}={value}" if value is not None else ""
+            print(f"{name:>6} {setting:>13}  build {built:6.1f}s  {latency:7.3f} ms/query  recall {recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Citation cycle checks: CitationOrder (dynamic topological labels) vs. a DFS per edge.
+
+Inserts 100k citation edges into (a) a single chain and (b) a wide random
+DAG, checking each edge for cycles before adding it, and reports the total
+time for each approach. The DFS baseline is the iterative `_has_path`
+(the old recursive one cannot even finish a long chain).
+
+Usage:
+    python benchmarks/bench_citation_cycles.py [--edges 100000] [--dfs-limit 20000]
+"""
+
+import argparse
+import random
+import time
+
+from chatcli.core.citation_order import CitationOrder
+
+
+def chain_edges(count):
+    # Node i cites i - 1, inserted in order: the common "reply chain" shape.
+    return [(i, i - 1) for i in range(1, count + 1)]
+
+
+def wide_dag_edges(count, nodes=10_000, seed=0):
+    # Random edges that only cite older nodes, inserted in random order.
+    rng = random.Random(seed)
+    edges = set()
+    while len(edges) < count:
+        a, b = rng.randrange(nodes), rng.randrange(nodes)
+        if a != b:
+            edges.add((max(a, b), min(a, b)))
+    edges = list(edges)
+    rng.shuffle(edges)
+    return edges
+
+
+def run_order(edges):
+    citations, cited_by = {}, {}
+    order = CitationOrder(lambda n: citations.get(n, ()), lambda n: cited_by.get(n, ()))
+    start = time.perf_counter()
+    for citing, cited in edges:
+        if order.add(citing, cited):
+            citations.setdefault(citing, []).append(cited)
+            cited_by.setdefault(cited, []).append(citing)
+    return time.perf_counter() - start
+
+
+def run_dfs(edges):
+    citations = {}
+
+    def has_path(start_id, target_id):
+        stack, visited = [start_id], set()
+        while stack:
+            node = stack.pop()
+            if node == target_id:
+                return True
+            if node not in visited:
+                visited.add(node)
+                stack.extend(citations.get(node, ()))
+        return False
+
+    start = time.perf_counter()
+    for citing, cited in edges:
+        if not has_path(cited, citing):
+            citations.setdefault(citing, []).append(cited)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--edges", type=int, default=100_000)
+    parser.add_argument("--dfs-limit", type=int, default=20_000,
+                        help="edges to run the DFS baseline on (it is quadratic on chains)")
+    args = parser.parse_args()
+
+    print(f"{'workload':<12}{'edges':>10}{'order s':>10}{'dfs s':>10}")
+    for name, edges in (("chain", chain_edges(args.edges)), ("wide-dag", wide_dag_edges(args.edges))):
+        order_s = run_order(edges)
+        sample = edges[:args.dfs_limit]
+        dfs_s = run_dfs(sample)
+        dfs_label = f"{dfs_s:.2f}" + ("*" if len(sample) < len(edges) else "")
+        print(f"{name:<12}{len(edges):>10}{order_s:>10.2f}{dfs_label:>10}")
+    if args.dfs_limit < args.edges:
+        print(f"* DFS baseline timed on the first {args.dfs_limit} edges only")
+
+
+if __name__ == "__main__":
+    main()
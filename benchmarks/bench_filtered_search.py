@@ -0,0 +1,49 @@
+"""
+Scoped vector search: cost of a top-k query restricted to a candidate set.
+
+Fills a VectorIndex with N random vectors and times top-k queries over the
+whole index and over candidate sets of several sizes, i.e. the three plans
+`VectorIndex.search` chooses between (direct scoring of small sets, a FAISS
+ID selector for mid-sized ones, post-filtering for large ones).
+
+Usage:
+    python benchmarks/bench_filtered_search.py [--nodes 100000] [--dim 384] [--queries 50]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from chatcli.core.vector_index import VectorIndex, normalize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nodes", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.random((args.nodes, args.dim), dtype=np.float32)
+    index = VectorIndex(args.dim)
+    index._index.add_with_ids(normalize(vectors), np.arange(args.nodes, dtype=np.int64))
+    index._labels = {f"n{i}": i for i in range(args.nodes)}
+    index._node_ids = {i: nid for nid, i in index._labels.items()}
+    index._next_label = args.nodes
+    queries = rng.random((args.queries, args.dim), dtype=np.float32)
+
+    scopes = [None, 200, 2_000, 20_000, int(args.nodes * 0.9)]
+    for size in scopes:
+        ids = None if size is None else {f"n{i}" for i in rng.choice(args.nodes, size=size, replace=False)}
+        start = time.perf_counter()
+        for query in queries:
+            index.search(query, top_k=10, ids=ids)
+        per_query = (time.perf_counter() - start) / args.queries * 1000
+        label = "whole index" if size is None else f"{size} candidates"
+        print(f"{label:>18}: {per_query:.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Keyword search latency: KeywordIndex (BM25 postings) over a synthetic graph.
+
+Builds an index over N nodes of random text drawn from a Zipf-like
+vocabulary (plus one unique identifier per node), then times queries made of
+a rare identifier, a mid-frequency word and a mix of common words, and
+reports the index build time and mean/p95 query latency.
+
+Usage:
+    python benchmarks/bench_keyword_search.py [--nodes 100000] [--queries 200]
+"""
+
+import argparse
+import itertools
+import random
+import statistics
+import time
+
+from chatcli.core.keyword_index import KeywordIndex
+
+
+def make_docs(count, vocab=20_000, words=60, seed=0):
+    rng = random.Random(seed)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(vocab)))
+    for i in range(count):
+        tokens = rng.choices(range(vocab), cum_weights=cum_weights, k=words)
+        yield f"n{i:07x}", " ".join(f"w{t}" for t in tokens) + f" func_{i}"
+
+
+def time_queries(index, queries):
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, top_k=5)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return statistics.mean(times) * 1000, times[int(len(times) * 0.95)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nodes", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    docs = list(make_docs(args.nodes))
+    start = time.perf_counter()
+    index = KeywordIndex.build(docs)
+    print(f"build: {args.nodes} nodes in {time.perf_counter() - start:.1f}s")
+
+    rng = random.Random(1)
+    suites = {
+        "rare identifier": [f"func_{rng.randrange(args.nodes)}" for _ in range(args.queries)],
+        "mid-frequency word": [f"w{rng.randrange(500, 5000)}" for _ in range(args.queries)],
+        "identifier + words": [f"func_{rng.randrange(args.nodes)} w{rng.randrange(100, 2000)} w{rng.randrange(2000, 20000)}"
+                               for _ in range(args.queries)],
+    }
+    for name, queries in suites.items():
+        mean, p95 = time_queries(index, queries)
+        print(f"{name:>20}: mean {mean:.2f} ms  p95 {p95:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
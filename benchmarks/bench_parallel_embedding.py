@@ -0,0 +1,99 @@
+"""
+Bulk embedding throughput (docs/sec) against the number of worker processes.
+
+Encodes N synthetic documents in-process (1 worker) and with a
+`ParallelEncoder` of 2, 4, ... workers, as `SentenceTransformerProvider`
+does for bulk jobs when `embedding.workers` > 1. Pool start-up (each worker
+loading the model) is reported separately from encoding throughput.
+
+`--model synthetic` (the default) is a CPU-bound stand-in that needs no
+download; pass a sentence-transformers model name to measure the real thing.
+
+Usage:
+    python benchmarks/bench_parallel_embedding.py [--docs 4000] [--workers 1,2,4,8]
+        [--chunk-size 256] [--batch-size 32] [--model synthetic]
+"""
+
+import argparse
+import os
+import time
+import zlib
+from functools import partial
+
+# One BLAS thread per process, so worker count alone sets the parallelism.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+
+import numpy as np
+
+from chatcli.core.embedding_provider import ParallelEncoder, _load_sentence_transformer
+
+
+class SyntheticModel:
+    """A few dense layers over hashed token features: about the cost profile of a small encoder."""
+
+    def __init__(self, dim=384, layers=6):
+        rng = np.random.default_rng(0)
+        self.dim = dim
+        self.weights = [rng.normal(size=(dim, dim)).astype(np.float32) / np.sqrt(dim) for _ in range(layers)]
+
+    def encode(self, texts, batch_size=32):
+        out = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            x = np.zeros((len(batch), 128, self.dim), dtype=np.float32)
+            for i, text in enumerate(batch):
+                for j, token in enumerate(text.split()[:128]):
+                    x[i, j, zlib.crc32(token.encode()) % self.dim] = 1.0
+            for w in self.weights:
+                x = np.tanh(x @ w)
+            out.append(x.mean(axis=1))
+        return np.vstack(out)
+
+
+def load_model(name):
+    return SyntheticModel() if name == "synthetic" else _load_sentence_transformer(name)
+
+
+def documents(n, words=120, seed=0):
+    rng = np.random.default_rng(seed)
+    vocab = [f"w{i}" for i in range(5000)]
+    return [" ".join(rng.choice(vocab, words)) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=4000)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--model", default="synthetic")
+    args = parser.parse_args()
+
+    docs = documents(args.docs)
+    loader = partial(load_model, args.model)
+    print(f"{args.docs} docs, model={args.model}, chunk_size={args.chunk_size}, cpus={os.cpu_count()}")
+    print(f"{'workers':>8} {'startup s':>10} {'encode s':>9} {'docs/sec':>9} {'speedup':>8}")
+    baseline = None
+    for workers in [int(w) for w in args.workers.split(",")]:
+        start = time.perf_counter()
+        encoder = loader() if workers == 1 else ParallelEncoder(loader, workers, args.chunk_size)
+        if workers > 1:
+            encoder.encode(["warm up"] * workers * 2, args.batch_size)  # wait until every worker has loaded
+        startup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectors = encoder.encode(docs, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - start
+        assert len(vectors) == len(docs)
+        if workers > 1:
+            encoder.close()
+
+        rate = len(docs) / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>8} {startup:>10.2f} {elapsed:>9.2f} {rate:>9.0f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
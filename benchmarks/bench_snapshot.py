@@ -0,0 +1,69 @@
+"""
+Compare JSON (+ .emb.npy sidecar) and binary (.csg) snapshot load/save times.
+
+Usage:
+    python benchmarks/bench_snapshot.py [--sizes 10000 100000] [--dim 768]
+"""
+
+import argparse
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from chatcli.core.graph_io import read_graph_file, write_graph_file
+
+
+def make_nodes(count, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    ids = [uuid.uuid4().hex[:8] for _ in range(count)]
+    nodes = {}
+    for i, node_id in enumerate(ids):
+        parent_id = ids[(i - 1) // 2] if i else None
+        nodes[node_id] = {
+            "id": node_id,
+            "prompt": f"Prompt {i} " + "lorem ipsum " * 8,
+            "response": f"Response {i} " + "dolor sit amet " * 30,
+            "parent_id": parent_id,
+            "children": [],
+            "tags": ["bench"],
+            "embedding": vectors[i],
+        }
+        if parent_id:
+            nodes[parent_id]["children"].append(node_id)
+    return nodes
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(count, dim, tmp):
+    nodes = make_nodes(count, dim)
+    print(f"\n{count} nodes, dim={dim}")
+    print(f"{'format':<8}{'save s':>10}{'load s':>10}{'size MB':>10}")
+    for name, filename, extra in (("json", "graph.json", ("graph.emb.npy",)), ("binary", "graph.csg", ())):
+        path = tmp / filename
+        save = timed(lambda: write_graph_file(path, nodes))
+        load = timed(lambda: read_graph_file(path))
+        size = sum((tmp / f).stat().st_size for f in (filename, *extra)) / 1e6
+        print(f"{name:<8}{save:>10.3f}{load:>10.3f}{size:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=768)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.sizes:
+            run(count, args.dim, Path(tmp))
+
+
+if __name__ == "__main__":
+    main()
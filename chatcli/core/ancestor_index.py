@@ -0,0 +1,105 @@
+# chatcli/core/ancestor_index.py
+
+
+class AncestorIndex:
+    """
+    Depths and binary-lifting jump pointers over the reply tree.
+
+    `_up[n][j]` is the 2**j-th ancestor of `n`, so k-th ancestor, lowest
+    common ancestor and path queries take O(log depth) jumps instead of one
+    `parent_id` lookup per level. Nodes are indexed on first use, walking up
+    (iteratively) only as far as the nearest node already indexed, so
+    appending a reply costs O(log depth).
+
+    Args:
+        parent_of: callable, node id -> parent id, or None for a root.
+    """
+
+    def __init__(self, parent_of):
+        self._parent_of = parent_of
+        self._depth = {}
+        self._up = {}
+
+    def _ensure(self, node_id):
+        if node_id in self._depth:
+            return
+        chain = []
+        nid = node_id
+        while nid is not None and nid not in self._depth:
+            chain.append(nid)
+            nid = self._parent_of(nid)
+        for nid in reversed(chain):
+            parent_id = self._parent_of(nid)
+            if parent_id is None:
+                self._depth[nid] = 0
+                self._up[nid] = []
+                continue
+            self._depth[nid] = self._depth[parent_id] + 1
+            up = [parent_id]
+            while True:
+                above = self._up[up[-1]]
+                if len(above) < len(up):
+                    break
+                up.append(above[len(up) - 1])
+            self._up[nid] = up
+
+    def __contains__(self, node_id):
+        return node_id in self._depth
+
+    def add(self, node_id):
+        """Index a newly appended node (its parent, if any, must already exist)."""
+        self._ensure(node_id)
+
+    def depth(self, node_id):
+        self._ensure(node_id)
+        return self._depth[node_id]
+
+    def parent(self, node_id):
+        self._ensure(node_id)
+        up = self._up[node_id]
+        return up[0] if up else None
+
+    def ancestor_at(self, node_id, k):
+        """The k-th ancestor of `node_id` (k=0 is the node itself), or None above the root."""
+        if k < 0:
+            raise ValueError("k must be non-negative")
+        if k > self.depth(node_id):
+            return None
+        j = 0
+        while k:
+            if k & 1:
+                node_id = self._up[node_id][j]
+            k >>= 1
+            j += 1
+        return node_id
+
+    def lowest_common_ancestor(self, a, b):
+        """Deepest node that is an ancestor of (or equal to) both; None if they are in different trees."""
+        da, db = self.depth(a), self.depth(b)
+        if da < db:
+            a, b, da, db = b, a, db, da
+        a = self.ancestor_at(a, da - db)
+        if a == b:
+            return a
+        for j in range(len(self._up[a]) - 1, -1, -1):
+            up_a, up_b = self._up[a], self._up[b]
+            if j < len(up_a) and up_a[j] != up_b[j]:
+                a, b = up_a[j], up_b[j]
+        pa, pb = self.parent(a), self.parent(b)
+        return pa if pa is not None and pa == pb else None
+
+    def path_between(self, a, b):
+        """Node ids from `a` up to the common ancestor and down to `b`; None if unconnected."""
+        lca = self.lowest_common_ancestor(a, b)
+        if lca is None:
+            return None
+        up = self._climb(a, lca)
+        down = self._climb(b, lca)
+        return up + [lca] + down[::-1]
+
+    def _climb(self, node_id, ancestor):
+        path = []
+        while node_id != ancestor:
+            path.append(node_id)
+            node_id = self._up[node_id][0]
+        return path
@@ -0,0 +1,92 @@
+# chatcli/core/autosave.py
+
+import atexit
+import threading
+import time
+
+
+class Autosaver:
+    """
+    Background writer that debounces graph saves.
+
+    While it is attached, `GraphCore._save()` only calls `touch()`; this thread
+    writes the graph once it has been idle for `idle_seconds`, after `max_ops`
+    saves have piled up, or at the latest `max_delay` seconds after the first
+    unsaved change, so no more than `max_delay` seconds of work can be lost.
+    Writes hold the graph lock, so they always see a consistent graph.
+    `stop()` (also registered with `atexit`) flushes whatever is left.
+    """
+
+    def __init__(self, graph, idle_seconds=1.0, max_ops=100, max_delay=5.0):
+        self._graph = graph
+        self.idle_seconds = idle_seconds
+        self.max_ops = max_ops
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        self._ops = 0
+        self._first = None
+        self._last = None
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="graph-autosave", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    @property
+    def pending(self):
+        """Number of saves requested since the last write."""
+        return self._ops
+
+    def touch(self):
+        """Note that the graph changed and needs saving."""
+        with self._cond:
+            now = time.monotonic()
+            if self._first is None:
+                self._first = now
+            self._last = now
+            self._ops += 1
+            self._cond.notify()
+
+    def _deadline(self):
+        return min(self._last + self.idle_seconds, self._first + self.max_delay)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    if self._ops:
+                        wait = self._deadline() - time.monotonic()
+                        if self._ops >= self.max_ops or wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if self._stopping:
+                    return
+            self.flush()
+
+    def flush(self):
+        """Write the graph now if anything changed since the last write."""
+        with self._graph._lock:
+            with self._cond:
+                ops = self._ops
+                if not ops:
+                    return
+                self._ops, self._first = 0, None
+            try:
+                self._graph._write()
+            except Exception as e:
+                print(f"Warning: autosave failed: {e}")
+                with self._cond:
+                    # Keep the changes pending; the next attempt waits a full interval.
+                    self._ops += ops
+                    self._first = self._last = time.monotonic()
+
+    def stop(self):
+        """Stop the writer thread and flush any pending changes."""
+        atexit.unregister(self.stop)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
@@ -0,0 +1,275 @@
+# chatcli/core/body_store.py
+
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+# Heavy node fields kept out of the graph skeleton and loaded on first access.
+BODY_FIELDS = ("response", "summary", "subtree_summary")
+LAZY_FIELDS = BODY_FIELDS + ("embedding",)
+
+# Only rewrite the bodies file when at least this much of it is dead records.
+_COMPACT_MIN_BYTES = 1 << 20
+
+
+class LazyNode(dict):
+    """
+    Node dict whose heavy fields are fetched on demand.
+
+    The dict itself only holds the skeleton (ids, prompt, parent/children,
+    citations, tags, ...). `response`, `summary` and `subtree_summary` are read
+    from a `BodyStore` record, and `embedding` from an `EmbeddingStore` row,
+    each time they are accessed; neither is kept on the node. Assigning a lazy
+    field stores it on the node like a plain dict. An embedding row only counts
+    while the store is in the generation it was bound in: once the store is
+    reset (e.g. switched to a new embedding width) its rows are renumbered.
+    """
+
+    __slots__ = ("_bodies", "_ref", "_lazy", "_store", "_row", "_generation")
+
+    def __init__(self, skeleton, bodies=None, ref=None, keys=(), store=None, row=None):
+        super().__init__(skeleton)
+        self._bodies = bodies
+        self._ref = ref
+        self._lazy = frozenset(keys) if ref is not None else frozenset()
+        self._store = store
+        self._row = row
+        self._generation = store.generation if store is not None else None
+
+    def _embedding_row(self):
+        if self._row is not None and self._store.generation != self._generation:
+            self._row = None  # bound before the store was reset; the row now belongs to another node
+        return self._row
+
+    def _lazy_keys(self):
+        keys = list(self._lazy)
+        if self._embedding_row() is not None:
+            keys.append("embedding")
+        return keys
+
+    def _drop_lazy(self, key):
+        if key in self._lazy:
+            self._lazy = self._lazy - {key}
+        elif key == "embedding":
+            self._row = None
+
+    def __getitem__(self, key):
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        if key in self._lazy:
+            return self._bodies.read(self._ref)[key]
+        if key == "embedding" and self._embedding_row() is not None:
+            return self._store.get(self._row)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        self._drop_lazy(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        if dict.__contains__(self, key):
+            dict.__delitem__(self, key)
+        elif key in self._lazy or (key == "embedding" and self._embedding_row() is not None):
+            self._drop_lazy(key)
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return (dict.__contains__(self, key) or key in self._lazy
+                or (key == "embedding" and self._embedding_row() is not None))
+
+    def __iter__(self):
+        yield from dict.__iter__(self)
+        yield from self._lazy_keys()
+
+    def __len__(self):
+        return dict.__len__(self) + len(self._lazy_keys())
+
+    def __eq__(self, other):
+        return dict(self.items()) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"LazyNode({dict.__repr__(self)}, lazy={self._lazy_keys()})"
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return [self[k] for k in self]
+
+    def items(self):
+        return [(k, self[k]) for k in self]
+
+    def pop(self, key, *default):
+        try:
+            value = self[key]
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+        del self[key]
+        return value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def copy(self):
+        """Shallow copy that shares the lazy references (lists are copied)."""
+        skeleton = {k: list(v) if isinstance(v, list) else v for k, v in dict.items(self)}
+        node = LazyNode(skeleton, self._bodies, self._ref, self._lazy, self._store, self._embedding_row())
+        return node
+
+    def body_is_stored_in(self, bodies):
+        """True if all heavy fields are still the ones stored at `_ref` in `bodies`."""
+        return (self._bodies is bodies and self._ref is not None
+                and not any(dict.__contains__(self, k) for k in BODY_FIELDS))
+
+    def unload(self, bodies, ref, keys):
+        """Point the heavy fields at a freshly written record and drop the in-memory copies."""
+        for key in BODY_FIELDS:
+            dict.pop(self, key, None)
+        self._bodies, self._ref = bodies, ref
+        self._lazy = frozenset(keys) if ref is not None else frozenset()
+
+
+class BodyStore:
+    """
+    Heavy node fields in an append-only sidecar file, read through an LRU cache.
+
+    Each record is the JSON encoding of one node's body fields; the graph file
+    keeps a `body_ref` of `[offset, length]` plus the list of `body_keys`. Saves
+    only append records for nodes whose body changed. When dead records
+    outweigh live ones the store rewrites itself into a new generation file,
+    which the graph file names under `"bodies"`, so a crash mid-rewrite never
+    leaves the graph pointing at the wrong offsets.
+    """
+
+    def __init__(self, path=None, cache_size=1024):
+        self.path = Path(path) if path else None
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self._fd = None
+        self._retired = None
+
+    def open(self, path):
+        """Switch to the bodies file at `path` (e.g. the one named by a loaded graph file)."""
+        with self._lock:
+            self._close()
+            self.path = Path(path)
+            self._cache.clear()
+
+    def _close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _size(self):
+        return self.path.stat().st_size if self.path and self.path.exists() else 0
+
+    def read_raw(self, ref):
+        offset, length = ref
+        with self._lock:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_RDONLY)
+            return os.pread(self._fd, length, offset)
+
+    def read(self, ref):
+        key = tuple(ref)
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+                return body
+        body = json.loads(self.read_raw(ref))
+        with self._lock:
+            self._cache[key] = body
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return body
+
+    def write(self, directory, stem, nodes):
+        """
+        Store the bodies of `nodes` (id -> node) and return {node_id: (ref, keys)}.
+
+        Unchanged `LazyNode` bodies keep their refs; everything else is appended
+        in one write, after which lazy nodes drop their in-memory copies and
+        plain dict nodes in `nodes` are replaced by `LazyNode` stubs, so only
+        the LRU cache holds bodies. Call `commit()` once the graph file
+        referencing the result has been written.
+        """
+        refs, fresh, live = {}, [], 0
+        for node_id, node in nodes.items():
+            if isinstance(node, LazyNode) and node.body_is_stored_in(self):
+                refs[node_id] = (node._ref, sorted(node._lazy))
+                live += node._ref[1]
+                continue
+            fields = {k: node[k] for k in BODY_FIELDS if k in node}
+            if fields:
+                fresh.append((node_id, json.dumps(fields).encode()))
+
+        size = self._size()
+        dead = size - live
+        if self.path is None or (dead > _COMPACT_MIN_BYTES and dead > live):
+            # Start a new generation holding only live records.
+            target = Path(directory) / f"{stem}.{uuid.uuid4().hex[:8]}.bodies"
+            records = [(nid, self.read_raw(ref)) for nid, (ref, _) in refs.items()] + fresh
+            offset, mode = 0, "wb"
+        else:
+            target, records, offset, mode = self.path, fresh, size, "ab"
+
+        chunks = []
+        for node_id, raw in records:
+            refs[node_id] = ([offset, len(raw)], sorted(json.loads(raw)))
+            chunks.append(raw)
+            offset += len(raw)
+        if chunks or mode == "wb":
+            with open(target, mode) as f:
+                f.write(b"".join(chunks))
+                f.flush()
+                os.fsync(f.fileno())
+
+        if target != self.path:
+            with self._lock:
+                self._close()
+                if self._retired is None:
+                    self._retired = self.path
+                elif self.path is not None:
+                    self.path.unlink(missing_ok=True)  # never referenced by a graph file
+                self.path = target
+                self._cache.clear()
+        for node_id, node in list(nodes.items()):
+            if node_id not in refs:
+                continue
+            if isinstance(node, LazyNode):
+                node.unload(self, *refs[node_id])
+            else:
+                skeleton = {k: v for k, v in node.items() if k not in BODY_FIELDS}
+                nodes[node_id] = LazyNode(skeleton, self, *refs[node_id])
+        return refs
+
+    def commit(self):
+        """Remove the previous generation once the graph file no longer references it."""
+        if self._retired is not None:
+            self._retired.unlink(missing_ok=True)
+            self._retired = None
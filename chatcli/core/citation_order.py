@@ -0,0 +1,113 @@
+# chatcli/core/citation_order.py
+
+from collections import deque
+
+
+class CitationOrder:
+    """
+    Dynamic topological order of the citation DAG (Pearce–Kelly).
+
+    Every node gets an integer label such that a cited node always sorts
+    before the nodes citing it. A new citation that already agrees with the
+    order cannot close a cycle and is accepted in O(1). Otherwise only the
+    nodes whose labels lie between the two endpoints are searched (iteratively,
+    so long chains never hit the recursion limit), and the labels of the
+    affected region are shuffled to restore the order.
+
+    Args:
+        citations: callable, node id -> ids it cites.
+        cited_by: callable, node id -> ids citing it.
+    """
+
+    def __init__(self, citations, cited_by):
+        self._citations = citations
+        self._cited_by = cited_by
+        self._ord = {}
+        self._next = 0
+
+    @classmethod
+    def build(cls, node_ids, citations, cited_by):
+        """Label existing nodes in topological order (Kahn's algorithm)."""
+        order = cls(citations, cited_by)
+        node_ids = list(node_ids)
+        known = set(node_ids)
+        pending = {nid: len(set(citations(nid)) & known) for nid in node_ids}
+        queue = deque(nid for nid, count in pending.items() if count == 0)
+        while queue:
+            nid = queue.popleft()
+            order._label(nid)
+            for citing in cited_by(nid):
+                if citing in pending:
+                    pending[citing] -= 1
+                    if pending[citing] == 0:
+                        queue.append(citing)
+        # Nodes left over sit on a pre-existing cycle; give them labels anyway.
+        for nid in node_ids:
+            order._label(nid)
+        return order
+
+    def _label(self, node_id):
+        label = self._ord.get(node_id)
+        if label is None:
+            label = self._ord[node_id] = self._next
+            self._next += 1
+        return label
+
+    def __contains__(self, node_id):
+        return node_id in self._ord
+
+    def label(self, node_id):
+        return self._ord.get(node_id)
+
+    def _reaches(self, start, target, upper):
+        """Nodes reachable from `start` through cited-by edges with labels below `upper`, or None if `target` is hit."""
+        seen = {start}
+        stack = [start]
+        while stack:
+            nid = stack.pop()
+            for citing in self._cited_by(nid):
+                if citing == target:
+                    return None
+                if citing not in seen and self._label(citing) < upper:
+                    seen.add(citing)
+                    stack.append(citing)
+        return seen
+
+    def _reached_by(self, start, lower):
+        """Nodes that `start` reaches through citations with labels above `lower`."""
+        seen = {start}
+        stack = [start]
+        while stack:
+            nid = stack.pop()
+            for cited in self._citations(nid):
+                if cited not in seen and self._label(cited) > lower:
+                    seen.add(cited)
+                    stack.append(cited)
+        return seen
+
+    def would_cycle(self, citing, cited):
+        """True if adding `citing -> cited` would create a citation cycle."""
+        if citing == cited:
+            return True
+        lower, upper = self._label(citing), self._label(cited)
+        if upper < lower:
+            return False
+        return self._reaches(citing, cited, upper) is None
+
+    def add(self, citing, cited):
+        """Record the citation `citing -> cited`; returns False (and changes nothing) if it closes a cycle."""
+        if citing == cited:
+            return False
+        lower, upper = self._label(citing), self._label(cited)
+        if upper < lower:
+            return True
+        forward = self._reaches(citing, cited, upper)
+        if forward is None:
+            return False
+        backward = self._reached_by(cited, lower)
+        # Everything `cited` depends on moves before everything that depends on `citing`.
+        moved = sorted(backward, key=self._ord.__getitem__) + sorted(forward, key=self._ord.__getitem__)
+        labels = sorted(self._ord[nid] for nid in moved)
+        for nid, label in zip(moved, labels):
+            self._ord[nid] = label
+        return True
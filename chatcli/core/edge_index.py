@@ -0,0 +1,42 @@
+# chatcli/core/edge_index.py
+
+
+class ReverseEdgeIndex:
+    """
+    Reverse adjacency over a node dict: child -> parents and cited -> citing.
+
+    Built once from `children`/`citations` lists and then kept up to date as
+    nodes and citations are added, so parent and cited-by lookups cost
+    O(degree) instead of a scan over every node. Sources are kept in the
+    order they were added (dicts used as ordered sets).
+    """
+
+    def __init__(self):
+        self._parents = {}
+        self._citing = {}
+
+    @classmethod
+    def build(cls, data):
+        index = cls()
+        for node_id, node in data.items():
+            index.add_node(node_id, node)
+        return index
+
+    def add_node(self, node_id, node):
+        """Index the outgoing child and citation edges of `node`."""
+        for child_id in node.get("children", []):
+            self.add_child(node_id, child_id)
+        for cited_id in node.get("citations", []):
+            self.add_citation(node_id, cited_id)
+
+    def add_child(self, parent_id, child_id):
+        self._parents.setdefault(child_id, {})[parent_id] = None
+
+    def add_citation(self, citing_id, cited_id):
+        self._citing.setdefault(cited_id, {})[citing_id] = None
+
+    def parents(self, node_id):
+        return list(self._parents.get(node_id, ()))
+
+    def cited_by(self, node_id):
+        return list(self._citing.get(node_id, ()))
@@ -0,0 +1,102 @@
+# chatcli/core/embedding_cache.py
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vectors (
+    key TEXT PRIMARY KEY,
+    vector BLOB NOT NULL,
+    used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS vectors_used ON vectors(used);
+"""
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cache_key(namespace, text):
+    """`namespace` (provider and model) plus the sha256 of `text`."""
+    return f"{namespace}:{content_hash(text)}"
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache in a small SQLite file.
+
+    Vectors are stored as float32 blobs under `cache_key(namespace, text)`, so
+    an unchanged text is never sent to the provider twice, across sessions and
+    across graphs sharing the cache file, and switching models never returns a
+    stale vector. Each hit refreshes the entry's `used` stamp; past
+    `max_entries` the least recently used entries are evicted.
+
+    Args:
+        path: cache file, or None to keep the cache in memory.
+        max_entries: entries kept before evicting (at 384 float32 dims, 100k
+            entries is about 150 MB).
+    """
+
+    def __init__(self, path=None, max_entries=100_000):
+        self.path = Path(path) if path is not None else None
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path) if self.path else ":memory:", check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._clock = self._conn.execute("SELECT COALESCE(MAX(used), 0) FROM vectors").fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """Cached vectors for `keys`, as {key: float32 array}; misses are left out."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock, self._conn:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM vectors WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                self._clock += 1
+                self._conn.executemany("UPDATE vectors SET used = ? WHERE key = ?",
+                                       [(self._clock, key) for key in found])
+        return found
+
+    def put(self, key, vector):
+        self.put_many([(key, vector)])
+
+    def put_many(self, items):
+        """Store (key, vector) pairs, then evict down to `max_entries`."""
+        with self._lock, self._conn:
+            self._clock += 1
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors (key, vector, used) VALUES (?, ?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes(), self._clock) for key, vector in items])
+            excess = self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM vectors WHERE key IN (SELECT key FROM vectors ORDER BY used LIMIT ?)", (excess,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM vectors")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
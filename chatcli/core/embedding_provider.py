@@ -1,5 +1,12 @@
+import atexit
+import multiprocessing
+import os
 from abc import ABC, abstractmethod
+from functools import partial
 from typing import List
+
+import numpy as np
+
 from chatcli.core.config import load_config
 
 
@@ -9,14 +16,95 @@ class EmbeddingProvider(ABC):
         """Convert input text to a vector embedding."""
         pass
 
+    def embed_batch(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        """Embed several texts, in order. Providers with a batched model should override this."""
+        return [self.embed(text) for text in texts]
+
+    def bulk_size(self, batch_size: int = 32) -> int:
+        """How many texts bulk jobs should hand to one `embed_batch` call."""
+        return batch_size
+
+    def close(self) -> None:
+        """Release worker processes or other resources held by the provider."""
+        pass
+
 
 class MockEmbeddingProvider(EmbeddingProvider):
     def embed(self, text: str) -> List[float]:
         return [0.1] * 768
 
 
+_worker_model = None
+
+
+def _init_worker(load_model):
+    global _worker_model
+    _worker_model = load_model()
+
+
+def _encode_chunk(texts, batch_size):
+    return np.asarray(_worker_model.encode(texts, batch_size=batch_size), dtype=np.float32)
+
+
+class ParallelEncoder:
+    """
+    Pool of worker processes that each load a model once and encode in parallel.
+
+    Texts are cut into `chunk_size` chunks and spread over the workers;
+    results come back in input order as soon as each chunk (and every chunk
+    before it) is done, so callers can stream them. Meant for bulk jobs on
+    many-core CPUs, where one process cannot keep all cores busy.
+
+    Args:
+        load_model: picklable callable returning an object with
+            `encode(texts, batch_size=...)`; called once in each worker.
+        workers: number of worker processes.
+        chunk_size: texts per task sent to a worker.
+        context: multiprocessing start method ("spawn" is safe with torch).
+    """
+
+    def __init__(self, load_model, workers, chunk_size=256, context="spawn"):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._pool = multiprocessing.get_context(context).Pool(
+            workers, initializer=_init_worker, initargs=(load_model,))
+        atexit.register(self.close)
+
+    def encode_stream(self, texts, batch_size=32):
+        """Yield one float32 vector per text, in input order."""
+        texts = list(texts)
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        for block in self._pool.imap(partial(_encode_chunk, batch_size=batch_size), chunks):
+            yield from block
+
+    def encode(self, texts, batch_size=32):
+        vectors = list(self.encode_stream(texts, batch_size))
+        return np.vstack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+
+    def close(self):
+        atexit.unregister(self.close)
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+def _load_sentence_transformer(model_name):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device="cpu")
+
+
 class SentenceTransformerProvider(EmbeddingProvider):
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    """
+    Args:
+        model_name: sentence-transformers model.
+        workers: processes for bulk encoding (`ParallelEncoder`); 1 encodes in
+            this process, 0 uses one per CPU core.
+        chunk_size: texts per worker task; calls with fewer texts than this
+            are always encoded in this process.
+    """
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", workers: int = 1, chunk_size: int = 256):
         try:
             from sentence_transformers import SentenceTransformer
         except ImportError as e:
@@ -25,10 +113,34 @@ class SentenceTransformerProvider(EmbeddingProvider):
                 "Please install it via 'pip install sentence-transformers'."
             ) from e
         self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        # Picklable: each bulk worker calls it once to load its own copy of the model.
+        self._load_model = partial(_load_sentence_transformer, model_name)
+        self._encoder = None
 
     def embed(self, text: str) -> List[float]:
         return self.model.encode([text])[0].tolist()
 
+    def embed_batch(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        if self.workers > 1 and len(texts) > self.chunk_size:
+            if self._encoder is None:
+                # Workers start on the first bulk job, so interactive sessions never pay for them.
+                self._encoder = ParallelEncoder(self._load_model, self.workers, self.chunk_size)
+            return self._encoder.encode(texts, batch_size=batch_size).tolist()
+        # One encode() call: the model pads and runs `batch_size` texts per forward pass.
+        return self.model.encode(list(texts), batch_size=batch_size).tolist()
+
+    def bulk_size(self, batch_size: int = 32) -> int:
+        # Enough texts per call to give every worker one chunk.
+        return max(batch_size, self.chunk_size * self.workers) if self.workers > 1 else batch_size
+
+    def close(self) -> None:
+        encoder, self._encoder = self._encoder, None
+        if encoder is not None:
+            encoder.close()
+
 
 def get_embedding_provider(config=None) -> EmbeddingProvider:
     if config is None:
@@ -39,7 +151,8 @@ def get_embedding_provider(config=None) -> EmbeddingProvider:
 
     if provider == "sentence-transformers":
         model = embedding_cfg.get("model", "all-MiniLM-L6-v2")
-        return SentenceTransformerProvider(model)
+        return SentenceTransformerProvider(
+            model, workers=embedding_cfg.get("workers", 1), chunk_size=embedding_cfg.get("chunk_size", 256))
     elif provider == "mock":
         return MockEmbeddingProvider()
     else:
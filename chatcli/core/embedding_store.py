@@ -0,0 +1,159 @@
+# chatcli/core/embedding_store.py
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+def embedding_sidecar(path):
+    """Location of the embedding matrix that belongs to graph file `path`."""
+    path = Path(path)
+    return path.with_name(path.stem + ".emb.npy")
+
+
+class EmbeddingStore:
+    """
+    float32 embedding matrix kept in a memory-mapped `.npy` file.
+
+    The graph JSON references each vector by row number (`embedding_row`), so
+    loading opens the matrix without parsing or copying floats, and a save only
+    writes the rows that were added or re-embedded since the last flush.
+
+    The matrix holds one embedding width. A re-embedded vector of another
+    width (the embedding model changed) switches the store to it: old rows are
+    dropped, vectors of the old width are no longer stored (`put` returns
+    None) and the next flush rebuilds the file at the new width.
+    """
+
+    MIN_CAPACITY = 64
+
+    def __init__(self, path=None, readonly=False):
+        self._path = Path(path) if path else None
+        self._readonly = readonly
+        self._matrix = None
+        self._rows = {}      # node_id -> row
+        self._dirty = set()  # node_ids re-embedded since their row was written
+        self._pending = {}   # row -> vector waiting for flush
+        self._next_row = 0
+        self._width = None    # set when switched to a new width before the matrix is rebuilt
+        self._rebuild = False
+        self.generation = 0   # bumped whenever row numbers are forgotten
+        if self._path and self._path.exists():
+            self._matrix = np.load(self._path, mmap_mode="r" if readonly else "r+")
+
+    @classmethod
+    def create(cls, path, width=None):
+        """Start an empty store at `path` (for vectors of `width`), ignoring any existing file."""
+        store = cls()
+        store._path = Path(path)
+        store._width = width
+        return store
+
+    @property
+    def dim(self):
+        return self._matrix.shape[1] if self._matrix is not None else None
+
+    @property
+    def width(self):
+        """Width of the vectors the store accepts (None until the first one)."""
+        return self._width if self._width is not None else self.dim
+
+    def __len__(self):
+        return len(self._rows)
+
+    def row_of(self, node_id):
+        return self._rows.get(node_id)
+
+    def bind(self, node_id, row):
+        """Attach an existing row (read from the graph file) to `node_id`."""
+        self._rows[node_id] = row
+        self._next_row = max(self._next_row, row + 1)
+
+    def get(self, row):
+        """Zero-copy view of a stored vector."""
+        if row in self._pending:
+            return self._pending[row]
+        if self._matrix is None or row >= self._matrix.shape[0]:
+            raise IndexError(f"Embedding row {row} not found in {self._path}")
+        return self._matrix[row]
+
+    def mark_dirty(self, node_id, dim=None):
+        """
+        Record that `node_id` has a new vector (of width `dim`) that must be
+        written on next save. Returns True if the width differs from the stored
+        one, which switches the store to the new width.
+        """
+        switched = dim is not None and self.width is not None and dim != self.width
+        if switched:
+            self.reset()
+            self._width = dim
+            self._rebuild = True
+        elif self.width is None:
+            self._width = dim
+        self._dirty.add(node_id)
+        return switched
+
+    def reset(self):
+        """Forget all row bindings so the next save rewrites every vector."""
+        self.generation += 1
+        self._rows = {}
+        self._dirty = set()
+        self._pending = {}
+        self._next_row = 0
+
+    def put(self, node_id, vector):
+        """
+        Return the row for `node_id`, queueing `vector` for writing if the node
+        is new to the store or has been re-embedded; None if the vector is not
+        of the store's width (left over from a previous embedding model).
+        """
+        width = self.width
+        if width is None:
+            self._width = len(vector)
+        elif len(vector) != width:
+            return None
+        row = self._rows.get(node_id)
+        if row is not None and node_id not in self._dirty:
+            return row
+        if row is None:
+            row = self._next_row
+            self._next_row += 1
+            self._rows[node_id] = row
+        self._dirty.discard(node_id)
+        self._pending[row] = np.asarray(vector, dtype=np.float32)
+        return row
+
+    def flush(self):
+        """Write pending rows into the memory-mapped file."""
+        if not self._pending:
+            return
+        if self._readonly:
+            raise RuntimeError(f"Embedding store {self._path} is read-only")
+
+        dim = len(next(iter(self._pending.values())))
+        if self._rebuild:
+            # New embedding width: start a fresh matrix instead of copying old rows.
+            self._matrix = None
+            self._rebuild = False
+        needed = max(self._pending) + 1
+        if self._matrix is None or needed > self._matrix.shape[0]:
+            self._grow(needed, dim)
+
+        for row, vector in self._pending.items():
+            self._matrix[row] = vector
+        self._matrix.flush()
+        self._pending = {}
+
+    def _grow(self, needed, dim):
+        old = self._matrix
+        capacity = max(needed, self.MIN_CAPACITY, 2 * (old.shape[0] if old is not None else 0))
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        matrix = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(capacity, dim))
+        if old is not None:
+            matrix[:old.shape[0]] = old
+        matrix.flush()
+        del matrix
+        # Views handed out earlier keep the old mapping alive, so replacing the file is safe.
+        os.replace(tmp_path, self._path)
+        self._matrix = np.load(self._path, mmap_mode="r+")
@@ -0,0 +1,162 @@
+# chatcli/core/embedding_worker.py
+
+import atexit
+import threading
+from concurrent.futures import Future
+
+from chatcli.core.graph_llm import _embedding_text, _text_version, embedding_is_current
+
+
+class _Ticket:
+    """One `submit()` call: its future resolves once all of its nodes are done."""
+
+    def __init__(self, count):
+        self.future = Future()
+        self.remaining = count
+        self.error = None
+
+    def done(self, error=None):
+        self.error = self.error or error
+        self.remaining -= 1
+        if not self.remaining:
+            if self.error is not None:
+                self.future.set_exception(self.error)
+            else:
+                self.future.set_result(None)
+
+
+class EmbeddingWorker:
+    """
+    Background thread that embeds nodes so mutations return immediately.
+
+    `submit(node_ids)` queues nodes (deduplicated) and returns a Future. The
+    thread takes up to `batch_size` queued nodes at a time, waiting `linger`
+    seconds for more to arrive when the queue is short, embeds their text in
+    one provider call outside the graph lock, then writes the vectors back
+    under the lock with a single save. A node whose text changed while it
+    was being embedded is skipped; the edit queued it again. `wait()` blocks
+    until everything submitted so far is written; a thread that holds the
+    graph lock (which the worker needs to write) uses `drain()` instead.
+    `stop()` (also registered with `atexit`) finishes the queue before
+    returning.
+    """
+
+    def __init__(self, graph, batch_size=32, linger=0.05):
+        self._graph = graph
+        self.batch_size = batch_size
+        self.linger = linger
+        self._cond = threading.Condition()
+        self._queue = {}  # node_id -> tickets waiting on it
+        self._inflight = []  # node ids taken by the thread and not yet written
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="graph-embed", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    @property
+    def pending(self):
+        """Nodes queued or being embedded."""
+        with self._cond:
+            return len(self._queue) + len(self._inflight)
+
+    def submit(self, node_ids):
+        """Queue `node_ids` for embedding; the returned Future resolves when all are written."""
+        node_ids = list(dict.fromkeys(node_ids))
+        ticket = _Ticket(len(node_ids))
+        if not node_ids:
+            ticket.future.set_result(None)
+            return ticket.future
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Embedding worker is stopped")
+            for node_id in node_ids:
+                self._queue.setdefault(node_id, []).append(ticket)
+            self._cond.notify_all()
+        return ticket.future
+
+    def wait(self, timeout=None):
+        """Block until every submitted node is written; False if `timeout` ran out first."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._inflight, timeout)
+
+    def _take(self):
+        with self._cond:
+            while not self._queue and not self._stopping:
+                self._cond.wait()
+            if not self._queue:
+                return None
+            if len(self._queue) < self.batch_size and not self._stopping and self.linger:
+                # Let a burst of edits (e.g. an import) fill the batch.
+                self._cond.wait(self.linger)
+            batch = list(self._queue.items())[:self.batch_size]
+            for node_id, _ in batch:
+                del self._queue[node_id]
+            self._inflight = [node_id for node_id, _ in batch]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            error = None
+            try:
+                self._embed([node_id for node_id, _ in batch])
+            except Exception as e:
+                print(f"Warning: background embedding failed: {e}")
+                error = e
+            with self._cond:
+                self._inflight = []
+                self._resolve(batch, error)
+
+    def _resolve(self, batch, error):
+        for _, tickets in batch:
+            for ticket in tickets:
+                ticket.done(error)
+        self._cond.notify_all()
+
+    def drain(self, embed):
+        """
+        Embed everything queued or in flight on the calling thread, with
+        `embed(node_ids)`. For callers holding the graph lock: the worker
+        cannot write back until it is released, so waiting would deadlock.
+        Vectors the worker computes for the in-flight nodes afterwards are
+        dropped, since those nodes are then current.
+        """
+        with self._cond:
+            batch = list(self._queue.items())
+            self._queue.clear()
+            node_ids = [node_id for node_id, _ in batch] + self._inflight
+        error = None
+        try:
+            embed(node_ids)
+        except Exception as e:
+            error = e
+        with self._cond:
+            self._resolve(batch, error)
+        if error is not None:
+            raise error
+
+    def _embed(self, node_ids):
+        graph = self._graph
+        with graph._lock:
+            jobs = [(nid, _embedding_text(graph.data[nid])) for nid in node_ids if nid in graph.data]
+        if not jobs:
+            return
+        vectors = graph.get_embeddings([text for _, text in jobs], self.batch_size, quiet=True)
+        # Not a graph batch: batches belong to the thread driving the graph.
+        with graph._lock:
+            for (nid, text), vector in zip(jobs, vectors):
+                node = graph.data.get(nid)
+                if node is not None and _embedding_text(node) == text and not embedding_is_current(node):
+                    graph._store_embedding(nid, vector, _text_version(text))
+            graph._save()
+
+    def stop(self):
+        """Embed whatever is still queued, then stop the thread."""
+        atexit.unregister(self.stop)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
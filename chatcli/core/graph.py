@@ -1,8 +1,16 @@
 # chatcli/core/graph.py
 
+from chatcli.core.body_store import BodyStore
 from chatcli.core.config import load_config
+from chatcli.core.embedding_cache import EmbeddingCache
 from chatcli.core.embedding_provider import get_embedding_provider
+from chatcli.core.embedding_store import EmbeddingStore
+from chatcli.core.embedding_worker import EmbeddingWorker
 from chatcli.core.graph_core import GraphCore
+from chatcli.core.graph_journal import GraphJournal
+from chatcli.core.graph_sqlite import SqliteBackend
+from chatcli.core.keyword_index import TEXT_FIELDS, KeywordIndex, node_text
+from chatcli.core.retrieval import hybrid_search
 from chatcli.core.graph_io import (
     import_doc, save_doc, save_doc_version,
     load_from_file,
@@ -12,22 +20,238 @@ from chatcli.core.graph_llm import (
     suggest_replies,
     suggest_tags,
     suggest_validation_sources, ask_llm_with_context, ask_llm_direct,
-    estimate_tokens, get_embedding, embed_node
+    estimate_tokens, get_embedding, get_embeddings, embed_node, embed_nodes, embed_all, embed_subtree,
+    embed_pending, embedding_is_current, pending_embeddings
 )
 from chatcli.core.graph_ops import (
     smart_ask,
     promote_smart_ask,
     cite_smart_ask,
-    smart_thread, improve_doc, simsearch, save_web_result
+    smart_thread, improve_doc, simsearch, keyword_search, save_web_result
 )
+from chatcli.core.vector_index import VectorIndex, index_spec
 
 
 class ConversationGraph(GraphCore):
-    def __init__(self, storage_path=":memory:"):
+    def __init__(self, storage_path=":memory:", journal=None, autosave=None):
+        """
+        Args:
+            storage_path (str or Path): Graph file, "sqlite:///path.db" for the SQLite
+                backend, or ":memory:" for no persistence.
+            journal (bool): Persist mutations through an append-only journal instead of
+                rewriting the graph file on every save. Defaults to `storage.journal`
+                in the config; ignored by the SQLite backend.
+            autosave (bool): Write changes from a debounced background thread instead of
+                on every mutation (see `Autosaver`). Defaults to `storage.autosave`.
+        """
         super().__init__(storage_path)
-        self._data, self._last_smart_ask = load_graph_state(self)
+        # Keyword index of `_keyword_data`, plus nodes whose text changed since it was updated.
+        self._keyword = None
+        self._keyword_data = None
+        self._stale_text = {}
+        # Nodes queued by auto-embedding, embedded in one batch before the next vector search.
+        self._stale_embeddings = {}
         self._config = load_config()
+        storage_cfg = self._config.get("storage") or {}
+        self._embedding_store = EmbeddingStore(self._sidecar_path(".emb.npy"))
+        self._body_store = BodyStore(cache_size=storage_cfg.get("body_cache_size", 1024))
+        self._data, self._last_smart_ask = load_graph_state(self)
         self._embedding_provider = None
+        self._embedding_cache_db = None
+        self._embedding_worker = None
+
+        self._vector_index_cache = None
+
+        if journal is None:
+            journal = storage_cfg.get("journal", False)
+        if self._backend is None:
+            self._backend = self._open_journal(journal, storage_cfg.get("journal_max_bytes"))
+            if self._backend is not None and not journal:
+                # Journaling was switched off: fold the leftover log into the snapshot.
+                self._snapshot()
+                self._backend.remove()
+                self._backend = None
+
+        # Queue entries left by a previous session are recovered on first use (see below).
+        self._stale_scan = not self._in_memory
+
+        if autosave is None:
+            autosave = storage_cfg.get("autosave", False)
+        if autosave:
+            self.start_autosave(
+                idle_seconds=storage_cfg.get("autosave_idle_seconds", 1.0),
+                max_ops=storage_cfg.get("autosave_max_ops", 100),
+                max_delay=storage_cfg.get("autosave_max_delay", 5.0),
+            )
+
+    def _open_journal(self, enabled, max_bytes=None):
+        """Replay any journal left next to the graph file; keep it if journaling is enabled."""
+        if self._in_memory:
+            return None
+        journal = GraphJournal(self._sidecar_path(".journal"), max_bytes)
+        replayed = journal.replay(self, self._snapshot_seq)
+        if replayed:
+            self._edges = self._order = self._ancestry = self._tags = None
+        return journal if enabled or replayed else None
+
+    def _requeue_stale_embeddings(self):
+        """
+        Rebuild the auto-embedding queue, which only lives in memory, from the
+        loaded nodes: those never embedded and those edited since (their
+        `embedding_version` no longer matches) are queued again, so a lazy
+        queue left at exit is still embedded before the next search.
+        Embeddings from before versions were stamped are taken as current.
+        Runs once, when the queue is first drained, so opening a graph never
+        reads every node.
+        """
+        if not self._stale_scan:
+            return
+        self._stale_scan = False
+        if not self._config.get("auto_embed", False):
+            return
+        for node_id, node in self._data.items():
+            if "embedding" not in node or (
+                    "embedding_version" in node and not embedding_is_current(node)):
+                self._stale_embeddings[node_id] = None
+
+    def _embedded_nodes(self):
+        if isinstance(self._backend, SqliteBackend):
+            return self._backend.iter_embeddings()
+        return ((nid, node["embedding"]) for nid, node in self._data.items() if "embedding" in node)
+
+    def _embedded_ids(self):
+        if isinstance(self._backend, SqliteBackend):
+            return self._backend.embedded_ids()
+        return {nid for nid, node in self._data.items() if "embedding" in node}
+
+    @property
+    def _vector_index(self):
+        """
+        The graph's VectorIndex, opened on first use so startup stays cheap.
+
+        The index type follows `embedding.index` in the config; once the graph
+        outgrows the current type (e.g. `auto` crossing from flat to HNSW), the
+        index is rebuilt and retrained from the node embeddings.
+        """
+        index = self._vector_index_cache
+        if index is None:
+            index = self._vector_index_cache = self._load_vector_index()
+        elif self._batch is None and index.outgrown(self._index_spec(len(index))):
+            self.rebuild_vector_index()
+        return self._vector_index_cache
+
+    def _index_spec(self, count):
+        return index_spec(self._config.get("embedding"), count, self._vector_index_cache.dim
+                          if self._vector_index_cache is not None else None)
+
+    def _load_vector_index(self):
+        """Open the saved vector index, rebuilding it if it is missing, out of sync or of the wrong type."""
+        path = self._sidecar_path(".faiss")
+        index = VectorIndex.load(path) if path else None
+        if index is not None and set(index.node_ids()) == self._embedded_ids():
+            spec = index_spec(self._config.get("embedding"), len(index), index.dim)
+            if not index.outgrown(spec):
+                index.tune(spec)
+                return index
+        index = VectorIndex.build(self._embedded_nodes(), self._config.get("embedding"))
+        index.dirty = bool(path)
+        return index
+
+    def rebuild_vector_index(self):
+        """Rebuild the vector index from node embeddings, e.g. after replacing graph data."""
+        self._vector_index_cache = VectorIndex.build(self._embedded_nodes(), self._config.get("embedding"))
+        self._vector_index_cache.dirty = True
+
+    @property
+    def _keyword_index(self):
+        """The graph's KeywordIndex, opened or built on first use and brought up to date."""
+        if self._keyword is None or self._keyword_data is not self._data:
+            self._keyword = self._load_keyword_index(first=self._keyword is None)
+            self._keyword_data = self._data
+        if self._stale_text:
+            stale, self._stale_text = self._stale_text, {}
+            for node_id in stale:
+                node = self._data.get(node_id)
+                if node is None:
+                    self._keyword.remove(node_id)
+                else:
+                    self._keyword.add(node_id, node_text(node))
+        return self._keyword
+
+    def _load_keyword_index(self, first=True):
+        """Open the saved keyword index if it still matches the graph, else build one."""
+        path = self._sidecar_path(".bm25.json")
+        if first and path is not None and self._sidecar_is_current(path):
+            index = KeywordIndex.load(path)
+            if index is not None and set(index.node_ids()) == set(self._data.keys()):
+                return index
+        index = KeywordIndex.build((nid, node_text(node)) for nid, node in self._data.items())
+        index.dirty = path is not None
+        return index
+
+    def _sidecar_is_current(self, path):
+        if not path.exists():
+            return False
+        if not isinstance(self._backend, SqliteBackend):
+            return True  # written with every snapshot, removed by text edits made while it is not loaded
+        # SQLite commits rows without snapshots; trust the sidecar only if nothing was written since.
+        written = path.stat().st_mtime
+        db = self._storage_path
+        return all(not p.exists() or p.stat().st_mtime < written
+                   for p in (db, db.with_name(db.name + "-wal")))
+
+    def _record(self, op, **fields):
+        super()._record(op, **fields)
+        if op == "add_node" or (op == "set" and not set(fields["fields"]).isdisjoint(TEXT_FIELDS)):
+            self._stale_text[fields["id"]] = None
+            if self._keyword is None or self._keyword_data is not self._data:
+                # No loaded index will rewrite the keyword sidecar, so it no longer matches the text.
+                path = self._sidecar_path(".bm25.json")
+                if path is not None:
+                    path.unlink(missing_ok=True)
+
+    def _on_snapshot(self):
+        if self._vector_index_cache is not None and self._vector_index_cache.dirty:
+            self._vector_index.save(self._sidecar_path(".faiss"))
+        if self._keyword is not None and self._keyword_data is self._data:
+            index = self._keyword_index
+            if index.dirty:
+                index.save(self._sidecar_path(".bm25.json"))
+
+    @property
+    def _embedding_cache(self):
+        """
+        The shared content-hash embedding cache (see `EmbeddingCache`), or None
+        if `embedding.cache` is off. It lives in `embedding.cache_path`, by
+        default next to the graph file, and in memory for in-memory graphs.
+        """
+        cfg = self._config.get("embedding") or {}
+        if not cfg.get("cache", True):
+            return None
+        if self._embedding_cache_db is None:
+            path = cfg.get("cache_path") or (None if self._in_memory else self._save_dir / "embedding_cache.db")
+            self._embedding_cache_db = EmbeddingCache(path, cfg.get("cache_max_entries", 100_000))
+        return self._embedding_cache_db
+
+    @property
+    def _embedding_namespace(self):
+        """Cache namespace: vectors from different providers or models never mix."""
+        cfg = self._config.get("embedding") or {}
+        return f"{cfg.get('provider', 'mock')}:{cfg.get('model', '')}"
+
+    def close(self):
+        worker, self._embedding_worker = self._embedding_worker, None
+        if worker is not None:
+            worker.stop()
+        super().close()
+        if isinstance(self._backend, SqliteBackend):
+            self._backend.close()
+        provider, self._embedding_provider = self._embedding_provider, None
+        if provider is not None:
+            provider.close()
+        cache, self._embedding_cache_db = self._embedding_cache_db, None
+        if cache is not None:
+            cache.close()
 
     def get_embedding_provider(self):
         if self._embedding_provider is None:
@@ -35,6 +259,7 @@ class ConversationGraph(GraphCore):
         return self._embedding_provider
 
     def update_last_smart_ask(self, from_node_id, query_text, answer, citations):
+        self._record("smart_ask")
         self._last_smart_ask = {
             "from_node_id": from_node_id,
             "question": query_text.strip(),
@@ -42,12 +267,83 @@ class ConversationGraph(GraphCore):
             "citations": citations,
         }
 
+    def _auto_embed(self, node_id, dry_run=False):
+        """
+        If `auto_embed` is on, queue `node_id` for embedding unless its
+        embedding already matches its text (see `embedding_is_current`).
+
+        When the current batch (or this call) ends, the queue is handed to the
+        background worker with `embedding.background`, or embedded right away
+        unless `embedding.lazy` is set. Lazy queues are drained in provider
+        batches before the next vector search, or by `embed_pending`.
+        """
+        if not self._config.get("auto_embed", False):
+            return
+        if dry_run:
+            self.embed_node(node_id, dry_run=True)
+            return
+        if not embedding_is_current(self._data[node_id]):
+            self._stale_embeddings[node_id] = None
+            if self._batch is None:
+                self._on_batch_exit()
+
+    def _on_batch_exit(self):
+        if not self._stale_embeddings:
+            return
+        cfg = self._config.get("embedding") or {}
+        if cfg.get("background", False):
+            node_ids = pending_embeddings(self)
+            self._stale_embeddings.clear()
+            self.embed_async(node_ids)
+        elif not cfg.get("lazy", False):
+            self.embed_pending()
+
+    def embed_async(self, node_ids):
+        """
+        Embed `node_ids` on the background worker (started on first use);
+        returns a Future that resolves once their vectors are in the graph.
+        """
+        if self._embedding_worker is None:
+            cfg = self._config.get("embedding") or {}
+            self._embedding_worker = EmbeddingWorker(
+                self, batch_size=cfg.get("batch_size", 32), linger=cfg.get("background_linger", 0.05))
+        return self._embedding_worker.submit(node_ids)
+
+    def wait_for_embeddings(self, timeout=None):
+        """
+        Block until background embedding jobs are written; False on timeout.
+
+        The worker needs the graph lock to write. A thread already holding it
+        (inside a batch or a shell command) embeds the outstanding nodes
+        itself instead of waiting.
+        """
+        worker = self._embedding_worker
+        if worker is None:
+            return True
+        if self._lock.held():
+            worker.drain(lambda node_ids: embed_nodes(self, [
+                nid for nid in node_ids if nid in self._data and not embedding_is_current(self._data[nid])]))
+            return True
+        return worker.wait(timeout)
+
+    def _after_rollback(self, node_ids, replaced):
+        self._stale_text.update(dict.fromkeys(node_ids))
+        if replaced:
+            self.rebuild_vector_index()
+            return
+        for node_id in node_ids:
+            node = self._data.get(node_id)
+            if node is not None and "embedding" in node:
+                self._vector_index.add(node_id, node["embedding"])
+            else:
+                self._vector_index.remove(node_id)
+
     def new_thread(self, prompt, dry_run_embedding=False):
-        node_id = self.add_node(prompt)
-        self._data[node_id]["response"] = f"[MOCK RESPONSE to: {prompt}]"
-        if self._config.get("auto_embed", False):
-            self.embed_node(node_id, dry_run=dry_run_embedding)
-        self._save()
+        with self.batch():
+            node_id = self.add_node(prompt)
+            self._record("set", id=node_id, fields=["response"])
+            self._data[node_id]["response"] = f"[MOCK RESPONSE to: {prompt}]"
+            self._auto_embed(node_id, dry_run=dry_run_embedding)
         return node_id
 
     def new(self, *args, **kwargs):
@@ -57,46 +353,79 @@ class ConversationGraph(GraphCore):
         if parent_id not in self._data:
             raise ValueError("Parent ID not found")
 
-        node_id = self.add_node(prompt, parent_id=parent_id)
-        self._data[node_id]["response"] = f"[MOCK RESPONSE to: {prompt}]"
-        if self._config.get("auto_embed", False):
-            self.embed_node(node_id, dry_run=dry_run_embedding)
-        self._save()
+        with self.batch():
+            node_id = self.add_node(prompt, parent_id=parent_id)
+            self._record("set", id=node_id, fields=["response"])
+            self._data[node_id]["response"] = f"[MOCK RESPONSE to: {prompt}]"
+            self._auto_embed(node_id, dry_run=dry_run_embedding)
         return node_id
 
     def edit_response(self, node_id, new_response, dry_run_embedding=False):
         if node_id not in self._data:
             raise ValueError("Node ID not found")
-        self._data[node_id]["response"] = new_response
-        if self._config.get("auto_embed", False):
-            self.embed_node(node_id, dry_run=dry_run_embedding)
-        self._save()
+        with self.batch():
+            self._record("set", id=node_id, fields=["response"])
+            self._data[node_id]["response"] = new_response
+            self._auto_embed(node_id, dry_run=dry_run_embedding)
 
     def add_comment(self, node_id, comment, dry_run_embedding=False):
         if node_id not in self._data:
             raise ValueError("Node ID not found")
-        self._data[node_id]["comment"] = comment
-        if self._config.get("auto_embed", False):
-            self.embed_node(node_id, dry_run=dry_run_embedding)
-        self._save()
+        with self.batch():
+            self._record("set", id=node_id, fields=["comment"])
+            self._data[node_id]["comment"] = comment
+            self._auto_embed(node_id, dry_run=dry_run_embedding)
 
     def retry(self, node_id, new_prompt=None, dry_run_embedding=False):
         if node_id not in self._data:
             raise ValueError("Node ID not found")
         prompt = new_prompt if new_prompt else self._data[node_id]["prompt"]
-        self._data[node_id]["response"] = f"[MOCK RETRY to: {prompt}]"
-        if new_prompt:
-            self._data[node_id]["prompt"] = new_prompt
-        if self._config.get("auto_embed", False):
-            self.embed_node(node_id, dry_run=dry_run_embedding)
-        self._save()
+        with self.batch():
+            self._record("set", id=node_id, fields=["prompt", "response"])
+            self._data[node_id]["response"] = f"[MOCK RETRY to: {prompt}]"
+            if new_prompt:
+                self._data[node_id]["prompt"] = new_prompt
+            self._auto_embed(node_id, dry_run=dry_run_embedding)
 
     def embed_node(self, node_id, dry_run=False):
         return embed_node(self, node_id, dry_run=dry_run)
 
+    def embed_nodes(self, node_ids, dry_run=False, batch_size=None):
+        return embed_nodes(self, node_ids, dry_run=dry_run, batch_size=batch_size)
+
+    def embed_all(self, dry_run=False, force=False):
+        return embed_all(self, dry_run=dry_run, force=force)
+
+    def reembed_all(self, dry_run=False):
+        """Recompute every node's embedding, e.g. after switching embedding models."""
+        return embed_all(self, dry_run=dry_run, force=True)
+
+    def embed_subtree(self, node_id, dry_run=False, max_depth=None):
+        return embed_subtree(self, node_id, dry_run=dry_run, max_depth=max_depth)
+
+    def embed_pending(self, dry_run=False):
+        return embed_pending(self, dry_run=dry_run)
+
+    def _store_embedding(self, node_id, vector, version=None):
+        """Attach a computed embedding (of text with content version `version`) to `node_id` and index it."""
+        with self._lock:
+            node = self._data[node_id]
+            self._record("set", id=node_id, fields=["embedding_version"])
+            node["embedding_version"] = version
+            self._record("embed", id=node_id)
+            node["embedding"] = vector
+            if self._embedding_store.mark_dirty(node_id, len(vector)):
+                # New embedding model: the sidecar matrix is rebuilt at the new width,
+                # so rows referenced by the journal or snapshot must be rewritten too.
+                self._compact_on_save = True
+            self._vector_index.add(node_id, vector)
+
     def get_embedding(self, text):
         return get_embedding(self, text=text)
 
+    def get_embeddings(self, texts, batch_size=None, quiet=False):
+        return get_embeddings(self, texts, batch_size=batch_size, quiet=quiet)
+
     # LLM Suggestions
     def ask_llm_with_context(self, *args, **kwargs):
         return ask_llm_with_context(self, *args, **kwargs)
@@ -155,6 +484,12 @@ class ConversationGraph(GraphCore):
     def simsearch(self, *args, **kwargs):
         return simsearch(self, *args, **kwargs)
 
+    def hybrid_search(self, *args, **kwargs):
+        return hybrid_search(self, *args, **kwargs)
+
+    def keyword_search(self, *args, **kwargs):
+        return keyword_search(self, *args, **kwargs)
+
     def load_from_file(self, *args, **kwargs):
         return load_from_file(self, *args, **kwargs)
 
@@ -178,18 +513,62 @@ class ConversationGraph(GraphCore):
         if from_node_id not in self.data or to_node_id not in self.data:
             raise ValueError("Invalid node ID(s)")
 
-        if self._has_path(to_node_id, from_node_id):
+        # Labels the new edge in the citation order up front; if the batch below is
+        # rolled back the order stays valid, just stricter than necessary.
+        if not self._citation_order.add(from_node_id, to_node_id):
             raise ValueError("Citation would introduce a cycle")
 
-        self.data[from_node_id].setdefault("citations", [])
-        if to_node_id not in self.data[from_node_id]["citations"]:
-            self.data[from_node_id]["citations"].append(to_node_id)
+        with self.batch():
+            self._link_citation(from_node_id, to_node_id)
+            self._auto_embed(from_node_id, dry_run=dry_run_embedding)
+
+    def add_citations(self, edges, dry_run_embedding=False):
+        """
+        Add many citation edges at once.
 
-        config = load_config()
-        if config.get("auto_embed", False):
-            self.embed_node(from_node_id, dry_run=dry_run_embedding)
+        Every node ID is checked before anything changes. The edges are then
+        checked against the citation order in the given order; edges that would
+        close a cycle (given the graph plus the edges accepted before them) are
+        skipped and returned. The rest are applied in one batch: each citing node
+        is embedded once and the graph is persisted once.
 
-        self._save()
+        Args:
+            edges (iterable): (from_node_id, to_node_id) pairs.
+            dry_run_embedding (bool): If True, skip actual embedding update.
+
+        Returns:
+            list: The (from_node_id, to_node_id) edges rejected because they would
+            introduce a cycle.
+
+        Raises:
+            ValueError: If any node ID is invalid; no edge is added in that case.
+        """
+        edges = list(edges)
+        invalid = [(a, b) for a, b in edges if a not in self.data or b not in self.data]
+        if invalid:
+            raise ValueError(f"Invalid node ID(s) in citations: {invalid}")
+
+        rejected = []
+        order = self._citation_order
+        with self.batch():
+            for from_node_id, to_node_id in edges:
+                # Accepted edges are linked right away so later checks see them.
+                if order.add(from_node_id, to_node_id):
+                    self._link_citation(from_node_id, to_node_id)
+                    self._auto_embed(from_node_id, dry_run=dry_run_embedding)
+                else:
+                    rejected.append((from_node_id, to_node_id))
+        return rejected
+
+    def _link_citation(self, from_node_id, to_node_id):
+        """Append the citation edge (if new) and index it; the caller has checked for cycles."""
+        if to_node_id in self.data[from_node_id].get("citations", []):
+            return
+        self._record("add_citation", id=from_node_id, target=to_node_id)
+        self.data[from_node_id].setdefault("citations", []).append(to_node_id)
+        edges = self._live_edges()
+        if edges is not None:
+            edges.add_citation(from_node_id, to_node_id)
 
     def import_from_file(self, *args, **kwargs):
         return import_from_file(self, *args, **kwargs)
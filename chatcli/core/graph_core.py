@@ -1,19 +1,111 @@
 # chatcli/core/graph_core.py
 
 import json, os
+import threading
 import uuid
+from contextlib import contextmanager
 from pathlib import Path
+from chatcli.core.ancestor_index import AncestorIndex
+from chatcli.core.autosave import Autosaver
+from chatcli.core.body_store import LazyNode
+from chatcli.core.citation_order import CitationOrder
 from chatcli.core.config import load_config
+from chatcli.core.edge_index import ReverseEdgeIndex
 from chatcli.core.graph_io import save_to_file
+from chatcli.core.graph_snapshot import SNAPSHOT_SUFFIX
+from chatcli.core.graph_sqlite import SqliteBackend, parse_sqlite_path
+from chatcli.core.tag_index import TagIndex, match_tags
+from chatcli.core.traversal import bfs, dfs
+
+
+class _GraphLock:
+    """Reentrant graph lock that can tell whether the calling thread holds it."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._owner = None
+        self._depth = 0
+
+    def acquire(self, blocking=True, timeout=-1):
+        if not self._lock.acquire(blocking, timeout):
+            return False
+        self._owner = threading.get_ident()
+        self._depth += 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if not self._depth:
+            self._owner = None
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def held(self):
+        """True if the calling thread holds the lock (only that thread can set `_owner` to its id)."""
+        return self._owner == threading.get_ident()
+
+
+class _BatchState:
+    """Bookkeeping for an open `GraphCore.batch()` block."""
+
+    def __init__(self, graph):
+        self.data = graph._data
+        self.last_smart_ask = graph._last_smart_ask
+        self.compact_on_save = graph._compact_on_save
+        self.saved = []      # (data dict, node_id, pre-change copy or None)
+        self.seen = set()    # (id(data dict), node_id) already saved
+        # Backend records queued before the batch (e.g. awaiting autosave) survive a rollback.
+        self.mark = graph._backend.mark() if graph._backend is not None else 0
+
+
+def _copy_node(node):
+    if isinstance(node, LazyNode):
+        return node.copy()  # keep heavy fields on disk
+    return {k: list(v) if isinstance(v, list) else v for k, v in node.items()}
 
 
 class GraphCore:
     def __init__(self, storage_path=None):
         self._in_memory = storage_path == ":memory:"
         self._data = {}
+        # Incremental persistence backend (GraphJournal or SqliteBackend); None means
+        # every save rewrites the whole graph file.
+        self._backend = None
+        self._snapshot_seq = 0
+        self._compact_on_save = False
+        self._last_smart_ask = None
+        self._batch = None
+        # Reverse child/citation edges of `_edges_data`; rebuilt when `_data` is replaced.
+        self._edges = None
+        self._edges_data = None
+        # Depth/jump pointers of the reply tree for `_ancestry_data` (see AncestorIndex).
+        self._ancestry = None
+        self._ancestry_data = None
+        # Topological labels of the citation DAG for `_order_data` (see CitationOrder).
+        self._order = None
+        self._order_data = None
+        # Tag -> node ids of `_tags_data`; rebuilt when `_data` is replaced.
+        self._tags = None
+        self._tags_data = None
+        # Held by batches and by the autosave thread while it writes (see Autosaver).
+        self._lock = _GraphLock()
+        self._autosaver = None
+        sqlite_path = parse_sqlite_path(storage_path) if storage_path else None
         if self._in_memory:
             self._storage_path = None
             self._save_dir = Path("data")
+        elif sqlite_path is not None:
+            self._storage_path = sqlite_path
+            self._save_dir = self._storage_path.parent
+            self._backend = SqliteBackend(sqlite_path)
+            self._backend.attach(self)
+            self._data = self._backend.nodes
         else:
             self._storage_path = Path(storage_path or "data/conversations.json")
             self._save_dir = self._storage_path.parent
@@ -38,12 +130,162 @@ class GraphCore:
             "children": [],
             "tags": [],
         }
+        with self._lock:
+            self._insert_node(node)
+            self._save()
+        return node_id
+
+    def _insert_node(self, node):
+        """Insert a fully built node and link it under its parent, if present."""
+        node_id = node["id"]
+        parent_id = node.get("parent_id")
+        self._record("add_node", id=node_id)
         self._data[node_id] = node
-        if parent_id and parent_id in self._data:
+        if parent_id and parent_id in self._data and node_id not in self._data[parent_id]["children"]:
+            self._remember(parent_id)
             self._data[parent_id]["children"].append(node_id)
-        self._save()
+        edges = self._live_edges()
+        if edges is not None:
+            edges.add_node(node_id, node)
+            if parent_id and parent_id in self._data:
+                edges.add_child(parent_id, node_id)
+        if self._order is not None and self._order_data is self._data:
+            self._order_citations(node_id, node)
+        if self._tags is not None and self._tags_data is self._data:
+            self._tags.add_node(node_id, node)
+        ancestry = self._ancestry if self._ancestry_data is self._data else None
+        if ancestry is not None:
+            if any(c in ancestry for c in node.get("children", [])):
+                self._ancestry = None  # children indexed as roots before their parent arrived (imports)
+            else:
+                ancestry.add(node_id)
         return node_id
 
+    def _order_citations(self, node_id, node):
+        """Fit a node inserted with citations (or already cited, e.g. mid-import) into the order."""
+        order = self._order
+        edges = [(node_id, cited) for cited in node.get("citations", []) if cited in self._data]
+        edges += [(citing, node_id) for citing in self.get_cited_by(node_id) if citing in self._data]
+        for citing, cited in edges:
+            if not order.add(citing, cited):
+                self._order = None  # the data itself has a cycle; rebuild best-effort on next use
+                return
+
+    @property
+    def _ancestor_index(self):
+        """The `AncestorIndex` for the current node dict; nodes are indexed on first query."""
+        if self._ancestry is None or self._ancestry_data is not self._data:
+            data = self._data
+
+            def parent_of(node_id):
+                parent_id = data[node_id].get("parent_id")
+                return parent_id if parent_id in data else None
+
+            self._ancestry = AncestorIndex(parent_of)
+            self._ancestry_data = data
+        return self._ancestry
+
+    @property
+    def _citation_order(self):
+        """The `CitationOrder` for the current node dict, built on first use."""
+        if self._order is None or self._order_data is not self._data:
+            data = self._data
+            self._order = CitationOrder.build(
+                data, lambda nid: data[nid].get("citations", []) if nid in data else [], self.get_cited_by)
+            self._order_data = data
+        return self._order
+
+    @property
+    def _edge_index(self):
+        """The `ReverseEdgeIndex` for the current node dict, built on first use."""
+        if self._edges is None or self._edges_data is not self._data:
+            self._edges = ReverseEdgeIndex.build(self._data)
+            self._edges_data = self._data
+        return self._edges
+
+    @property
+    def _tag_index(self):
+        """The `TagIndex` for the current node dict, built on first use."""
+        if self._tags is None or self._tags_data is not self._data:
+            self._tags = TagIndex.build(self._data)
+            self._tags_data = self._data
+        return self._tags
+
+    def _live_edges(self):
+        """The edge index if it is built and current (so it needs an incremental update)."""
+        if self._edges is not None and self._edges_data is self._data:
+            return self._edges
+        return None
+
+    def _record(self, op, **fields):
+        """
+        Note a mutation just *before* applying it: an open batch saves the node's
+        prior state for rollback, and the persistence backend queues the record.
+        """
+        if "id" in fields:
+            self._remember(fields["id"])
+        if self._backend is not None:
+            self._backend.record(op, **fields)
+
+    def _remember(self, node_id):
+        """Inside a batch, keep a pre-change copy of `node_id` so it can be restored."""
+        batch = self._batch
+        if batch is None or (id(self._data), node_id) in batch.seen:
+            return
+        batch.seen.add((id(self._data), node_id))
+        node = self._data.get(node_id)
+        batch.saved.append((self._data, node_id, _copy_node(node) if node is not None else None))
+
+    @contextmanager
+    def batch(self):
+        """
+        Group mutations so the graph is persisted once, at the end of the block.
+
+        Inside the block `_save()` is deferred to a single save on exit, after
+        `_on_batch_exit` (which e.g. runs the auto-embeds queued in the block).
+        If the block raises, every node touched in it (and `last_smart_ask`) is
+        restored, queued records are discarded, and the exception propagates.
+        Nested batches join the outermost one.
+        """
+        if self._batch is not None:
+            yield self
+            return
+
+        with self._lock:
+            state = self._batch = _BatchState(self)
+            try:
+                yield self
+                self._on_batch_exit()
+            except BaseException:
+                self._batch = None
+                self._rollback(state)
+                raise
+            self._batch = None
+            self._save()
+
+    def _rollback(self, state):
+        if self._backend is not None:
+            self._backend.discard(state.mark)
+        replaced = self._data is not state.data
+        self._data = state.data
+        self._last_smart_ask = state.last_smart_ask
+        self._compact_on_save = state.compact_on_save
+        touched = []
+        for data, node_id, saved in reversed(state.saved):
+            if data is not self._data:
+                continue
+            if saved is None:
+                self._data.pop(node_id, None)
+            else:
+                self._data[node_id] = saved
+            touched.append(node_id)
+        self._edges = self._ancestry = self._tags = None  # restored nodes may have dropped edges; rebuild on next use
+        self._after_rollback(touched, replaced)
+
+    def _after_rollback(self, node_ids, replaced):
+        """Hook for resyncing derived indexes with the nodes a rollback restored."""
+        pass
+
     def get_node(self, node_id):
         return self._data.get(node_id)
 
@@ -51,53 +293,164 @@ class GraphCore:
         return self._data.get(node_id, {}).get("children", [])
 
     def get_parents(self, node_id):
-        return [n["id"] for n in self._data.values() if node_id in n.get("children", [])]
+        if hasattr(self._data, "parents_of"):
+            return self._data.parents_of(node_id)
+        return self._edge_index.parents(node_id)
 
     def tag_node(self, node_id, tag):
-        if node_id in self._data:
-            self._data[node_id].setdefault("tags", []).append(tag)
-            self._save()
+        """Add `tag` to `node_id`; a tag the node already carries is not added again."""
+        if node_id in self._data and tag not in self._data[node_id].get("tags", []):
+            with self._lock:
+                self._record("tag", id=node_id, tag=tag)
+                self._data[node_id].setdefault("tags", []).append(tag)
+                if self._tags is not None and self._tags_data is self._data:
+                    self._tags.add(node_id, tag)
+                self._save()
+
+    def nodes_with_tag(self, tag):
+        """Ids of the nodes carrying `tag`, in tagging order."""
+        if hasattr(self._data, "tagged"):
+            return self._data.tagged(tag)
+        return self._tag_index.nodes(tag)
+
+    def find_by_tags(self, all=None, any=None, none=None):
+        """
+        Set of node ids matching a boolean tag query: every tag in `all`, at
+        least one in `any`, and none in `none`. With only `none`, every other
+        node matches.
+        """
+        return match_tags(self.nodes_with_tag, lambda: self._data.keys(), all=all, any=any, none=none)
 
     def list_saved_files(graph):
-        return [f.name for f in graph._save_dir.glob("*.json")]
+        return sorted(f.name for pattern in ("*.json", f"*{SNAPSHOT_SUFFIX}")
+                      for f in graph._save_dir.glob(pattern))
+
+    def _sidecar_path(self, suffix):
+        """Path of a file stored next to the graph file, e.g. `conversations.faiss`."""
+        if self._in_memory:
+            return None
+        return self._storage_path.with_name(self._storage_path.stem + suffix)
 
     def _save(self):
-        self.save_to_file(self._storage_path)
+        if self._in_memory or self._batch is not None:
+            return
+        if self._autosaver is not None:
+            self._autosaver.touch()
+            return
+        self._write()
+
+    def _write(self):
+        """Persist pending changes now (the work `_save()` hands to the autosaver)."""
+        if self._backend is not None:
+            self._backend.commit(self)
+            if not (self._compact_on_save or self._backend.needs_compaction()):
+                return
+        self._snapshot()
+
+    def start_autosave(self, idle_seconds=1.0, max_ops=100, max_delay=5.0):
+        """Move saves to a background thread (see `Autosaver`); no-op for in-memory graphs."""
+        if self._in_memory or self._autosaver is not None:
+            return
+        self._autosaver = Autosaver(self, idle_seconds, max_ops, max_delay)
+
+    def flush(self):
+        """Write any changes the autosaver has not persisted yet."""
+        if self._autosaver is not None:
+            self._autosaver.flush()
+
+    def close(self):
+        """Stop the autosave thread, flushing pending changes."""
+        autosaver, self._autosaver = self._autosaver, None
+        if autosaver is not None:
+            autosaver.stop()
+
+    def _snapshot(self):
+        """Write the full graph state, folding in (and truncating) any journal."""
+        if self._backend is not None:
+            self._backend.snapshot(self)
+        else:
+            # save_to_file resolves names against _save_dir, the storage file's parent
+            self.save_to_file(self._storage_path.name)
+        self._compact_on_save = False
+        self._on_snapshot()
+
+    def _on_snapshot(self):
+        """Hook for persisting derived sidecars (indexes) alongside a full snapshot."""
+        pass
+
+    def _on_batch_exit(self):
+        """Hook run at the end of a successful outermost batch, before its save (still inside it)."""
+        pass
 
     def save_to_file(self, filename):
         save_to_file(self, filename)
 
     def _has_path(self, start_id, target_id, visited=None):
-        if visited is None:
-            visited = set()
-        if start_id == target_id:
-            return True
-        visited.add(start_id)
-        for neighbor in self.data.get(start_id, {}).get("citations", []):
-            if neighbor not in visited and self._has_path(neighbor, target_id, visited):
+        """True if `target_id` is reachable from `start_id` through citations (iterative DFS)."""
+        visited = set() if visited is None else visited
+        stack = [start_id]
+        while stack:
+            node_id = stack.pop()
+            if node_id == target_id:
                 return True
+            if node_id in visited:
+                continue
+            visited.add(node_id)
+            stack.extend(self.data.get(node_id, {}).get("citations", []))
         return False
 
     def ancestors(self, node_id):
+        """Parent, grandparent, ... up to the root of `node_id`'s reply tree."""
+        if node_id not in self.data:
+            return []
+        index = self._ancestor_index
         path = []
-        current = self.data.get(node_id)
-        while current and current.get("parent_id"):
-            parent_id = current["parent_id"]
+        parent_id = index.parent(node_id)
+        while parent_id is not None:
             path.append(parent_id)
-            current = self.data.get(parent_id)
+            parent_id = index.parent(parent_id)
         return path
 
-    def descendants(self, node_id):
-        result = []
+    def is_ancestor(self, ancestor_id, node_id):
+        """True if `ancestor_id` is a strict ancestor of `node_id` in the reply tree."""
+        if ancestor_id not in self.data or node_id not in self.data:
+            return False
+        index = self._ancestor_index
+        k = index.depth(node_id) - index.depth(ancestor_id)
+        return k > 0 and index.ancestor_at(node_id, k) == ancestor_id
+
+    def _require(self, *node_ids):
+        for node_id in node_ids:
+            if node_id not in self.data:
+                raise ValueError(f"Node ID not found: {node_id}")
 
-        def dfs(nid):
-            children = self.data.get(nid, {}).get("children", [])
-            for child_id in children:
-                result.append(child_id)
-                dfs(child_id)
+    def depth(self, node_id):
+        """Number of reply edges between `node_id` and its root."""
+        self._require(node_id)
+        return self._ancestor_index.depth(node_id)
 
-        dfs(node_id)
-        return result
+    def ancestor_at(self, node_id, k):
+        """The k-th ancestor of `node_id` (k=0 is the node), or None past the root."""
+        self._require(node_id)
+        return self._ancestor_index.ancestor_at(node_id, k)
+
+    def lowest_common_ancestor(self, a, b):
+        """Where the reply branches of `a` and `b` diverge; None if they share no root."""
+        self._require(a, b)
+        return self._ancestor_index.lowest_common_ancestor(a, b)
+
+    def path_between(self, a, b):
+        """Node ids on the reply-tree path from `a` to `b`, or None if unconnected."""
+        self._require(a, b)
+        return self._ancestor_index.path_between(a, b)
+
+    def descendants(self, node_id):
+        return [nid for nid, _ in dfs(self, node_id, include_start=False)]
+
+    def walk(self, start_id, order="dfs", **kwargs):
+        """Iterate `(node_id, depth)` from `start_id`; see `chatcli.core.traversal` for options."""
+        walker = {"dfs": dfs, "bfs": bfs}[order]
+        return walker(self, start_id, **kwargs)
 
     def get_citations(self, node_id):
         if node_id not in self.data:
@@ -105,10 +458,9 @@ class GraphCore:
         return self.data[node_id].get("citations", [])
 
     def get_cited_by(self, node_id):
-        return [
-            n["id"] for n in self.data.values()
-            if node_id in n.get("citations", [])
-        ]
+        if hasattr(self.data, "cited_by"):
+            return self.data.cited_by(node_id)
+        return self._edge_index.cited_by(node_id)
 
     def filter_cites(self, node_id):
         return self.get_citations(node_id)
@@ -133,25 +485,26 @@ class GraphCore:
         prompt = node['prompt'][:80].replace("\n", " ")
         return f"[{node_id}] {prompt}"
 
-    def print_tree(self, root_id=None, indent=0, current_id=None):
+    def print_tree(self, root_id=None, indent=0, current_id=None, max_depth=None):
         def _print_node(node_id, indent):
-            node = self.data.get(node_id)
-            if not node:
+            if node_id not in self.data:
                 print("Node not found.")
                 return
-            comment_str = f"  # {node['comment']}" if 'comment' in node else ""
-            summary_str = f"\n{' ' * (indent + 2)}[summary] {node['summary']}" if 'summary' in node else ""
-            tag_str = f"  [tags: {', '.join(node['tags'])}]" if node['tags'] else ""
-            subtree_summary_str = f"\n{' ' * (indent + 2)}[subtree_summary] {node['subtree_summary']}" if 'subtree_summary' in node else ""
-            citation_str = f"\n{' ' * (indent + 2)}[cites] {', '.join(node['citations'])}" if 'citations' in node else ""
-            print(
-                " " * indent + f"[{node['id']}] {node['prompt']}{comment_str}{tag_str}" + summary_str + subtree_summary_str + citation_str)
-            for child_id in node.get("children", []):
-                _print_node(child_id, indent + 2)
+            # Lines are printed as the walk reaches them, so large trees start showing at once.
+            for nid, depth in dfs(self, node_id, max_depth=max_depth):
+                node = self.data[nid]
+                pad = indent + 2 * depth
+                comment_str = f"  # {node['comment']}" if 'comment' in node else ""
+                summary_str = f"\n{' ' * (pad + 2)}[summary] {node['summary']}" if 'summary' in node else ""
+                tag_str = f"  [tags: {', '.join(node['tags'])}]" if node['tags'] else ""
+                subtree_summary_str = f"\n{' ' * (pad + 2)}[subtree_summary] {node['subtree_summary']}" if 'subtree_summary' in node else ""
+                citation_str = f"\n{' ' * (pad + 2)}[cites] {', '.join(node['citations'])}" if 'citations' in node else ""
+                print(
+                    " " * pad + f"[{node['id']}] {node['prompt']}{comment_str}{tag_str}" + summary_str + subtree_summary_str + citation_str)
 
         # Keyword resolution
         if root_id in ("root", None):
-            root_nodes = [nid for nid, node in self.data.items() if not node.get("parent")]
+            root_nodes = [nid for nid, node in self.data.items() if not node.get("parent_id")]
             for rid in root_nodes:
                 _print_node(rid, indent)
         elif root_id == "parent":
@@ -1,69 +1,312 @@
 # chatcli/core/graph_io.py
 
 import json
+import os
+from itertools import islice
 from pathlib import Path
 
-from chatcli.core.config import load_config
+from chatcli.core.body_store import BODY_FIELDS, BodyStore, LazyNode
+from chatcli.core.embedding_store import EmbeddingStore, embedding_sidecar
+from chatcli.core.graph_journal import GraphJournal
+from chatcli.core.graph_stream import iter_graph_json, validate_node
+from chatcli.core.graph_snapshot import is_binary_path, is_binary_snapshot, read_snapshot, write_snapshot
+from chatcli.core.graph_sqlite import SqliteBackend
+
+def _embedding_store_for(graph, path):
+    """The graph's own embedding store for its storage file, a separate one otherwise."""
+    if Path(path) == graph._storage_path:
+        return graph._embedding_store
+    return None
+
+
+def _body_store_for(graph, path, writing=False):
+    """The graph's own body store for its storage file (when writing, only if `lazy_bodies` is on)."""
+    if Path(path) != graph._storage_path:
+        return None
+    if writing and not (graph._config.get("storage") or {}).get("lazy_bodies", False):
+        return None
+    return graph._body_store
+
+
+def _attach_embeddings(nodes, path, store=None):
+    """Replace `embedding_row` references with zero-copy views into the sidecar matrix."""
+    if store is None:
+        store = EmbeddingStore(embedding_sidecar(path), readonly=True)
+    for node_id, node in nodes.items():
+        row = node.pop("embedding_row", None)
+        if row is not None:
+            store.bind(node_id, row)
+            node["embedding"] = store.get(row)
+    return nodes
+
+
+def _attach_lazy(nodes, path, bodies_name, store=None, bodies=None):
+    """Wrap skeleton records in `LazyNode`s backed by the bodies file and embedding sidecar."""
+    if store is None:
+        store = EmbeddingStore(embedding_sidecar(path), readonly=True)
+    if bodies is None:
+        bodies = BodyStore()
+    bodies.open(Path(path).with_name(bodies_name))
+    for node_id, node in nodes.items():
+        row = node.pop("embedding_row", None)
+        if row is not None:
+            store.bind(node_id, row)
+        ref = node.pop("body_ref", None)
+        keys = node.pop("body_keys", ())
+        nodes[node_id] = LazyNode(node, bodies, ref, keys, store, row)
+    return nodes
+
+
+def _skeleton(node, exclude):
+    """Copy of `node` without the `exclude` fields, without loading them from a `LazyNode`."""
+    return {k: node[k] for k in node if k not in exclude}
+
+
+def read_graph_file(path, store=None, bodies=None):
+    """
+    Read a graph file in either format (binary snapshots are detected by magic bytes).
+
+    JSON files written with a bodies sidecar load as a skeleton of `LazyNode`s
+    whose heavy fields are read on first access.
+
+    Returns:
+        (nodes, last_smart_ask, meta) with `meta` holding extra header fields
+        such as `journal_seq`.
+    """
+    if is_binary_snapshot(path):
+        return read_snapshot(path)
+
+    with open(path, "r") as f:
+        payload = json.load(f)
+    if not isinstance(payload, dict) or "nodes" not in payload:
+        raise ValueError("Invalid file format: missing 'nodes'")
+    if payload.get("bodies"):
+        nodes = _attach_lazy(payload["nodes"], path, payload["bodies"], store, bodies)
+    else:
+        nodes = _attach_embeddings(payload["nodes"], path, store)
+    meta = {k: v for k, v in payload.items() if k not in ("nodes", "last_smart_ask")}
+    return nodes, payload.get("last_smart_ask"), meta
+
+
+def write_graph_file(path, nodes, last_smart_ask=None, store=None, journal_seq=None, bodies=None, width=None):
+    """
+    Write a graph file; `.csg` paths use the binary snapshot format, others JSON.
+
+    For JSON, embeddings go to a float32 sidecar matrix next to the file (see
+    `EmbeddingStore`) and each node only keeps its `embedding_row`. With a
+    `BodyStore`, heavy text fields go to its bodies file as well. Either way
+    the file is written to a temp path first so a crash never leaves a
+    half-written snapshot. Only embeddings of `width` (the current embedding
+    model's, if known) are written.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    if is_binary_path(path):
+        write_snapshot(tmp_path, nodes, last_smart_ask, journal_seq, width)
+        os.replace(tmp_path, path)
+        return
+
+    if store is None:
+        store = EmbeddingStore.create(embedding_sidecar(path), width)
+    body_refs = bodies.write(path.parent, path.stem, nodes) if bodies is not None else {}
+    exclude = {"embedding", *BODY_FIELDS} if bodies is not None else {"embedding"}
+    records = {}
+    for node_id, node in nodes.items():
+        record = _skeleton(node, exclude)
+        row = store.put(node_id, node["embedding"]) if "embedding" in node else None
+        if row is not None:
+            record["embedding_row"] = row
+        if node_id in body_refs:
+            record["body_ref"], record["body_keys"] = body_refs[node_id]
+        records[node_id] = record
+    store.flush()
+
+    # Small keys go first so streaming readers know about the sidecars before any node.
+    payload = {"last_smart_ask": last_smart_ask}
+    if bodies is not None:
+        payload["bodies"] = bodies.path.name
+    if journal_seq is not None:
+        payload["journal_seq"] = journal_seq
+    payload["nodes"] = records
+
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+    if bodies is not None:
+        bodies.commit()
+
 
 def load_graph_state(graph, path=None):
     if graph._in_memory:
         return {}, None
+    if path is None and isinstance(graph._backend, SqliteBackend):
+        return graph._backend.nodes, graph._backend.load_meta("last_smart_ask")
 
     path = path or graph._storage_path
     if not Path(path).exists():
         return {}, None  # New file — nothing to load
 
     try:
-        with open(path, "r") as f:
-            payload = json.load(f)
-
-        if not isinstance(payload, dict) or "nodes" not in payload:
-            raise ValueError("Invalid file format: missing 'nodes'")
-
-        return payload["nodes"], payload.get("last_smart_ask")
+        nodes, last_smart_ask, meta = read_graph_file(
+            path, _embedding_store_for(graph, path), _body_store_for(graph, path))
+        if Path(path) == graph._storage_path:
+            graph._snapshot_seq = meta.get("journal_seq", 0)
+        return nodes, last_smart_ask
     except Exception as e:
         print(f"Warning: failed to load {path}: {e}")
         return {}, None
 
 
 def save_to_file(graph, filename, verbose=False):
-    """Save full graph state (nodes + last_smart_ask) to JSON file."""
+    """
+    Save full graph state (nodes + last_smart_ask) to a JSON file, or to a
+    binary snapshot if the name ends in `.csg`.
+    """
     if graph._in_memory:
         return
 
     path = graph._save_dir / filename
-    with open(path, "w") as f:
-        json.dump({
-            "nodes": graph.data,
-            "last_smart_ask": graph._last_smart_ask
-        }, f, indent=2)
+    journal_seq = None
+    if isinstance(graph._backend, GraphJournal) and path == graph._storage_path:
+        journal_seq = graph._backend.seq
+    write_graph_file(path, graph.data, graph._last_smart_ask,
+                     store=_embedding_store_for(graph, path), journal_seq=journal_seq,
+                     bodies=_body_store_for(graph, path, writing=True), width=graph._embedding_store.width)
 
     if verbose:
         print(f"Saved to {path}")
 
 
-def import_from_file(graph, filename, dry_run_embedding=False):
+def _graph_file_entries(path):
     """
-    Import a full conversation graph (including smart-ask context) from a JSON file.
+    Yield ("node", id, node) and ("meta", key, value) entries from a graph file.
+
+    JSON files are streamed one node at a time, with embeddings (and lazy
+    bodies) resolved against the file's own sidecars; binary snapshots are
+    read whole.
+    """
+    if is_binary_snapshot(path):
+        nodes, last_smart_ask, _ = read_snapshot(path)
+        yield "meta", "last_smart_ask", last_smart_ask
+        for node_id in list(nodes):
+            yield "node", node_id, nodes.pop(node_id)
+        return
+
+    store = EmbeddingStore(embedding_sidecar(path), readonly=True)
+    bodies = None
+    for kind, key, value in iter_graph_json(path):
+        if kind == "meta":
+            if key == "bodies" and value:
+                bodies = BodyStore()
+                bodies.open(Path(path).with_name(value))
+            yield kind, key, value
+            continue
+        validate_node(key, value)
+        row = value.pop("embedding_row", None)
+        ref = value.pop("body_ref", None)
+        keys = value.pop("body_keys", ())
+        if row is not None:
+            store.bind(key, row)
+        if bodies is not None:
+            value = LazyNode(value, bodies, ref, keys, store, row)
+        elif ref is not None:
+            raise ValueError(f"Node {key}: body_ref without a bodies file")
+        elif row is not None:
+            value["embedding"] = store.get(row)
+        yield "node", key, value
+
+
+def _reset_graph(graph):
+    graph._data = {}
+    graph._record("smart_ask")
+    graph._last_smart_ask = None
+    graph._embedding_store.reset()
+    graph.rebuild_vector_index()
+
+
+def _import_entries(graph, entries, merge, dry_run_embedding, stats):
+    """Insert streamed entries; returns how many entries were consumed."""
+    consumed = 0
+    for kind, key, value in entries:
+        consumed += 1
+        if kind == "meta":
+            if key == "last_smart_ask" and not merge:
+                graph._record("smart_ask")
+                graph._last_smart_ask = value
+            continue
+        if key in graph._data:
+            stats["skipped"] += 1
+            continue
+        value.setdefault("children", [])
+        value.setdefault("tags", [])
+        graph._insert_node(value)
+        if "embedding" in value:
+            graph._record("embed", id=key)
+            graph._embedding_store.mark_dirty(key)
+            graph._vector_index.add(key, value["embedding"])
+        graph._auto_embed(key, dry_run=dry_run_embedding)
+        stats["imported"] += 1
+    return consumed
+
+
+def _import_stream(graph, path, merge=False, dry_run_embedding=False, chunk_size=1000):
+    """
+    Stream the graph file at `path` into `graph`; returns {"imported": n, "skipped": n}.
+
+    Without `merge` the graph is replaced by the file's contents; with it,
+    nodes are added to the current graph and ids that already exist are
+    kept as they are. Graphs with an incremental backend (journal, SQLite)
+    write every `chunk_size` nodes, so memory stays bounded by one chunk plus
+    the indexes; a failure keeps the chunks already written. Other graphs
+    import in a single batch that is written once, or rolled back on error.
+    """
+    entries = _graph_file_entries(path)
+    stats = {"imported": 0, "skipped": 0}
+    with graph._lock:
+        if graph._backend is None:
+            with graph.batch():
+                if not merge:
+                    _reset_graph(graph)
+                _import_entries(graph, entries, merge, dry_run_embedding, stats)
+            return stats
+
+        if not merge:
+            _reset_graph(graph)
+            graph._snapshot()
+        while True:
+            with graph.batch():
+                consumed = _import_entries(graph, islice(entries, chunk_size), merge, dry_run_embedding, stats)
+            if consumed < chunk_size:
+                return stats
+
+
+def import_from_file(graph, filename, dry_run_embedding=False, merge=False):
+    """
+    Import a full conversation graph (including smart-ask context) from a JSON or binary file.
+
+    JSON files are parsed one node at a time, so large exports import with
+    bounded memory (see `_import_stream`).
 
     Args:
         filename (str): File name relative to the export directory.
         dry_run_embedding (bool): If True, skip actual embedding.
+        merge (bool): Add the file's nodes to the current graph instead of replacing it.
     """
     filepath = graph._save_dir / filename
-    graph._data, graph._last_smart_ask = load_graph_state(graph, path=filepath)
-
-    if not graph.data:
+    stats = {"imported": 0}
+    if filepath.exists():
+        try:
+            stats = _import_stream(graph, filepath, merge, dry_run_embedding)
+        except Exception as e:
+            print(f"Warning: failed to import {filepath}: {e}")
+
+    if not stats["imported"]:
         print(f"No data imported from {filepath}")
-        return
-
-    config = load_config()
-    if config.get("auto_embed", False):
-        for node_id in graph.data:
-            graph.embed_node(node_id, dry_run=dry_run_embedding)
-
-    graph._save()
-    print(f"Imported full graph from {filepath}")
+    elif merge:
+        print(f"Merged {stats['imported']} nodes from {filepath} ({stats['skipped']} already present)")
+    else:
+        print(f"Imported full graph from {filepath}")
 
 def import_doc(graph, filepath, current_id=None, dry_run_embedding=False, truncate: int | None = None):
     """Import a markdown/rst file into the graph as a new node."""
@@ -78,22 +321,18 @@ def import_doc(graph, filepath, current_id=None, dry_run_embedding=False, trunca
         content = content[:truncate]
 
     node_id = graph._generate_id()
-    graph.data[node_id] = {
-        "id": node_id,
-        "type": "doc",
-        "filename": path.name,
-        "parent_id": current_id,
-        "prompt": f"Imported document: {path.name}",
-        "response": content,
-        "children": [],
-        "tags": ["doc"]
-    }
-    if current_id:
-        graph.data[current_id]["children"].append(node_id)
-    config = graph._config if hasattr(graph, "_config") else {}
-    if config.get("auto_embed", False):
-        graph.embed_node(node_id, dry_run=dry_run_embedding)
-    graph._save()
+    with graph.batch():
+        graph._insert_node({
+            "id": node_id,
+            "type": "doc",
+            "filename": path.name,
+            "parent_id": current_id,
+            "prompt": f"Imported document: {path.name}",
+            "response": content,
+            "children": [],
+            "tags": ["doc"]
+        })
+        graph._auto_embed(node_id, dry_run=dry_run_embedding)
     return node_id
 
 def save_doc(graph, node_id, filepath):
@@ -191,14 +430,18 @@ def load_from_file(graph, filename, dry_run_embedding=False):
     if not path.exists():
         print(f"File {filename} not found in {graph._save_dir}")
         return
-    with open(path, "r") as f:
-        obj = json.load(f)
-        graph.data = obj.get("nodes", {})
-        graph._last_smart_ask = obj.get("last_smart_ask", None)
-    if graph._config.get("auto_embed", False):
+    if path != graph._storage_path:
+        _import_stream(graph, path, dry_run_embedding=dry_run_embedding)
+        print(f"Loaded from {path}")
+        return
+    with graph.batch():
+        graph._embedding_store.reset()
+        graph._data, graph._last_smart_ask, _ = read_graph_file(
+            path, _embedding_store_for(graph, path), _body_store_for(graph, path))
+        graph.rebuild_vector_index()
+        graph._compact_on_save = True
         for node_id in graph.data:
-            graph.embed_node(node_id, dry_run=dry_run_embedding)
-    graph._save()
+            graph._auto_embed(node_id, dry_run=dry_run_embedding)
     print(f"Loaded from {path}")
 
 
@@ -0,0 +1,173 @@
+# chatcli/core/graph_journal.py
+
+import json
+import os
+from pathlib import Path
+
+
+class GraphJournal:
+    """
+    Append-only write-ahead log of graph mutations, stored next to the graph file.
+
+    Mutations are queued with `record()` and appended as one JSON line each by
+    `commit()`, so the I/O per save is proportional to the change rather than
+    to the graph. On startup the log is replayed on top of the last snapshot;
+    once it grows past `max_bytes` the graph writes a fresh snapshot and the
+    log is truncated. Every line carries a sequence number and the snapshot
+    stores the last one it includes, so a crash between writing the snapshot
+    and truncating the log never applies a record twice.
+
+    Record ops: add_node, set, add_citation, tag, embed, smart_ask.
+    """
+
+    DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+
+    def __init__(self, path, max_bytes=None):
+        self.path = Path(path)
+        self.max_bytes = max_bytes or self.DEFAULT_MAX_BYTES
+        self.seq = 0
+        self._pending = []
+
+    def record(self, op, **fields):
+        self._pending.append({"op": op, **fields})
+
+    def mark(self):
+        """Position in the queue, to `discard()` back to later."""
+        return len(self._pending)
+
+    def discard(self, mark=0):
+        """Drop records queued after `mark`, e.g. when a batch is rolled back."""
+        self._pending = self._pending[:mark]
+
+    def size(self):
+        return self.path.stat().st_size if self.path.exists() else 0
+
+    def needs_compaction(self):
+        return self.size() >= self.max_bytes
+
+    def replay(self, graph, since_seq=0):
+        """
+        Apply records newer than `since_seq` to the graph; returns how many were applied.
+
+        A torn or corrupt tail (from a crash mid-append) is cut off, so records
+        appended later are not stranded behind it.
+        """
+        self.seq = since_seq
+        if not self.path.exists():
+            return 0
+        applied = 0
+        good = 0  # byte offset just past the last intact line
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn write at the tail of the log
+                try:
+                    rec = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    break
+                good += len(line)
+                if rec["seq"] <= since_seq:
+                    continue
+                _apply(graph, rec)
+                self.seq = rec["seq"]
+                applied += 1
+        if good < self.size():
+            print(f"Warning: dropping torn tail of journal {self.path} at byte {good}")
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+                os.fsync(f.fileno())
+        return applied
+
+    def commit(self, graph):
+        """Append all queued records to the log and fsync it."""
+        if not self._pending:
+            return
+        lines = []
+        for rec in self._pending:
+            rec = _materialize(graph, rec)
+            if rec is None:
+                continue
+            self.seq += 1
+            rec["seq"] = self.seq
+            lines.append(json.dumps(rec))
+        self._pending = []
+        if not lines:
+            return
+
+        graph._embedding_store.flush()
+        with open(self.path, "a") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def snapshot(self, graph):
+        """Write a full graph snapshot, then drop the records it now contains."""
+        graph.save_to_file(graph._storage_path.name)
+        self.truncate()
+
+    def truncate(self):
+        """Drop the log after its records were folded into a snapshot."""
+        self._pending = []
+        with open(self.path, "w"):
+            pass
+
+    def remove(self):
+        self._pending = []
+        self.path.unlink(missing_ok=True)
+
+
+def _materialize(graph, rec):
+    """Fill a queued record with the current node state; None if the node is gone."""
+    op = rec["op"]
+    if op == "smart_ask":
+        return {"op": op, "value": graph._last_smart_ask}
+
+    node = graph.data.get(rec["id"])
+    if node is None:
+        return None
+    if op == "add_node":
+        return {"op": op, "node": {k: v for k, v in node.items() if k != "embedding"}}
+    if op == "set":
+        return {"op": op, "id": rec["id"], "fields": {k: node.get(k) for k in rec["fields"]}}
+    if op == "embed":
+        if "embedding" not in node:
+            return None
+        row = graph._embedding_store.put(rec["id"], node["embedding"])
+        return None if row is None else {"op": op, "id": rec["id"], "row": row}
+    return dict(rec)
+
+
+def _apply(graph, rec):
+    op = rec["op"]
+    data = graph._data
+    if op == "smart_ask":
+        graph._last_smart_ask = rec["value"]
+        return
+    if op == "add_node":
+        node = rec["node"]
+        data[node["id"]] = node
+        parent = data.get(node.get("parent_id"))
+        if parent is not None and node["id"] not in parent["children"]:
+            parent["children"].append(node["id"])
+        graph._stale_text[node["id"]] = None
+        return
+
+    node = data.get(rec["id"])
+    if node is None:
+        return
+    if op == "set":
+        node.update(rec["fields"])
+        graph._stale_text[rec["id"]] = None
+    elif op == "add_citation":
+        citations = node.setdefault("citations", [])
+        if rec["target"] not in citations:
+            citations.append(rec["target"])
+    elif op == "tag":
+        # add_node records carry the node as of commit time, which may include this tag already.
+        tags = node.setdefault("tags", [])
+        if rec["tag"] not in tags:
+            tags.append(rec["tag"])
+    elif op == "embed":
+        graph._embedding_store.bind(rec["id"], rec["row"])
+        node["embedding"] = graph._embedding_store.get(rec["row"])
+        graph._vector_index.add(rec["id"], node["embedding"])
@@ -1,6 +1,9 @@
 # chatcli/core/graph_llm.py
 
+from chatcli.core.embedding_cache import cache_key, content_hash
 from chatcli.core.llm_provider import get_llm
+from chatcli.core.traversal import dfs
+from chatcli.core.vector_index import normalize
 
 
 def ask_llm_with_context(graph, node_id, question):
@@ -24,7 +27,9 @@ def ask_llm_with_context(graph, node_id, question):
                 token_count += entry_tokens
             else:
                 summary = graph.summarize_text(snippet)
-                graph.data[cid]['summary'] = summary  # Save summary to node
+                with graph._lock:
+                    graph._record("set", id=cid, fields=["summary"])
+                    graph.data[cid]['summary'] = summary  # Save summary to node
                 context_parts.append(f"- {title}: {summary}")
                 break
 
@@ -96,18 +101,146 @@ def estimate_tokens(graph, text):
 
 
 def get_embedding(graph, text):
+    """Embed `text` with the configured provider, scaled to unit length (so dot product = cosine)."""
+    cache = graph._embedding_cache
+    key = cache_key(graph._embedding_namespace, text) if cache is not None else None
+    if cache is not None:
+        vector = cache.get(key)
+        if vector is not None:
+            return vector.tolist()
     provider = graph.get_embedding_provider()
     print(f"[Embedding] Using {provider.__class__.__name__}")
-    return provider.embed(text)
+    vector = normalize(provider.embed(text))[0]
+    if cache is not None:
+        cache.put(key, vector)
+    return vector.tolist()
+
+
+def get_embeddings(graph, texts, batch_size=None, quiet=False):
+    """
+    Embed several texts through the provider's batched API; unit-length vectors, in order.
+
+    Texts already in the embedding cache are not sent to the provider.
+    `quiet` skips the progress line (used by the background worker).
+    """
+    if not texts:
+        return []
+    cache = graph._embedding_cache
+    vectors = [None] * len(texts)
+    if cache is not None:
+        keys = [cache_key(graph._embedding_namespace, text) for text in texts]
+        cached = cache.get_many(keys)
+        vectors = [cached.get(key) for key in keys]
+    misses = [i for i, vector in enumerate(vectors) if vector is None]
+    if misses:
+        provider = graph.get_embedding_provider()
+        batch_size = batch_size or (graph._config.get("embedding") or {}).get("batch_size", 32)
+        if not quiet:
+            print(f"[Embedding] Using {provider.__class__.__name__} for {len(misses)} texts")
+        computed = normalize(provider.embed_batch([texts[i] for i in misses], batch_size=batch_size))
+        for i, vector in zip(misses, computed):
+            vectors[i] = vector
+        if cache is not None:
+            cache.put_many((keys[i], vectors[i]) for i in misses)
+    return [vector.tolist() for vector in vectors]
+
+
+def _embedding_text(node):
+    return f"{node.get('prompt', '')}\n{node.get('response', '')}"
+
+
+def _text_version(text):
+    return content_hash(text)[:16]
+
+
+def embedding_is_current(node):
+    """
+    True if `node` has an embedding computed from its current text.
+
+    Each stored embedding is stamped with `embedding_version`, a hash of the
+    text it was computed from, so edits that leave prompt and response alone
+    (citations, tags, comments) never make it stale.
+    """
+    return "embedding" in node and node.get("embedding_version") == _text_version(_embedding_text(node))
+
 
 def embed_node(graph, node_id, dry_run=False):
     if node_id not in graph.data:
         raise ValueError("Node not found")
     node = graph.data[node_id]
-    combined = f"{node.get('prompt', '')}\n{node.get('response', '')}"
     if dry_run:
         print(f"[DRY RUN] Would embed node {node_id}")
     else:
-        node["embedding"] = graph.get_embedding(combined)
+        text = _embedding_text(node)
+        graph._store_embedding(node_id, graph.get_embedding(text), _text_version(text))
     graph._save()
     print(f"Embedded node {node_id}")
+
+
+def embed_nodes(graph, node_ids, dry_run=False, batch_size=None):
+    """
+    Embed `node_ids` in provider batches of `batch_size` (default
+    `embedding.batch_size`; multi-process providers take several batches per
+    call, see `bulk_size`), inside one graph batch so the graph is saved once.
+    Returns the number of nodes embedded.
+    """
+    node_ids = list(dict.fromkeys(node_ids))
+    missing = [nid for nid in node_ids if nid not in graph.data]
+    if missing:
+        raise ValueError(f"Node not found: {missing[0]}")
+    if dry_run:
+        print(f"[DRY RUN] Would embed {len(node_ids)} nodes")
+        return len(node_ids)
+    if not node_ids:
+        return 0
+    batch_size = batch_size or (graph._config.get("embedding") or {}).get("batch_size", 32)
+    step = graph.get_embedding_provider().bulk_size(batch_size)
+    with graph.batch():
+        for start in range(0, len(node_ids), step):
+            chunk = node_ids[start:start + step]
+            texts = [_embedding_text(graph.data[nid]) for nid in chunk]
+            vectors = graph.get_embeddings(texts, batch_size)
+            for nid, text, vector in zip(chunk, texts, vectors):
+                graph._store_embedding(nid, vector, _text_version(text))
+    print(f"Embedded {len(node_ids)} nodes")
+    return len(node_ids)
+
+
+def pending_embeddings(graph):
+    """Queued node ids that still exist and whose embedding does not match their text."""
+    return [nid for nid in graph._stale_embeddings
+            if nid in graph.data and not embedding_is_current(graph.data[nid])]
+
+
+def embed_pending(graph, dry_run=False):
+    """
+    Embed the nodes queued by auto-embedding whose text changed since they
+    were last embedded (see `embedding_is_current`), after any background
+    jobs finish; returns the count.
+    """
+    graph.wait_for_embeddings()
+    graph._requeue_stale_embeddings()
+    queued = list(graph._stale_embeddings)
+    stale = pending_embeddings(graph)
+    count = embed_nodes(graph, stale, dry_run=dry_run) if stale else 0
+    if not dry_run:
+        for nid in queued:
+            graph._stale_embeddings.pop(nid, None)
+    return count
+
+
+def embed_all(graph, dry_run=False, force=False):
+    """Embed every node that has no embedding yet (every node with `force`); returns the count."""
+    if force:
+        node_ids = list(graph.data)
+    else:
+        embedded = graph._embedded_ids()
+        node_ids = [nid for nid in graph.data if nid not in embedded]
+    return embed_nodes(graph, node_ids, dry_run=dry_run)
+
+
+def embed_subtree(graph, node_id, dry_run=False, max_depth=None):
+    """Embed `node_id` and every node below it in provider batches (a single save)."""
+    if node_id not in graph.data:
+        raise ValueError("Node not found")
+    return embed_nodes(graph, [nid for nid, _ in dfs(graph, node_id, max_depth=max_depth)], dry_run=dry_run)
@@ -1,18 +1,22 @@
 # chatcli/core/graph_ops.py
-import faiss
-import numpy as np
-
 from chatcli.core.config import load_config
+from chatcli.core.retrieval import retrieval_config, search_scope
 
-def smart_ask(graph, query_text, from_node_id=None, top_k=3):
+def smart_ask(graph, query_text, from_node_id=None, top_k=3, mode=None, min_score=None, **filters):
     """
-    Run a smart-ask by semantically retrieving relevant nodes and generating an LLM answer.
-    This constructs a RAG-style prompt using the top-K semantically similar nodes.
+    Run a smart-ask by retrieving relevant nodes and generating an LLM answer.
+    This constructs a RAG-style prompt using the top-K retrieved nodes.
 
     Args:
         query_text (str): The user's question.
         from_node_id (str): The context node initiating the ask.
-        top_k (int): Number of similar nodes to retrieve.
+        top_k (int): Number of nodes to retrieve.
+        mode (str): "vector", "keyword" or "hybrid" retrieval; defaults to
+            `retrieval.mode` in the config (see `hybrid_search`).
+        min_score (float): Drop vector matches with a lower cosine similarity;
+            defaults to `retrieval.min_score`.
+        **filters: tags, subtree, node_type or exclude, scoping retrieval
+            (see `search_scope`).
 
     Returns:
         str: The LLM-generated answer.
@@ -25,7 +29,7 @@ def smart_ask(graph, query_text, from_node_id=None, top_k=3):
 
     from chatcli.core.prompt_loader import render_template
 
-    matches = graph.simsearch(query_text, top_k=top_k)
+    matches = graph.hybrid_search(query_text, top_k=top_k, mode=mode, min_score=min_score, **filters)
     context_parts = []
     citations = []
 
@@ -80,42 +84,38 @@ def promote_smart_ask(graph, parent_id: str) -> str:
     citations = data.get("citations", [])
 
     node_id = graph._generate_id()
-    graph.data[node_id] = {
-        "id": node_id,
-        "parent_id": parent_id,
-        "prompt": prompt,
-        "response": response,
-        "children": [],
-        "tags": ["smart-ask"]
-    }
-
-    graph.data[parent_id]["children"].append(node_id)
-
-    for cited_id in citations:
-        graph.add_citation(node_id, cited_id)
-
-    config = load_config()
-    if config.get("auto_embed", False):
-        graph.embed_node(node_id)
-
-    graph._save()
+    with graph.batch():
+        graph._insert_node({
+            "id": node_id,
+            "parent_id": parent_id,
+            "prompt": prompt,
+            "response": response,
+            "children": [],
+            "tags": ["smart-ask"]
+        })
+
+        graph.add_citations((node_id, cited_id) for cited_id in citations)
+        graph._auto_embed(node_id)
     return node_id
 
 def cite_smart_ask(graph, target_node_id=None):
     if not graph._last_smart_ask:
         raise ValueError("No smart_ask to cite")
     target = target_node_id or graph._last_smart_ask["from_node_id"]
-    for cited in graph._last_smart_ask.get("citations", []):
-        graph.add_citation(target, cited)
+    with graph.batch():
+        rejected = graph.add_citations((target, cited) for cited in graph._last_smart_ask.get("citations", []))
+        if rejected:
+            # Keep the old all-or-nothing behaviour: the batch rolls back.
+            raise ValueError(f"Citation would introduce a cycle: {rejected}")
 
 
 def smart_thread(graph, question, from_node_id=None, top_k=3):
     answer = graph.smart_ask(question, from_node_id=from_node_id, top_k=top_k)
-    new_id = graph.promote_smart_ask(parent_id=from_node_id)
+    with graph.batch():
+        new_id = graph.promote_smart_ask(parent_id=from_node_id)
 
-    if graph._last_smart_ask:
-        for cited in graph._last_smart_ask.get("citations", []):
-            graph.add_citation(new_id, cited)
+        if graph._last_smart_ask:
+            graph.add_citations((new_id, cited) for cited in graph._last_smart_ask.get("citations", []))
 
     return new_id, answer
 
@@ -126,58 +126,73 @@ def improve_doc(graph, node_id, dry_run_embedding=False):
     original = graph.data[node_id]
     improved_content = f"[IMPROVED VERSION]\n{original['response'][:300]}..."
     new_id = graph._generate_id()
-    graph.data[new_id] = {
-        "id": new_id,
-        "type": "doc",
-        "filename": f"{original.get('filename', 'improved')}",
-        "parent_id": node_id,
-        "prompt": f"Improved version of {original.get('filename', '')}",
-        "response": improved_content,
-        "children": [],
-        "tags": ["doc", "improved"]
-    }
-    graph.data[node_id]["children"].append(new_id)
-
-    graph.add_citation(new_id, node_id)
-
-    config = load_config()
-    if config.get("auto_embed", False):
-        graph.embed_node(new_id, dry_run=dry_run_embedding)
-
-    graph._save()
+    with graph.batch():
+        graph._insert_node({
+            "id": new_id,
+            "type": "doc",
+            "filename": f"{original.get('filename', 'improved')}",
+            "parent_id": node_id,
+            "prompt": f"Improved version of {original.get('filename', '')}",
+            "response": improved_content,
+            "children": [],
+            "tags": ["doc", "improved"]
+        })
+
+        graph.add_citation(new_id, node_id, dry_run_embedding=dry_run_embedding)
+        graph._auto_embed(new_id, dry_run=dry_run_embedding)
     return new_id
 
 
-def simsearch(graph, query_text, top_k=3):
-    query_vector = graph.get_embedding(query_text)
-    dim = len(query_vector)
-
-    # Build FAISS index
-    index = faiss.IndexFlatL2(dim)
-    id_map = []
-    vectors = []
-
-    for node_id, node in graph.data.items():
-        if "embedding" not in node:
-            print(f"[warn] Node {node_id} missing embedding — skipping in simsearch")
-            continue
-
-        id_map.append(node_id)
-        vectors.append(np.array(node["embedding"], dtype=np.float32))
-
-    if not vectors:
+def simsearch(graph, query_text, top_k=3, tags=None, subtree=None, node_type=None, exclude=None,
+              min_score=None, wait=True):
+    """
+    Return the `top_k` nodes most similar to `query_text` as (node_id, score) pairs.
+
+    Scores are cosine similarities in [-1, 1], comparable across queries;
+    matches below `min_score` (default: `retrieval.min_score`, if set) are dropped.
+
+    Queries go straight to the graph's persistent vector index, which is kept
+    up to date by `embed_node`, so no per-query index build or node scan is needed.
+    Nodes queued by auto-embedding are embedded first and, unless `wait` is
+    False, background embedding jobs are waited for, so no match is scored
+    against a vector of outdated text.
+
+    Filters scope the search (see `search_scope`): `tags` (nodes carrying all
+    of them, or a `graph.find_by_tags` keyword dict), `subtree` (a root node
+    id), `node_type` (e.g. "doc") and `exclude` (node ids). They are pushed
+    into the index, so a search scoped to a small thread costs about as much
+    as scoring that thread's vectors.
+    """
+    if wait:
+        graph.wait_for_embeddings()
+    graph._requeue_stale_embeddings()
+    if graph._stale_embeddings:
+        graph.embed_pending()
+    index = graph._vector_index
+    if not len(index):
         print("No embedded nodes found.")
         return []
 
-    index.add(np.stack(vectors))
-    D, I = index.search(np.array([query_vector], dtype=np.float32), top_k)
+    ids, accept = search_scope(graph, tags=tags, subtree=subtree, node_type=node_type, exclude=exclude)
+    if ids is not None and not ids:
+        return []
 
-    result_ids_scores = [
-        (id_map[i], -D[0][j])  # negate distance to turn it into similarity
-        for j, i in enumerate(I[0])
-        if i < len(id_map)
-    ]
-    return result_ids_scores
+    if min_score is None:
+        min_score = retrieval_config(graph).get("min_score")
+    query_vector = graph.get_embedding(query_text)
+    results = index.search(query_vector, top_k, ids=ids, accept=accept)
+    if min_score is not None:
+        results = [(node_id, score) for node_id, score in results if score >= min_score]
+    return results
+
+def keyword_search(graph, query_text, top_k=5):
+    """
+    Return the `top_k` nodes best matching `query_text` by BM25 as (node_id, score) pairs.
+
+    Uses the graph's keyword index over prompt, response and comment text, so
+    exact identifiers and error strings are found without an embedding model.
+    """
+    return graph._keyword_index.search(query_text, top_k)
 
 def suggest_tags(graph, node_id):
     node = graph.data.get(node_id)
@@ -211,21 +226,17 @@ def websearch(query: str, max_results=5):
 
 def save_web_result(graph, result, current_id=None, dry_run_embedding=False):
     node_id = graph._generate_id()
-    graph.data[node_id] = {
-        "id": node_id,
-        "type": "web-result",
-        "parent_id": current_id,
-        "prompt": result["title"],
-        "response": result["snippet"],
-        "url": result["url"],
-        "source": result.get("source", "tavily"),
-        "children": [],
-        "tags": ["web"],
-    }
-    if current_id and current_id in graph.data:
-        graph.data[current_id]["children"].append(node_id)
-    config = load_config()
-    if config.get("auto_embed", False):
-        graph.embed_node(node_id, dry_run=dry_run_embedding)
-    graph._save()
+    with graph.batch():
+        graph._insert_node({
+            "id": node_id,
+            "type": "web-result",
+            "parent_id": current_id,
+            "prompt": result["title"],
+            "response": result["snippet"],
+            "url": result["url"],
+            "source": result.get("source", "tavily"),
+            "children": [],
+            "tags": ["web"],
+        })
+        graph._auto_embed(node_id, dry_run=dry_run_embedding)
     return node_id
\ No newline at end of file
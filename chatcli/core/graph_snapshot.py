@@ -0,0 +1,163 @@
+# chatcli/core/graph_snapshot.py
+
+"""
+Compact binary snapshot format for graph files.
+
+Layout (all integers little-endian):
+
+    magic        8 bytes  b"CSGSNAP\\0"
+    version      u32
+    dim          u32      embedding width (0 if nothing is embedded)
+    rows         u64      number of embedding rows
+    meta_len     u64      length of the msgpack-encoded meta map
+    nodes_len    u64      length of the msgpack-encoded node list
+    meta         msgpack  {"last_smart_ask": ..., "journal_seq": ...}
+    nodes        msgpack  [node, ...]; embedded nodes carry `embedding_row`
+    padding      to a 16-byte boundary
+    embeddings   rows * dim float32, row-major
+
+Loading is one buffered read of the whole file; node records are decoded
+with msgpack and embeddings become zero-copy views into the float32 block.
+"""
+
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Optional: msgpack is required for the binary snapshot format
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MAGIC = b"CSGSNAP\0"
+VERSION = 1
+SNAPSHOT_SUFFIX = ".csg"
+
+_HEADER = struct.Struct("<8sIIQQQ")
+_ALIGN = 16
+
+
+def _require_msgpack():
+    if msgpack is None:
+        raise ImportError("Please install msgpack for binary snapshots: pip install msgpack")
+
+
+def is_binary_path(path):
+    """True if `path` should be written in the binary format (by extension)."""
+    return Path(path).suffix == SNAPSHOT_SUFFIX
+
+
+def is_binary_snapshot(path):
+    """True if the file at `path` starts with the binary snapshot magic."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def write_snapshot(path, nodes, last_smart_ask=None, journal_seq=None, width=None):
+    """
+    Write `nodes` (id -> node dict) and smart-ask state as a binary snapshot.
+
+    The vector block holds one embedding width: `width` (the graph's current
+    embedding model), by default that of the first embedding. Vectors of
+    another width, left over from a previous model, are not written, as
+    `EmbeddingStore.put` does for JSON graphs.
+    """
+    _require_msgpack()
+    records = []
+    vectors = []
+    dim = width or 0
+    for node_id, node in nodes.items():
+        record = {k: v for k, v in node.items() if k != "embedding"}
+        if "embedding" in node:
+            vec = np.asarray(node["embedding"], dtype=np.float32).ravel()
+            dim = dim or vec.shape[0]
+            if vec.shape[0] == dim:
+                record["embedding_row"] = len(vectors)
+                vectors.append(vec)
+        records.append(record)
+
+    meta = {"last_smart_ask": last_smart_ask}
+    if journal_seq is not None:
+        meta["journal_seq"] = journal_seq
+    meta_bytes = msgpack.packb(meta, use_bin_type=True)
+    nodes_bytes = msgpack.packb(records, use_bin_type=True)
+    block = np.vstack(vectors) if vectors else np.empty((0, dim), dtype=np.float32)
+
+    header = _HEADER.pack(MAGIC, VERSION, dim, len(vectors), len(meta_bytes), len(nodes_bytes))
+    offset = len(header) + len(meta_bytes) + len(nodes_bytes)
+    padding = b"\0" * (-offset % _ALIGN)
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(meta_bytes)
+        f.write(nodes_bytes)
+        f.write(padding)
+        # Raw buffer, not memoryview.cast: casting fails on an empty block (no embeddings).
+        f.write(np.ascontiguousarray(block).data)
+
+
+def read_snapshot(path):
+    """
+    Read a binary snapshot.
+
+    Returns:
+        (nodes, last_smart_ask, meta) where embeddings are read-only views into
+        the file buffer and `meta` holds the remaining header fields.
+    """
+    _require_msgpack()
+    with open(path, "rb") as f:
+        buf = f.read()
+    if len(buf) < _HEADER.size:
+        raise ValueError("Truncated snapshot header")
+    magic, version, dim, rows, meta_len, nodes_len = _HEADER.unpack_from(buf)
+    if magic != MAGIC:
+        raise ValueError("Not a binary graph snapshot")
+    if version > VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+
+    view = memoryview(buf)
+    offset = _HEADER.size
+    meta = msgpack.unpackb(view[offset:offset + meta_len], raw=False)
+    offset += meta_len
+    records = msgpack.unpackb(view[offset:offset + nodes_len], raw=False)
+    offset += nodes_len
+    offset += -offset % _ALIGN
+    if rows:
+        vectors = np.frombuffer(buf, dtype=np.float32, count=rows * dim, offset=offset).reshape(rows, dim)
+
+    nodes = {}
+    for record in records:
+        row = record.pop("embedding_row", None)
+        if row is not None:
+            record["embedding"] = vectors[row]
+        nodes[record["id"]] = record
+    return nodes, meta.get("last_smart_ask"), meta
+
+
+def convert(src, dst):
+    """Convert a graph file between the JSON and binary formats (chosen by `dst` extension)."""
+    from chatcli.core.graph_io import read_graph_file, write_graph_file
+
+    nodes, last_smart_ask, _ = read_graph_file(src)
+    write_graph_file(dst, nodes, last_smart_ask)
+    return len(nodes)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("Usage: python -m chatcli.core.graph_snapshot <src> <dst>")
+        print(f"  Files ending in {SNAPSHOT_SUFFIX} use the binary format, others JSON.")
+        return 2
+    count = convert(argv[0], argv[1])
+    print(f"Converted {count} nodes: {argv[0]} -> {argv[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
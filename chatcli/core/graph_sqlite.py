@@ -0,0 +1,353 @@
+# chatcli/core/graph_sqlite.py
+
+import json
+import sqlite3
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from pathlib import Path
+
+import numpy as np
+
+SQLITE_SCHEME = "sqlite:///"
+
+# Node keys that live in dedicated columns/tables; everything else goes to `attrs`.
+_CORE_KEYS = {"id", "prompt", "response", "parent_id", "children", "citations", "tags", "embedding"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id TEXT PRIMARY KEY,
+    parent_id TEXT,
+    prompt TEXT NOT NULL DEFAULT '',
+    response TEXT NOT NULL DEFAULT '',
+    attrs TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS nodes_parent ON nodes(parent_id);
+
+CREATE TABLE IF NOT EXISTS edges (
+    kind TEXT NOT NULL,  -- 'child' or 'cite'
+    src TEXT NOT NULL,
+    dst TEXT NOT NULL,
+    PRIMARY KEY (kind, src, dst)
+);
+CREATE INDEX IF NOT EXISTS edges_target ON edges(kind, dst);
+
+CREATE TABLE IF NOT EXISTS tags (
+    node_id TEXT NOT NULL,
+    tag TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tags_node ON tags(node_id);
+CREATE INDEX IF NOT EXISTS tags_tag ON tags(tag);
+
+CREATE TABLE IF NOT EXISTS embeddings (
+    node_id TEXT PRIMARY KEY,
+    vector BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def parse_sqlite_path(storage_path):
+    """Return the database path for a `sqlite:///path.db` URL, else None."""
+    storage_path = str(storage_path)
+    if storage_path.startswith(SQLITE_SCHEME):
+        return Path(storage_path[len(SQLITE_SCHEME):])
+    return None
+
+
+class SqliteNodes(MutableMapping):
+    """
+    Dict-like view over the `nodes` table that pages node dicts in on access.
+
+    Materialized nodes are cached in LRU order; nodes with uncommitted changes
+    are pinned until the backend commits them, so edits are never dropped by
+    eviction, and iteration and `len()` include nodes not committed yet.
+    """
+
+    def __init__(self, backend, cache_size=10000):
+        self._backend = backend
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+
+    def __getitem__(self, node_id):
+        node = self._backend._dirty.get(node_id)
+        if node is not None:
+            return node
+        node = self._cache.get(node_id)
+        if node is None:
+            node = self._backend._read_node(node_id)
+            if node is None:
+                raise KeyError(node_id)
+            self._cache[node_id] = node
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(node_id)
+        return node
+
+    def __setitem__(self, node_id, node):
+        self._cache[node_id] = node
+        self._backend._dirty[node_id] = node
+
+    def __delitem__(self, node_id):
+        # Only uncommitted nodes (e.g. from a rolled-back batch) can be dropped.
+        if self._backend._has_node(node_id):
+            raise NotImplementedError("Deleting stored nodes is not supported")
+        self._backend._dirty.pop(node_id, None)
+        if self._cache.pop(node_id, None) is None:
+            raise KeyError(node_id)
+
+    def __contains__(self, node_id):
+        if node_id in self._cache or node_id in self._backend._dirty:
+            return True
+        return self._backend._has_node(node_id)
+
+    def _uncommitted(self):
+        """Ids of nodes added since the last commit (dirty but not in the table yet)."""
+        return [nid for nid in self._backend._dirty if not self._backend._has_node(nid)]
+
+    def __iter__(self):
+        ids = self._backend._node_ids()
+        if self._backend._dirty:
+            known = set(ids)
+            ids.extend(nid for nid in self._backend._dirty if nid not in known)
+        return iter(ids)
+
+    def __len__(self):
+        return self._backend._node_count() + len(self._uncommitted())
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def parents_of(self, node_id):
+        return self._backend.sources("child", node_id)
+
+    def cited_by(self, node_id):
+        return self._backend.sources("cite", node_id)
+
+    def tagged(self, tag):
+        return self._backend.tagged(tag)
+
+
+class SqliteBackend:
+    """
+    SQLite storage for `GraphCore`, selected with `storage_path="sqlite:///path.db"`.
+
+    Nodes, child/citation edges, tags and embeddings live in their own tables
+    (WAL mode). Each save turns the queued mutation records into single-row
+    UPSERTs/INSERTs in one transaction, `graph.data` is a lazily paged
+    `SqliteNodes` view, and parent/cited-by lookups use the edge indexes.
+    """
+
+    def __init__(self, path, cache_size=10000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._ensure_unique_tags()
+        self._pending = []
+        self._dirty = {}
+        self._graph = None
+        self.nodes = SqliteNodes(self, cache_size=cache_size)
+
+    def close(self):
+        self._conn.close()
+
+    def _ensure_unique_tags(self):
+        """Make (node_id, tag) unique, dropping duplicates left by databases created before it was."""
+        if self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'tags_unique'").fetchone():
+            return
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM tags WHERE rowid NOT IN (SELECT MIN(rowid) FROM tags GROUP BY node_id, tag)")
+            self._conn.execute("CREATE UNIQUE INDEX tags_unique ON tags(node_id, tag)")
+
+    # --- reads -----------------------------------------------------------
+
+    def _has_node(self, node_id):
+        return self._conn.execute("SELECT 1 FROM nodes WHERE id = ?", (node_id,)).fetchone() is not None
+
+    def _node_ids(self):
+        return [row[0] for row in self._conn.execute("SELECT id FROM nodes ORDER BY rowid")]
+
+    def _node_count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+
+    def _read_node(self, node_id):
+        row = self._conn.execute(
+            "SELECT parent_id, prompt, response, attrs FROM nodes WHERE id = ?", (node_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        parent_id, prompt, response, attrs = row
+        node = {
+            "id": node_id,
+            "prompt": prompt,
+            "response": response,
+            "parent_id": parent_id,
+            "children": self.targets("child", node_id),
+            "tags": [r[0] for r in self._conn.execute(
+                "SELECT tag FROM tags WHERE node_id = ? ORDER BY rowid", (node_id,))],
+        }
+        citations = self.targets("cite", node_id)
+        if citations:
+            node["citations"] = citations
+        node.update(json.loads(attrs))
+        vec = self._conn.execute("SELECT vector FROM embeddings WHERE node_id = ?", (node_id,)).fetchone()
+        if vec is not None:
+            node["embedding"] = np.frombuffer(vec[0], dtype=np.float32)
+        return node
+
+    def targets(self, kind, node_id):
+        return [r[0] for r in self._conn.execute(
+            "SELECT dst FROM edges WHERE kind = ? AND src = ? ORDER BY rowid", (kind, node_id))]
+
+    def sources(self, kind, node_id):
+        """Nodes with a `kind` edge pointing at `node_id` (uses the edges_target index)."""
+        self._graph_commit()
+        return [r[0] for r in self._conn.execute(
+            "SELECT src FROM edges WHERE kind = ? AND dst = ? ORDER BY rowid", (kind, node_id))]
+
+    def tagged(self, tag):
+        """Nodes carrying `tag` (uses the tags_tag index)."""
+        self._graph_commit()
+        return list(dict.fromkeys(r[0] for r in self._conn.execute(
+            "SELECT node_id FROM tags WHERE tag = ? ORDER BY rowid", (tag,))))
+
+    def embedded_ids(self):
+        ids = {r[0] for r in self._conn.execute("SELECT node_id FROM embeddings")}
+        ids.update(nid for nid, node in self._dirty.items() if "embedding" in node)
+        return ids
+
+    def iter_embeddings(self):
+        for node_id, blob in self._conn.execute("SELECT node_id, vector FROM embeddings"):
+            yield node_id, np.frombuffer(blob, dtype=np.float32)
+
+    def load_meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # --- writes ----------------------------------------------------------
+
+    def attach(self, graph):
+        """Remember the owning graph so index queries can commit pending edits first."""
+        self._graph = graph
+
+    def _graph_commit(self):
+        # Inside a batch, writes stay deferred until the batch ends.
+        if self._graph is not None and self._graph._batch is None and self._pending:
+            with self._graph._lock:
+                self.commit(self._graph)
+
+    def record(self, op, **fields):
+        self._pending.append({"op": op, **fields})
+        node_id = fields.get("id")
+        if node_id is not None and node_id not in self._dirty and node_id in self.nodes._cache:
+            self._dirty[node_id] = self.nodes._cache[node_id]
+
+    def mark(self):
+        """Position in the queue, to `discard()` back to later."""
+        return len(self._pending)
+
+    def discard(self, mark=0):
+        """Drop records queued after `mark`, e.g. when a batch is rolled back."""
+        self._pending = self._pending[:mark]
+        keep = {rec.get("id") for rec in self._pending}
+        self._dirty = {k: v for k, v in self._dirty.items() if k in keep}
+
+    def needs_compaction(self):
+        return False
+
+    def commit(self, graph):
+        """Apply queued mutation records as row-level writes in one transaction."""
+        pending, self._pending = self._pending, []
+        if not pending:
+            self._dirty = {}
+            return
+        with self._conn:
+            for rec in pending:
+                self._apply(graph, rec)
+        self._dirty = {}
+
+    def _apply(self, graph, rec):
+        op = rec["op"]
+        if op == "smart_ask":
+            self._put_meta("last_smart_ask", graph._last_smart_ask)
+            return
+        node = self._dirty.get(rec["id"]) or graph.data.get(rec["id"])
+        if node is None:
+            return
+        if op == "add_node":
+            self._upsert_node(node)
+            parent_id = node.get("parent_id")
+            if parent_id:
+                self._add_edge("child", parent_id, node["id"])
+            for tag in node.get("tags", []):
+                self._add_tag(node["id"], tag)
+            for cited in node.get("citations", []):
+                self._add_edge("cite", node["id"], cited)
+        elif op == "set":
+            self._upsert_node(node)
+        elif op == "add_citation":
+            self._add_edge("cite", rec["id"], rec["target"])
+        elif op == "tag":
+            self._add_tag(rec["id"], rec["tag"])
+        elif op == "embed" and "embedding" in node:
+            self._put_embedding(rec["id"], node["embedding"])
+
+    def _upsert_node(self, node):
+        attrs = {k: v for k, v in node.items() if k not in _CORE_KEYS}
+        self._conn.execute(
+            "INSERT INTO nodes (id, parent_id, prompt, response, attrs) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET parent_id = excluded.parent_id, prompt = excluded.prompt, "
+            "response = excluded.response, attrs = excluded.attrs",
+            (node["id"], node.get("parent_id"), node.get("prompt", ""), node.get("response", ""),
+             json.dumps(attrs)),
+        )
+
+    def _add_edge(self, kind, src, dst):
+        self._conn.execute("INSERT OR IGNORE INTO edges (kind, src, dst) VALUES (?, ?, ?)", (kind, src, dst))
+
+    def _add_tag(self, node_id, tag):
+        self._conn.execute("INSERT OR IGNORE INTO tags (node_id, tag) VALUES (?, ?)", (node_id, tag))
+
+    def _put_embedding(self, node_id, vector):
+        blob = np.asarray(vector, dtype=np.float32).tobytes()
+        self._conn.execute(
+            "INSERT INTO embeddings (node_id, vector) VALUES (?, ?) "
+            "ON CONFLICT(node_id) DO UPDATE SET vector = excluded.vector",
+            (node_id, blob),
+        )
+
+    def _put_meta(self, key, value):
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value)),
+        )
+
+    def snapshot(self, graph):
+        """Replace the database contents with `graph.data`, e.g. after an import."""
+        nodes = dict(graph.data.items())  # materialize before the tables are cleared
+        with self._conn:
+            for table in ("nodes", "edges", "tags", "embeddings"):
+                self._conn.execute(f"DELETE FROM {table}")
+            for node_id, node in nodes.items():
+                self._upsert_node(node)
+                for child_id in node.get("children", []):
+                    self._add_edge("child", node_id, child_id)
+                for cited in node.get("citations", []):
+                    self._add_edge("cite", node_id, cited)
+                for tag in node.get("tags", []):
+                    self._add_tag(node_id, tag)
+                if "embedding" in node:
+                    self._put_embedding(node_id, node["embedding"])
+            self._put_meta("last_smart_ask", graph._last_smart_ask)
+        self._pending = []
+        self._dirty = {}
+        self.nodes.clear_cache()
+        graph._data = self.nodes
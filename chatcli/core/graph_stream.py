@@ -0,0 +1,167 @@
+# chatcli/core/graph_stream.py
+
+import json
+import re
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+_STRUCTURAL = re.compile(r'["{}\[\]]')
+_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.S)
+_SCALAR_END = re.compile(r'[\s,:\]}]')
+
+
+class _ValueEnd:
+    """
+    Finds where a JSON value ends as its text arrives in chunks, without decoding it.
+
+    `feed()` resumes from where the previous chunk stopped (inside a string,
+    after a backslash, at some bracket depth), so each character is scanned
+    once however many chunks a value spans.
+    """
+
+    def __init__(self, first):
+        self._scalar = first not in '{["'
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text, i):
+        """Index just past the value's end in `text` (scanning from `i`), or None if it continues."""
+        if self._scalar:
+            match = _SCALAR_END.search(text, i)
+            return match.start() if match else None
+        if self._escape:
+            if i >= len(text):
+                return None
+            i += 1
+            self._escape = False
+        while True:
+            if self._in_string:
+                i = _STRING_BODY.match(text, i).end()
+                if i >= len(text):
+                    return None
+                if text[i] == "\\":  # a backslash that ends the chunk
+                    self._escape = True
+                    return None
+                i += 1
+                self._in_string = False
+                if not self._depth:
+                    return i
+            else:
+                match = _STRUCTURAL.search(text, i)
+                if match is None:
+                    return None
+                i = match.end()
+                char = match.group()
+                if char == '"':
+                    self._in_string = True
+                elif char in "{[":
+                    self._depth += 1
+                else:
+                    self._depth -= 1
+                    if self._depth <= 0:
+                        return i
+
+
+class _JsonReader:
+    """Pull JSON values off a text stream, keeping only about one value plus one chunk in memory."""
+
+    def __init__(self, f, chunk_size):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        data = self._f.read(self._chunk_size)
+        if not data:
+            self._eof = True
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+
+    def peek(self):
+        """Next non-whitespace character, or "" at end of input."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf) or self._eof:
+                return self._buf[self._pos:self._pos + 1]
+            self._fill()
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Invalid graph file: expected {char!r}, found {found or 'end of file'!r}")
+        self._pos += 1
+
+    def value(self):
+        scan = _ValueEnd(self.peek())
+        text, start = self._buf, self._pos
+        end = scan.feed(text, start)
+        if end is not None:
+            value, self._pos = _decoder.raw_decode(text, start)
+            return value
+        # The value spans chunks: scan each new chunk once and decode the joined text once.
+        parts = [text[start:]]
+        while end is None:
+            text = self._f.read(self._chunk_size)
+            if not text:
+                self._eof = True
+                break
+            end = scan.feed(text, 0)
+            parts.append(text if end is None else text[:end])
+        joined = "".join(parts)
+        value, stop = _decoder.raw_decode(joined)
+        self._buf = joined[stop:] + (text[end:] if end is not None else "")
+        self._pos = 0
+        return value
+
+
+def iter_graph_json(path, chunk_size=1 << 20):
+    """
+    Stream a graph JSON file without loading it whole.
+
+    Yields ("node", node_id, node) for every entry of the top-level `nodes`
+    object, one at a time, and ("meta", key, value) for every other top-level
+    key, in file order.
+    """
+    with open(path, "r") as f:
+        reader = _JsonReader(f, chunk_size)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise ValueError("Invalid graph file: expected a key")
+            reader.expect(":")
+            if key == "nodes":
+                reader.expect("{")
+                while reader.peek() != "}":
+                    node_id = reader.value()
+                    reader.expect(":")
+                    yield "node", node_id, reader.value()
+                    if reader.peek() != ",":
+                        break
+                    reader.expect(",")
+                reader.expect("}")
+            else:
+                yield "meta", key, reader.value()
+            if reader.peek() != ",":
+                break
+            reader.expect(",")
+        reader.expect("}")
+
+
+def validate_node(node_id, node):
+    """Raise ValueError unless `node` is a well-formed node record stored under `node_id`."""
+    if not isinstance(node, dict):
+        raise ValueError(f"Node {node_id}: expected an object")
+    if node.get("id") != node_id:
+        raise ValueError(f"Node {node_id}: id field is {node.get('id')!r}")
+    if not isinstance(node.get("prompt", ""), str):
+        raise ValueError(f"Node {node_id}: prompt must be a string")
+    for key in ("children", "tags", "citations"):
+        if key in node and not isinstance(node[key], list):
+            raise ValueError(f"Node {node_id}: {key} must be a list")
@@ -0,0 +1,145 @@
+# chatcli/core/keyword_index.py
+
+import heapq
+import json
+import math
+import os
+import re
+from pathlib import Path
+
+TEXT_FIELDS = ("prompt", "response", "comment")
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Lower-cased word tokens; identifiers such as `get_node` stay whole."""
+    return _TOKEN.findall(text.lower())
+
+
+def node_text(node):
+    return "\n".join(node.get(field) or "" for field in TEXT_FIELDS)
+
+
+class KeywordIndex:
+    """
+    Inverted index with BM25 ranking over node text (see `TEXT_FIELDS`).
+
+    Postings map each term to {node_id: term frequency}. Nodes are added,
+    replaced or removed one at a time, so the index is kept current without
+    rebuilding, and a query only touches the postings of its own terms.
+
+    Args:
+        k1, b: BM25 term-frequency saturation and length normalization.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.dirty = False
+        self._postings = {}  # term -> {node_id: tf}
+        self._docs = {}      # node_id -> {term: tf}
+        self._lengths = {}   # node_id -> token count
+        self._total = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, node_id):
+        return node_id in self._docs
+
+    def node_ids(self):
+        return list(self._docs)
+
+    def add(self, node_id, text):
+        """Index (or re-index) `node_id` with `text`."""
+        self.remove(node_id)
+        counts = {}
+        tokens = tokenize(text)
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        self._insert(node_id, counts, len(tokens))
+        self.dirty = True
+
+    def _insert(self, node_id, counts, length):
+        self._docs[node_id] = counts
+        self._lengths[node_id] = length
+        self._total += length
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[node_id] = tf
+
+    def remove(self, node_id):
+        counts = self._docs.pop(node_id, None)
+        if counts is None:
+            return False
+        self._total -= self._lengths.pop(node_id)
+        for term in counts:
+            postings = self._postings[term]
+            del postings[node_id]
+            if not postings:
+                del self._postings[term]
+        self.dirty = True
+        return True
+
+    def search(self, query, top_k=5, ids=None, accept=None):
+        """
+        Return up to `top_k` (node_id, BM25 score) pairs, best first.
+
+        `ids` limits scoring to those nodes; `accept` (node_id -> bool) drops
+        matches after scoring.
+        """
+        if not self._docs:
+            return []
+        n = len(self._docs)
+        avgdl = (self._total / n) or 1.0
+        k1, b = self.k1, self.b
+        lengths = self._lengths
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for node_id, tf in postings.items():
+                if ids is not None and node_id not in ids:
+                    continue
+                norm = k1 * (1 - b + b * lengths[node_id] / avgdl)
+                scores[node_id] = scores.get(node_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        matches = scores.items() if accept is None else ((nid, s) for nid, s in scores.items() if accept(nid))
+        return heapq.nlargest(top_k, matches, key=lambda item: item[1])
+
+    @classmethod
+    def build(cls, items, **kwargs):
+        """Build an index from an iterable of (node_id, text) pairs."""
+        index = cls(**kwargs)
+        for node_id, text in items:
+            index.add(node_id, text)
+        return index
+
+    def save(self, path):
+        """Write the per-node term counts to `path` (postings are rebuilt on load)."""
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"version": 1, "k1": self.k1, "b": self.b,
+                       "docs": {nid: [self._lengths[nid], counts] for nid, counts in self._docs.items()}}, f)
+        os.replace(tmp_path, path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved by `save`; returns None if it is missing or unreadable."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r") as f:
+                meta = json.load(f)
+            index = cls(meta["k1"], meta["b"])
+            for node_id, (length, counts) in meta["docs"].items():
+                index._insert(node_id, counts, length)
+        except Exception as e:
+            print(f"Warning: failed to load keyword index {path}: {e}")
+            return None
+        return index
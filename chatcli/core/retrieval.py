@@ -0,0 +1,109 @@
+# chatcli/core/retrieval.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+MODES = ("vector", "keyword", "hybrid")
+
+_DEFAULTS = {
+    "mode": "hybrid",
+    "rrf_k": 60,
+    "vector_weight": 1.0,
+    "keyword_weight": 1.0,
+    "candidates": 20,
+    "min_score": None,
+}
+
+
+def retrieval_config(graph):
+    """The `retrieval:` section of the config, with defaults filled in."""
+    return {**_DEFAULTS, **(graph._config.get("retrieval") or {})}
+
+
+def reciprocal_rank_fusion(rankings, weights=None, k=60):
+    """
+    Merge ranked lists of (node_id, score) pairs by reciprocal-rank fusion.
+
+    Each list contributes `weight / (k + rank)` (rank starting at 1) to every
+    node it contains, so only positions matter and scores from different
+    retrievers never have to be put on one scale. Returns (node_id, fused
+    score) pairs, best first.
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, (node_id, _score) in enumerate(ranking, start=1):
+            fused[node_id] = fused.get(node_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def search_scope(graph, tags=None, subtree=None, node_type=None, exclude=None):
+    """
+    Turn search filters into `(ids, accept)` for `VectorIndex.search` / `KeywordIndex.search`.
+
+    Tags (a list meaning "all of", or a `find_by_tags` keyword dict) and a
+    subtree root resolve to a candidate id set through the tag index and a
+    subtree walk; `node_type` (e.g. "doc", "web-result") and `exclude` become
+    a per-node predicate, applied to the candidates right away when there are
+    any and left to the index as a post-filter otherwise. Both are None when
+    nothing is filtered.
+    """
+    ids = None
+    if tags:
+        ids = graph.find_by_tags(**tags) if isinstance(tags, dict) else graph.find_by_tags(all=tags)
+    if subtree is not None:
+        graph._require(subtree)
+        below = {subtree, *graph.descendants(subtree)}
+        ids = below if ids is None else ids & below
+
+    checks = []
+    if exclude:
+        excluded = set(exclude)
+        checks.append(lambda nid: nid not in excluded)
+    if node_type is not None:
+        checks.append(lambda nid: graph.data.get(nid, {}).get("type") == node_type)
+    accept = (lambda nid: all(check(nid) for check in checks)) if checks else None
+    if ids is not None and accept is not None:
+        ids, accept = {nid for nid in ids if accept(nid)}, None
+    return ids, accept
+
+
+def hybrid_search(graph, query_text, top_k=3, mode=None, min_score=None, **filters):
+    """
+    Retrieve context nodes for `query_text` as (node_id, score) pairs.
+
+    `mode` (default: `retrieval.mode` in the config) is "vector" (`simsearch`),
+    "keyword" (`keyword_search`) or "hybrid", which runs both concurrently,
+    each for `retrieval.candidates` results, and fuses them with
+    `reciprocal_rank_fusion` using `retrieval.vector_weight` /
+    `retrieval.keyword_weight` and `retrieval.rrf_k`. `filters` (tags,
+    subtree, node_type, exclude) scope both retrievers; see `search_scope`.
+    `min_score` is the cosine cutoff for vector matches (see `simsearch`).
+    """
+    cfg = retrieval_config(graph)
+    mode = mode or cfg["mode"]
+    if mode not in MODES:
+        raise ValueError(f"Unknown retrieval mode: {mode} (expected one of {', '.join(MODES)})")
+    filters = {key: value for key, value in filters.items() if value is not None}
+    vector_args = dict(filters, min_score=min_score) if min_score is not None else filters
+    if mode == "vector":
+        return graph.simsearch(query_text, top_k=top_k, **vector_args)
+
+    ids, accept = search_scope(graph, **filters)
+    # Bring the keyword index up to date here, so the worker below only reads it.
+    keyword_index = graph._keyword_index
+
+    def keyword_results(limit):
+        return keyword_index.search(query_text, limit, ids=ids, accept=accept)
+
+    if mode == "keyword":
+        return keyword_results(top_k)
+
+    candidates = max(top_k, cfg["candidates"])
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        # Query embedding and FAISS release the GIL, so BM25 scoring overlaps with them.
+        lexical = pool.submit(keyword_results, candidates)
+        vector = graph.simsearch(query_text, top_k=candidates, **vector_args)
+        lexical = lexical.result()
+    fused = reciprocal_rank_fusion(
+        [vector, lexical], [cfg["vector_weight"], cfg["keyword_weight"]], k=cfg["rrf_k"])
+    return fused[:top_k]
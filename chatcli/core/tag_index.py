@@ -0,0 +1,67 @@
+# chatcli/core/tag_index.py
+
+
+class TagIndex:
+    """
+    Inverted index from tag to the ids of the nodes carrying it.
+
+    Built once from the nodes' `tags` lists and then kept up to date as nodes
+    are inserted and tagged, so tag lookups cost O(matches) instead of a scan
+    over every node. Node ids are kept in the order they were tagged (dicts
+    used as ordered sets), and boolean queries are plain set operations.
+    """
+
+    def __init__(self):
+        self._nodes = {}
+
+    @classmethod
+    def build(cls, data):
+        index = cls()
+        for node_id, node in data.items():
+            index.add_node(node_id, node)
+        return index
+
+    def add_node(self, node_id, node):
+        for tag in node.get("tags", []):
+            self.add(node_id, tag)
+
+    def add(self, node_id, tag):
+        self._nodes.setdefault(tag, {})[node_id] = None
+
+    def tags(self):
+        """Every tag in use, with its node count."""
+        return {tag: len(ids) for tag, ids in self._nodes.items() if ids}
+
+    def nodes(self, tag):
+        return list(self._nodes.get(tag, ()))
+
+
+def match_tags(lookup, universe, all=None, any=None, none=None):
+    """
+    Evaluate a boolean tag query with set operations.
+
+    Args:
+        lookup: callable, tag -> ids of the nodes carrying it.
+        universe: callable returning every node id; only used when neither
+            `all` nor `any` narrows the candidates.
+        all: nodes must carry every one of these tags.
+        any: nodes must carry at least one of these tags.
+        none: nodes must carry none of these tags.
+
+    Returns:
+        set of matching node ids.
+    """
+    result = None
+    # Intersect smallest-first so the working set shrinks as fast as possible.
+    for ids in sorted((set(lookup(tag)) for tag in all or ()), key=len):
+        result = ids if result is None else result & ids
+        if not result:
+            return set()
+    if any:
+        either = set().union(*(lookup(tag) for tag in any))
+        result = either if result is None else result & either
+    if result is None:
+        result = set(universe())
+    for tag in none or ():
+        result.difference_update(lookup(tag))
+    return result
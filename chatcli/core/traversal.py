@@ -0,0 +1,96 @@
+# chatcli/core/traversal.py
+
+"""
+Iterative graph traversals.
+
+`dfs` and `bfs` are generators yielding `(node_id, depth)` pairs, so callers
+see the first results immediately and can stop at any point. Neither uses
+recursion: `dfs` keeps one iterator per level (memory O(depth) for reply
+trees) and `bfs` one frontier queue.
+
+Common arguments:
+    edges:       "children" (reply tree, default) or "citations".
+    max_depth:   do not go deeper than this many edges from the start.
+    predicate:   only yield nodes for which `predicate(node)` is true; the
+                 walk still continues below nodes that are filtered out.
+    prune:       do not descend below nodes for which `prune(node)` is true.
+    include_start: yield the start node itself (depth 0).
+    unique:      skip nodes already seen; defaults to True for citations,
+                 which form a DAG, and False for the reply tree.
+"""
+
+from collections import deque
+
+
+def has_tag(tag):
+    """Predicate: node carries `tag`."""
+    return lambda node: tag in node.get("tags", [])
+
+
+def has_type(node_type):
+    """Predicate: node has `type` equal to `node_type`."""
+    return lambda node: node.get("type") == node_type
+
+
+def _neighbors(node, edges):
+    return node.get(edges, [])
+
+
+def dfs(graph, start_id, edges="children", max_depth=None, predicate=None, prune=None,
+        include_start=True, unique=None):
+    """Depth-first, pre-order walk from `start_id` (children in stored order)."""
+    data = graph.data
+    unique = edges != "children" if unique is None else unique
+    seen = {start_id} if unique else None
+    node = data.get(start_id)
+    if node is None:
+        return
+    if include_start and (predicate is None or predicate(node)):
+        yield start_id, 0
+    if (prune is not None and prune(node)) or max_depth == 0:
+        return
+
+    stack = [(iter(_neighbors(node, edges)), 1)]
+    while stack:
+        children, depth = stack[-1]
+        child_id = next(children, None)
+        if child_id is None:
+            stack.pop()
+            continue
+        if seen is not None:
+            if child_id in seen:
+                continue
+            seen.add(child_id)
+        child = data.get(child_id)
+        if child is None:
+            continue
+        if predicate is None or predicate(child):
+            yield child_id, depth
+        if (prune is None or not prune(child)) and (max_depth is None or depth < max_depth):
+            stack.append((iter(_neighbors(child, edges)), depth + 1))
+
+
+def bfs(graph, start_id, edges="children", max_depth=None, predicate=None, prune=None,
+        include_start=True, unique=None):
+    """Breadth-first walk from `start_id`, level by level."""
+    data = graph.data
+    unique = edges != "children" if unique is None else unique
+    seen = {start_id} if unique else None
+    if start_id not in data:
+        return
+    queue = deque([(start_id, 0)])
+    while queue:
+        node_id, depth = queue.popleft()
+        node = data.get(node_id)
+        if node is None:
+            continue
+        if (depth or include_start) and (predicate is None or predicate(node)):
+            yield node_id, depth
+        if (prune is not None and prune(node)) or (max_depth is not None and depth >= max_depth):
+            continue
+        for child_id in _neighbors(node, edges):
+            if seen is not None:
+                if child_id in seen:
+                    continue
+                seen.add(child_id)
+            queue.append((child_id, depth + 1))
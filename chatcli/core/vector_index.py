@@ -0,0 +1,350 @@
+# chatcli/core/vector_index.py
+
+import json
+import math
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("auto", "flat", "hnsw", "ivf", "ivfpq")
+FLAT = {"type": "flat"}
+
+_DEFAULTS = {
+    "index": "auto",
+    "hnsw_m": 32,
+    "hnsw_ef_search": 64,
+    "ivf_nlist": 0,
+    "ivf_nprobe": 16,
+    "pq_m": 16,
+    "auto_hnsw_min": 20_000,
+    "auto_ivfpq_min": 500_000,
+}
+
+
+def index_spec(config, count, dim=None):
+    """
+    The index to use for `count` vectors under the `embedding:` config section.
+
+    Returns a dict such as {"type": "hnsw", "m": 32, "ef_search": 64}. `auto`
+    picks flat (exact) for small graphs, HNSW from `auto_hnsw_min` vectors and
+    IVF-PQ from `auto_ivfpq_min`. IVF types fall back to flat until there are
+    enough vectors to train their centroids.
+    """
+    cfg = {**_DEFAULTS, **(config or {})}
+    kind = cfg["index"]
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown embedding index type: {kind} (expected one of {', '.join(INDEX_TYPES)})")
+    if kind == "auto":
+        kind = "flat" if count < cfg["auto_hnsw_min"] else "hnsw" if count < cfg["auto_ivfpq_min"] else "ivfpq"
+    if kind == "flat":
+        return dict(FLAT)
+    if kind == "hnsw":
+        return {"type": "hnsw", "m": cfg["hnsw_m"], "ef_search": cfg["hnsw_ef_search"]}
+
+    # About 4 * sqrt(N) lists, rounded to a power of two so small growth does not force a retrain.
+    nlist = cfg["ivf_nlist"] or 2 ** max(4, round(math.log2(4 * math.sqrt(max(count, 1)))))
+    spec = {"type": kind, "nlist": nlist, "nprobe": min(cfg["ivf_nprobe"], nlist)}
+    min_train = 39 * nlist
+    if kind == "ivfpq":
+        pq_m = cfg["pq_m"]
+        if dim is not None:
+            pq_m = max(m for m in range(1, min(pq_m, dim) + 1) if dim % m == 0)
+        spec["pq_m"] = pq_m
+        min_train = max(min_train, 39 * 256)
+    return spec if count >= min_train else dict(FLAT)
+
+
+def normalize(vectors):
+    """`vectors` as float32 rows scaled to unit length (zero rows stay zero)."""
+    rows = np.asarray(vectors, dtype=np.float32)
+    rows = rows.reshape(-1, rows.shape[-1])
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    return rows / np.where(norms > 0, norms, 1)
+
+
+def _factory_string(spec):
+    kind = spec["type"]
+    if kind == "hnsw":
+        return f"IDMap2,HNSW{spec['m']}"
+    # IVF indexes take arbitrary ids (and reconstruct/remove them) themselves, without an IDMap.
+    if kind == "ivf":
+        return f"IVF{spec['nlist']},Flat"
+    if kind == "ivfpq":
+        return f"IVF{spec['nlist']},PQ{spec['pq_m']}"
+    return "IDMap2,Flat"
+
+
+class VectorIndex:
+    """
+    Long-lived FAISS index over node embeddings, keyed by node ID.
+
+    Vectors are normalized on the way in and compared by inner product, so
+    scores are cosine similarities in [-1, 1] whatever the embedding norms.
+
+    Node IDs are mapped to stable int64 labels so entries can be replaced or
+    removed in place through an ``IndexIDMap2`` (or the IVF index's own ids),
+    without rebuilding the index or walking the node dict.
+
+    The underlying index is exact (flat) by default; `spec` (see `index_spec`)
+    selects HNSW, IVF or IVF-PQ instead. IVF types are trained by `build`.
+    HNSW cannot delete entries, so removed labels are left in place as
+    tombstones that searches skip, until `outgrown` asks for a rebuild.
+    """
+
+    def __init__(self, dim=None, spec=None):
+        self.dim = None
+        self.dirty = False
+        self.spec = dict(spec or FLAT)
+        self._index = None
+        self._labels = {}    # node_id -> int64 label
+        self._node_ids = {}  # int64 label -> node_id
+        self._next_label = 0
+        if dim is not None:
+            self._reset(dim)
+
+    def _reset(self, dim, training=None):
+        self.dim = dim
+        if self.spec["type"] in ("ivf", "ivfpq") and training is None:
+            self.spec = dict(FLAT)  # nothing to train on yet
+        self._index = faiss.index_factory(dim, _factory_string(self.spec), faiss.METRIC_INNER_PRODUCT)
+        if self.spec["type"] in ("ivf", "ivfpq"):
+            # A hashtable direct map lets reconstruct() find vectors by label.
+            self._index.set_direct_map_type(faiss.DirectMap.Hashtable)
+            if self.spec["type"] == "ivfpq":
+                self._index.do_polysemous_training = False  # only used by Hamming-filtered search; slow to train
+            self._index.train(training)
+        self.tune(self.spec)
+        self._labels = {}
+        self._node_ids = {}
+        self._next_label = 0
+
+    def tune(self, spec):
+        """Apply the query-time settings of `spec` (HNSW efSearch, IVF nprobe) without a rebuild."""
+        if spec["type"] != self.spec["type"] or self._index is None:
+            return
+        inner = self._index if spec["type"] in ("ivf", "ivfpq") else faiss.downcast_index(self._index.index)
+        if "ef_search" in spec:
+            self.spec["ef_search"] = inner.hnsw.efSearch = spec["ef_search"]
+        if "nprobe" in spec:
+            self.spec["nprobe"] = inner.nprobe = min(spec["nprobe"], self.spec["nlist"])
+
+    @property
+    def tombstones(self):
+        """Removed entries still physically present in the index (HNSW only)."""
+        return self._index.ntotal - len(self._labels) if self._index is not None else 0
+
+    def outgrown(self, spec):
+        """True if the index should be rebuilt as `spec` (see `index_spec`)."""
+        if self._index is None:
+            return False
+        if spec["type"] != self.spec["type"]:
+            return True
+        if spec.get("nlist") and spec["nlist"] >= 4 * self.spec["nlist"]:
+            return True
+        return self.tombstones > max(len(self._labels), 1000)
+
+    def __len__(self):
+        return len(self._labels)
+
+    def __contains__(self, node_id):
+        return node_id in self._labels
+
+    def node_ids(self):
+        return list(self._labels)
+
+    def add(self, node_id, vector):
+        """Add or replace the vector stored for `node_id`."""
+        vec = normalize(vector)
+        if self._index is None or vec.shape[1] != self.dim:
+            # First vector, or the embedding model changed: start over.
+            self._reset(vec.shape[1])
+        self.remove(node_id)
+
+        self._add_batch([node_id], vec)
+
+    def _add_batch(self, node_ids, vectors):
+        labels = np.arange(self._next_label, self._next_label + len(node_ids), dtype=np.int64)
+        self._next_label += len(node_ids)
+        self._index.add_with_ids(vectors, labels)
+        for node_id, label in zip(node_ids, labels.tolist()):
+            self._labels[node_id] = label
+            self._node_ids[label] = node_id
+        self.dirty = True
+
+    def remove(self, node_id):
+        label = self._labels.pop(node_id, None)
+        if label is None:
+            return False
+        del self._node_ids[label]
+        if self.spec["type"] != "hnsw":
+            self._index.remove_ids(np.array([label], dtype=np.int64))
+        self.dirty = True
+        return True
+
+    def clear(self):
+        self.dim = None
+        self.spec = dict(FLAT)
+        self._index = None
+        self._labels = {}
+        self._node_ids = {}
+        self._next_label = 0
+        self.dirty = True
+
+    # Candidate sets up to this size are scored directly, without touching the rest of the index.
+    EXACT_SCAN_MAX = 1024
+    # Candidate sets covering more than this share of the index are post-filtered instead.
+    POSTFILTER_FRACTION = 0.5
+
+    def search(self, vector, top_k=3, ids=None, accept=None):
+        """
+        Return up to `top_k` (node_id, cosine similarity) pairs, most similar first.
+
+        Args:
+            ids: only these nodes are candidates.
+            accept: callable, node_id -> bool; results it rejects are skipped.
+
+        The plan depends on how selective `ids` is: small candidate sets are
+        scored directly from their stored vectors (cost proportional to the
+        set, not the index), mid-sized ones are pushed into FAISS as an ID
+        selector, and sets covering most of the index (or `accept` alone) are
+        searched unfiltered with a widening `k` and filtered afterwards.
+        """
+        if not self._labels:
+            return []
+        query = normalize(vector)
+        if query.shape[1] != self.dim:
+            raise ValueError(
+                f"Query dimension {query.shape[1]} does not match index dimension {self.dim}"
+            )
+        params = None
+        # Tombstoned labels still occupy result slots, so the widening below must be able to reach all entries.
+        limit = self._index.ntotal
+        if ids is not None:
+            ids = ids if isinstance(ids, (set, frozenset, dict)) else set(ids)
+            if len(ids) > len(self._labels) * self.POSTFILTER_FRACTION:
+                accept = self._both(ids.__contains__, accept)
+            else:
+                labels = [label for label in map(self._labels.get, ids) if label is not None]
+                if not labels:
+                    return []
+                labels = np.array(labels, dtype=np.int64)
+                if len(labels) <= self.EXACT_SCAN_MAX:
+                    return self._exact_search(query, labels, top_k, accept)
+                params = self._search_params(faiss.IDSelectorBatch(labels))
+                limit = len(labels)
+
+        # Widen k until enough results pass `accept` or the candidates run out.
+        k = min(top_k if accept is None else 2 * top_k, limit)
+        while True:
+            D, I = self._index.search(query, k, params=params)
+            results = [
+                (self._node_ids[label], _clip(score))
+                for score, label in zip(D[0], I[0])
+                if label in self._node_ids and (accept is None or accept(self._node_ids[label]))
+            ]
+            # A -1 label means the index has nothing more to offer (e.g. every probed IVF list is used up).
+            if len(results) >= top_k or k >= limit or I[0][-1] < 0:
+                return results[:top_k]
+            k = min(4 * k, limit)
+
+    def _search_params(self, sel):
+        # IVF rejects plain SearchParameters, and HNSW would drop back to its default efSearch.
+        kind = self.spec["type"]
+        if kind == "hnsw":
+            return faiss.SearchParametersHNSW(sel=sel, efSearch=self.spec["ef_search"])
+        if kind in ("ivf", "ivfpq"):
+            return faiss.SearchParametersIVF(sel=sel, nprobe=self.spec["nprobe"])
+        return faiss.SearchParameters(sel=sel)
+
+    @staticmethod
+    def _both(first, second):
+        if second is None:
+            return first
+        return lambda node_id: first(node_id) and second(node_id)
+
+    def _exact_search(self, query, labels, top_k, accept):
+        vectors = self._index.reconstruct_batch(labels)
+        scores = vectors @ query[0]
+        results = []
+        for i in np.argsort(-scores, kind="stable"):
+            node_id = self._node_ids[int(labels[i])]
+            if accept is None or accept(node_id):
+                results.append((node_id, _clip(scores[i])))
+                if len(results) == top_k:
+                    break
+        return results
+
+    @classmethod
+    def build(cls, items, config=None):
+        """
+        Build an index from an iterable of (node_id, vector) pairs.
+
+        The index type is chosen by `index_spec(config, count)`; IVF types are
+        trained on the vectors being added.
+        """
+        node_ids, vectors = [], []
+        for node_id, vector in items:
+            node_ids.append(node_id)
+            vectors.append(np.asarray(vector, dtype=np.float32).ravel())
+        if not node_ids:
+            return cls()
+        if len({len(v) for v in vectors}) > 1:
+            # Mixed dimensions (model changed mid-graph): keep the last model's vectors, as `add` would.
+            index = cls()
+            for node_id, vector in zip(node_ids, vectors):
+                index.add(node_id, vector)
+            return index
+        matrix = normalize(np.vstack(vectors))
+        index = cls(spec=index_spec(config, len(node_ids), matrix.shape[1]))
+        index._reset(matrix.shape[1], training=matrix)
+        index._add_batch(node_ids, matrix)
+        return index
+
+    @staticmethod
+    def _ids_path(path):
+        path = Path(path)
+        return path.with_name(path.name + ".ids.json")
+
+    def save(self, path):
+        """Write the FAISS index to `path` and its ID map next to it."""
+        path = Path(path)
+        if self._index is None:
+            path.unlink(missing_ok=True)
+            self._ids_path(path).unlink(missing_ok=True)
+        else:
+            faiss.write_index(self._index, str(path))
+            with open(self._ids_path(path), "w") as f:
+                json.dump({"next_label": self._next_label, "labels": self._labels, "spec": self.spec,
+                           "metric": "cosine"}, f)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved by `save`; returns None if it is missing or unreadable."""
+        path = Path(path)
+        ids_path = cls._ids_path(path)
+        if not path.exists() or not ids_path.exists():
+            return None
+        try:
+            raw = faiss.read_index(str(path))
+            with open(ids_path, "r") as f:
+                meta = json.load(f)
+        except Exception as e:
+            print(f"Warning: failed to load vector index {path}: {e}")
+            return None
+        if meta.get("metric") != "cosine":
+            return None  # saved by an L2 version; rebuild from the node embeddings
+
+        index = cls(spec=meta.get("spec"))
+        index.dim = raw.d
+        index._index = raw
+        index._labels = {nid: int(label) for nid, label in meta["labels"].items()}
+        index._node_ids = {label: nid for nid, label in index._labels.items()}
+        index._next_label = meta["next_label"]
+        return index
+
+
+def _clip(score):
+    # Compressed (PQ) vectors can land a hair outside the unit sphere.
+    return min(1.0, max(-1.0, float(score)))
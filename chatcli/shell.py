@@ -8,9 +8,9 @@ from chatcli.core.graph import ConversationGraph
 
 COMMANDS = [
     "new", "reply", "view", "tree", "tree_all", "import", "improve", "save", "websearch",
-    "saveurl", "citeurl", "ask", "embed_summary", "embed_node", "embed_all",
-    "embed_subtree", "simsearch", "smart_ask", "promote_smart_ask",
-    "goto", "parent", "exit"
+    "saveurl", "citeurl", "ask", "embed_summary", "embed_node", "embed_all", "embed_pending",
+    "embed_subtree", "simsearch", "search", "smart_ask", "promote_smart_ask",
+    "goto", "parent", "diverge", "tagged", "exit"
 ]
 
 class ChatCLIShell(cmd.Cmd):
@@ -29,7 +29,13 @@ class ChatCLIShell(cmd.Cmd):
     def default(self, line):
         print(f"*** Unknown syntax: {line}")
 
+    def onecmd(self, line):
+        # Keep the autosave thread from writing while a command is mid-way.
+        with self.graph._lock:
+            return super().onecmd(line)
+
     def do_exit(self, arg):
+        self.graph.close()
         return True
 
     def do_new(self, arg):
@@ -51,8 +57,19 @@ class ChatCLIShell(cmd.Cmd):
         print(f"[{node['id']}] {node['prompt']}\n{node['response']}")
 
     def do_tree(self, arg):
-        arg = arg.strip()
-        self.graph.print_tree(root_id=arg or None, current_id=self.current_id)
+        """tree [root|parent|<id>] [--depth N]"""
+        parts = arg.split()
+        max_depth = None
+        if "--depth" in parts:
+            i = parts.index("--depth")
+            try:
+                max_depth = int(parts[i + 1])
+            except (IndexError, ValueError):
+                print("Usage: tree [root|parent|<id>] [--depth N]")
+                return
+            del parts[i:i + 2]
+        root_id = parts[0] if parts else None
+        self.graph.print_tree(root_id=root_id, current_id=self.current_id, max_depth=max_depth)
 
     def do_tree_all(self, arg):
         """Show the full DAG starting from the root."""
@@ -117,25 +134,69 @@ class ChatCLIShell(cmd.Cmd):
             print(f"Embed failed: {e}")
 
     def do_embed_all(self, arg):
+        """embed_all [--force] [--dry-run]: embed nodes lacking an embedding (--force: re-embed every node)."""
         try:
-            self.graph.embed_all("--dry-run" in arg)
+            count = self.graph.embed_all(dry_run="--dry-run" in arg, force="--force" in arg)
+            if not count:
+                print("Nothing to embed")
         except Exception as e:
             print(f"Embed-all failed: {e}")
 
+    def do_embed_pending(self, arg):
+        """embed_pending [--dry-run]: embed nodes whose text changed since they were last embedded."""
+        try:
+            if not self.graph.embed_pending(dry_run="--dry-run" in arg):
+                print("No pending embeddings")
+        except Exception as e:
+            print(f"Embed-pending failed: {e}")
+
     def do_embed_subtree(self, arg):
         try:
             dry_run = "--dry-run" in arg
             node_id = arg.replace("--dry-run", "").strip() or self.current_id
-            self.graph.embed_subtree(node_id, dry_run=dry_run)
+            count = self.graph.embed_subtree(node_id, dry_run=dry_run)
+            print(f"Embedded {count} nodes under {node_id}")
         except Exception as e:
             print(f"Embed subtree failed: {e}")
 
     def do_simsearch(self, arg):
-        query = arg.strip()
+        """simsearch <query> [--tag T]... [--type T] [--subtree ID|--here] [--exclude ID]... [--min-score S]"""
+        usage = ("Usage: simsearch <query> [--tag T]... [--type T] [--subtree ID|--here] [--exclude ID]... "
+                 "[--min-score S]")
+        parts = arg.split()
+        filters = {"tags": [], "exclude": []}
+        options = {"--tag": "tags", "--exclude": "exclude", "--type": "node_type", "--subtree": "subtree",
+                   "--min-score": "min_score"}
+        query = []
+        i = 0
+        while i < len(parts):
+            part = parts[i]
+            if part == "--here":
+                filters["subtree"] = self.current_id
+            elif part in options:
+                if i + 1 >= len(parts):
+                    print(usage)
+                    return
+                key = options[part]
+                if isinstance(filters.get(key), list):
+                    filters[key].append(parts[i + 1])
+                else:
+                    filters[key] = parts[i + 1]
+                i += 1
+            else:
+                query.append(part)
+            i += 1
+        query = " ".join(query)
         if not query:
-            print("Usage: simsearch <query>")
+            print(usage)
+            return
+        try:
+            if "min_score" in filters:
+                filters["min_score"] = float(filters["min_score"])
+            results = self.graph.simsearch(query, **{k: v for k, v in filters.items() if v != []})
+        except ValueError as e:
+            print(e)
             return
-        results = self.graph.simsearch(query)
         if not results:
             print("No similar nodes found.")
             return
@@ -143,6 +204,20 @@ class ChatCLIShell(cmd.Cmd):
             prompt = self.graph.data[node_id].get('prompt', '')
             print(f"{node_id[:8]}  {score:.2f}  {prompt[:60]}")
 
+    def do_search(self, arg):
+        """search <keywords>: BM25 keyword search over prompts, responses and comments."""
+        query = arg.strip()
+        if not query:
+            print("Usage: search <keywords>")
+            return
+        results = self.graph.keyword_search(query)
+        if not results:
+            print("No matching nodes found.")
+            return
+        for node_id, score in results:
+            prompt = self.graph.data[node_id].get('prompt', '')
+            print(f"{node_id[:8]}  {score:.2f}  {prompt[:60]}")
+
     def do_ask(self, arg):
         if not self.current_id:
             print("No current node.")
@@ -223,6 +298,50 @@ class ChatCLIShell(cmd.Cmd):
         self.current_id = node_id
         print(f"Moved to node {node_id}")
 
+    def do_diverge(self, arg):
+        """diverge <a> <b>: show where the reply branches of two nodes split."""
+        parts = arg.split()
+        if len(parts) != 2:
+            print("Usage: diverge <node_a> <node_b>")
+            return
+        a, b = parts
+        try:
+            lca = self.graph.lowest_common_ancestor(a, b)
+        except ValueError as e:
+            print(e)
+            return
+        if lca is None:
+            print(f"{a} and {b} are in different conversation trees.")
+            return
+        path = self.graph.path_between(a, b)
+        split = path.index(lca)
+        print(f"Branches diverge at {self.graph.preview_node(lca)} (depth {self.graph.depth(lca)})")
+        for label, branch in ((a, path[:split][::-1]), (b, path[split + 1:])):
+            steps = " -> ".join(branch) if branch else "(same node)"
+            print(f"  towards {label}: {len(branch)} step(s): {steps}")
+
+    def do_tagged(self, arg):
+        """tagged <tag>... [--any T,...] [--none T,...]: list nodes matching a tag query."""
+        usage = "Usage: tagged <tag>... [--any T,...] [--none T,...]"
+        parts = arg.split()
+        query = {"all": [], "any": [], "none": []}
+        key = "all"
+        for part in parts:
+            if part in ("--any", "--none"):
+                key = part[2:]
+                continue
+            query[key].extend(t for t in part.split(",") if t)
+            key = "all"
+        if not any(query.values()):
+            print(usage)
+            return
+        matches = self.graph.find_by_tags(**query)
+        if not matches:
+            print("No matching nodes.")
+            return
+        for node_id in sorted(matches):
+            print(self.graph.preview_node(node_id))
+
     def do_parent(self, arg):
         if not self.current_id:
             print("No current node.")
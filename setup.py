@@ -19,6 +19,9 @@ setup(
             "pytest-cov",
             "sentence-transformers",
             "torch"
+        ],
+        "snapshot": [
+            "msgpack"
         ]
     },
     entry_points={
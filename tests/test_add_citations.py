@@ -0,0 +1,53 @@
+import pytest
+
+
+def _count_embeds(graph, monkeypatch):
+    calls = []
+    original = graph._store_embedding
+    monkeypatch.setattr(graph, "_store_embedding", lambda node_id, vector, version=None: (calls.append(node_id), original(node_id, vector, version)))
+    return calls
+
+
+def test_add_citations_reports_cycle_edges(graph):
+    a, b, c = graph.new("A"), graph.new("B"), graph.new("C")
+    graph.add_citation(b, a)
+    rejected = graph.add_citations([(c, b), (a, c), (c, a), (b, b)])
+
+    assert rejected == [(a, c), (b, b)]
+    assert graph.get_citations(c) == [b, a]
+    assert graph.get_citations(a) == []
+
+
+def test_add_citations_keeps_current_embeddings(graph, monkeypatch):
+    a, b, c, d = (graph.new(x) for x in "ABCD")
+    embeds = _count_embeds(graph, monkeypatch)
+    graph.add_citations([(d, a), (d, b), (d, c), (c, a)])
+    # Citing does not change a node's text, so its embedding stays current.
+    assert embeds == []
+
+
+def test_add_citations_persists_once(tmp_path, monkeypatch):
+    from chatcli.core.graph import ConversationGraph
+    g = ConversationGraph(storage_path=tmp_path / "graph.json")
+    ids = [g.new(f"N{i}") for i in range(4)]
+    saves = []
+    original = g.save_to_file
+    monkeypatch.setattr(g, "save_to_file", lambda name: (saves.append(name), original(name)))
+    g.add_citations([(ids[3], ids[0]), (ids[3], ids[1]), (ids[2], ids[0])])
+    assert len(saves) == 1
+
+
+def test_add_citations_invalid_id_changes_nothing(graph):
+    a, b = graph.new("A"), graph.new("B")
+    with pytest.raises(ValueError):
+        graph.add_citations([(b, a), (a, "missing")])
+    assert graph.get_citations(b) == []
+
+
+def test_cite_smart_ask_rolls_back_on_cycle(graph):
+    a, b, c = graph.new("A"), graph.new("B"), graph.new("C")
+    graph.add_citation(c, a)
+    graph.update_last_smart_ask(a, "Q?", "Answer", [b, c])
+    with pytest.raises(ValueError, match="cycle"):
+        graph.cite_smart_ask(a)
+    assert graph.get_citations(a) == []
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+from chatcli.core.ancestor_index import AncestorIndex
+
+
+def _naive_ancestors(parents, node):
+    chain = [node]
+    while parents.get(node) is not None:
+        node = parents[node]
+        chain.append(node)
+    return chain
+
+
+def test_matches_naive_walks_on_random_forest():
+    rng = random.Random(1)
+    parents = {0: None, 1: None}
+    for n in range(2, 400):
+        parents[n] = rng.choice([None] + list(range(n))) if rng.random() < 0.05 else rng.randrange(max(0, n - 5), n)
+    index = AncestorIndex(parents.get)
+
+    for _ in range(300):
+        a, b = rng.randrange(400), rng.randrange(400)
+        chain_a, chain_b = _naive_ancestors(parents, a), _naive_ancestors(parents, b)
+        assert index.depth(a) == len(chain_a) - 1
+        k = rng.randrange(len(chain_a) + 2)
+        assert index.ancestor_at(a, k) == (chain_a[k] if k < len(chain_a) else None)
+        common = next((n for n in chain_a if n in set(chain_b)), None)
+        assert index.lowest_common_ancestor(a, b) == common
+
+
+def test_graph_queries_and_path(graph):
+    root = graph.new("Root")
+    a = graph.reply(root, "A")
+    a1 = graph.reply(a, "A1")
+    b = graph.reply(root, "B")
+    other = graph.new("Other root")
+
+    assert graph.depth(a1) == 2
+    assert graph.ancestor_at(a1, 2) == root
+    assert graph.lowest_common_ancestor(a1, b) == root
+    assert graph.path_between(a1, b) == [a1, a, root, b]
+    assert graph.path_between(a, a1) == [a, a1]
+    assert graph.lowest_common_ancestor(a1, other) is None
+    with pytest.raises(ValueError):
+        graph.depth("missing")
+
+
+def _naive_parent_walk(graph, node_id):
+    path = []
+    current = graph.data.get(node_id)
+    while current and current.get("parent_id") in graph.data:
+        path.append(current["parent_id"])
+        current = graph.data[current["parent_id"]]
+    return path
+
+
+def test_ancestors_match_naive_parent_walk(graph):
+    rng = random.Random(2)
+    nodes = [graph.new("Root")]
+    with graph.batch():
+        for i in range(200):
+            nodes.append(graph.new(f"R{i}") if rng.random() < 0.05 else graph.reply(rng.choice(nodes), f"N{i}"))
+
+    for node_id in nodes:
+        chain = _naive_parent_walk(graph, node_id)
+        assert graph.ancestors(node_id) == chain
+        other = rng.choice(nodes)
+        assert graph.is_ancestor(other, node_id) == (other in chain)
+    assert graph.ancestors("missing") == []
+    assert not graph.is_ancestor(nodes[0], nodes[0])
+    assert not graph.is_ancestor("missing", nodes[0])
+
+
+def test_index_grows_with_appended_replies(graph):
+    node = root = graph.new("Root")
+    graph.depth(root)  # build the index, then keep appending
+    for i in range(1000):
+        node = graph.reply(node, f"N{i}")
+    assert graph.depth(node) == 1000
+    assert graph.ancestor_at(node, 1000) == root
+    assert graph.ancestor_at(node, 513) == graph.ancestors(node)[512]
+
+
+def test_shell_diverge(capsys):
+    from unittest.mock import patch
+    from chatcli.shell import ChatCLIShell
+    with patch("chatcli.shell.PromptSession"):
+        shell = ChatCLIShell()
+    g = shell.graph
+    root = g.new("Root")
+    a = g.reply(root, "A")
+    b = g.reply(root, "B")
+    shell.onecmd(f"diverge {a} {b}")
+    out = capsys.readouterr().out
+    assert f"diverge at [{root}]" in out
+    assert f"towards {a}: 1 step(s): {a}" in out
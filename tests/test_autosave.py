@@ -0,0 +1,76 @@
+import json
+import time
+
+import pytest
+from chatcli.core.graph import ConversationGraph
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "graph.json"
+
+
+def _saved_ids(path):
+    return set(json.loads(path.read_text())["nodes"]) if path.exists() else set()
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_mutations_do_not_write_synchronously(path):
+    g = ConversationGraph(storage_path=path, autosave=True)
+    g._autosaver.idle_seconds = g._autosaver.max_delay = 60
+    g.new("A")
+    assert not path.exists()
+    assert g._autosaver.pending == 1
+    g.close()
+
+
+def test_writes_after_idle_interval(path):
+    g = ConversationGraph(storage_path=path, autosave=True)
+    g._autosaver.idle_seconds = 0.05
+    a = g.new("A")
+    assert _wait_for(lambda: a in _saved_ids(path))
+    assert g._autosaver.pending == 0
+    g.close()
+
+
+def test_writes_after_max_ops(path):
+    g = ConversationGraph(storage_path=path, autosave=True)
+    g._autosaver.idle_seconds = g._autosaver.max_delay = 60
+    g._autosaver.max_ops = 3
+    ids = [g.new(f"Node {i}") for i in range(3)]
+    assert _wait_for(lambda: set(ids) <= _saved_ids(path))
+    g.close()
+
+
+def test_close_flushes_pending_changes(path):
+    g = ConversationGraph(storage_path=path, autosave=True)
+    g._autosaver.idle_seconds = g._autosaver.max_delay = 60
+    root = g.new("Root")
+    child = g.reply(root, "Child")
+    g.close()
+
+    g2 = ConversationGraph(storage_path=path)
+    assert g2.data[root]["children"] == [child]
+
+
+def test_rollback_keeps_changes_awaiting_autosave(tmp_path):
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path, journal=True, autosave=True)
+    g._autosaver.idle_seconds = g._autosaver.max_delay = 60
+    a = g.new("A")
+    with pytest.raises(RuntimeError):
+        with g.batch():
+            g.new("Discarded")
+            raise RuntimeError("boom")
+    g.close()
+
+    g2 = ConversationGraph(storage_path=path, journal=True)
+    assert list(g2.data) == [a]
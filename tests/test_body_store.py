@@ -0,0 +1,115 @@
+import json
+
+import pytest
+from chatcli.core.body_store import BodyStore, LazyNode
+from chatcli.core.graph import ConversationGraph
+
+
+def _lazy_graph(path):
+    g = ConversationGraph(storage_path=path)
+    g._config["storage"] = {"lazy_bodies": True}
+    return g
+
+
+def test_graph_file_keeps_only_skeleton(tmp_path):
+    path = tmp_path / "graph.json"
+    g = _lazy_graph(path)
+    root = g.new("Root")
+    g.edit_response(root, "A very long document body")
+
+    payload = json.loads(path.read_text())
+    node = payload["nodes"][root]
+    assert "response" not in node
+    assert node["body_keys"] == ["response"]
+    assert (tmp_path / payload["bodies"]).exists()
+
+
+def test_bodies_load_on_first_access(tmp_path):
+    path = tmp_path / "graph.json"
+    g = _lazy_graph(path)
+    root = g.new("Root")
+    child = g.reply(root, "Child")
+    g.edit_response(child, "Body text")
+
+    g2 = _lazy_graph(path)
+    node = g2.data[child]
+    assert isinstance(node, LazyNode)
+    assert not dict.__contains__(node, "response")
+    assert len(g2._body_store._cache) == 0
+    assert g2.get_children(root) == [child]
+    assert len(g2._body_store._cache) == 0  # navigation does not touch bodies
+
+    assert node["response"] == "Body text"
+    assert "embedding" in node and len(node["embedding"]) == 768
+    assert len(g2._body_store._cache) == 1
+
+
+def test_edits_after_lazy_load_persist(tmp_path):
+    path = tmp_path / "graph.json"
+    g = _lazy_graph(path)
+    a = g.new("A")
+    g.edit_response(a, "Old")
+
+    g2 = _lazy_graph(path)
+    g2.edit_response(a, "New")
+    assert not dict.__contains__(g2.data[a], "response")  # written out and unloaded on save
+
+    g3 = _lazy_graph(path)
+    assert g3.data[a]["response"] == "New"
+
+
+def test_body_cache_is_bounded(tmp_path):
+    path = tmp_path / "graph.json"
+    g = _lazy_graph(path)
+    ids = [g.new(f"Node {i}") for i in range(5)]
+    with g.batch():
+        for node_id in ids:
+            g.edit_response(node_id, f"Body {node_id}")
+
+    g2 = _lazy_graph(path)
+    g2._body_store._cache_size = 2
+    assert [g2.data[i]["response"] for i in ids] == [f"Body {i}" for i in ids]
+    assert len(g2._body_store._cache) == 2
+
+
+def test_body_store_compacts_into_new_generation(tmp_path, monkeypatch):
+    monkeypatch.setattr("chatcli.core.body_store._COMPACT_MIN_BYTES", 0)
+    store = BodyStore()
+    nodes = {"a": {"id": "a", "response": "x" * 100}}
+    refs = store.write(tmp_path, "graph", nodes)
+    first = store.path
+    store.commit()
+
+    nodes["a"] = LazyNode({"id": "a"}, store, *refs["a"])
+    nodes["a"]["response"] = "y" * 100
+    store.write(tmp_path, "graph", nodes)
+    nodes["a"]["response"] = "z" * 100
+    store.write(tmp_path, "graph", nodes)  # dead records now outweigh live ones
+    store.commit()
+
+    assert store.path != first and not first.exists()
+    assert nodes["a"]["response"] == "z" * 100
+    assert store.path.stat().st_size == len(json.dumps({"response": "z" * 100}))
+
+
+def test_lazy_node_inequality_includes_lazy_fields(tmp_path):
+    store = BodyStore()
+    refs = store.write(tmp_path, "graph", {"a": {"id": "a", "response": "Body"}})
+    node = LazyNode({"id": "a"}, store, *refs["a"])
+    assert node == {"id": "a", "response": "Body"}
+    assert not node != {"id": "a", "response": "Body"}
+    assert node != {"id": "a"}
+
+
+def test_new_node_bodies_leave_memory_on_save(tmp_path):
+    path = tmp_path / "graph.json"
+    g = _lazy_graph(path)
+    g._body_store._cache_size = 2
+    ids = [g.new(f"Node {i}") for i in range(5)]
+    for node_id in ids:
+        g.edit_response(node_id, f"Body {node_id}")
+
+    assert all(isinstance(g.data[i], LazyNode) for i in ids)
+    assert not any(dict.__contains__(g.data[i], "response") for i in ids)
+    assert [g.data[i]["response"] for i in ids] == [f"Body {i}" for i in ids]
+    assert len(g._body_store._cache) == 2
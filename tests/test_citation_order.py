@@ -0,0 +1,73 @@
+import random
+
+import pytest
+from chatcli.core.citation_order import CitationOrder
+
+
+def _order(edges):
+    citations, cited_by = {}, {}
+    order = CitationOrder(lambda n: citations.get(n, []), lambda n: cited_by.get(n, []))
+
+    def add(citing, cited):
+        ok = order.add(citing, cited)
+        if ok:
+            citations.setdefault(citing, []).append(cited)
+            cited_by.setdefault(cited, []).append(citing)
+        return ok
+
+    return order, add, citations
+
+
+def _reaches(citations, start, target):
+    stack, seen = [start], set()
+    while stack:
+        node = stack.pop()
+        if node == target:
+            return True
+        if node not in seen:
+            seen.add(node)
+            stack.extend(citations.get(node, []))
+    return False
+
+
+def test_random_insertions_match_dfs():
+    rng = random.Random(0)
+    order, add, citations = _order([])
+    for _ in range(2000):
+        a, b = rng.randrange(60), rng.randrange(60)
+        expected_cycle = a == b or _reaches(citations, b, a)
+        assert order.would_cycle(a, b) == expected_cycle
+        assert add(a, b) == (not expected_cycle)
+    for citing, cited_list in citations.items():
+        for cited in cited_list:
+            assert order.label(cited) < order.label(citing)
+
+
+def test_long_chain_inserted_backwards_has_no_recursion_limit():
+    order, add, _ = _order([])
+    n = 1000
+    for i in range(n):
+        order._label(i)
+    for i in range(n - 1, 0, -1):
+        assert add(i - 1, i)  # every insertion contradicts the initial labels
+    assert order.would_cycle(n - 1, 0)
+    assert not order.would_cycle(0, n - 1)
+
+
+def test_build_labels_existing_dag():
+    citations = {"c": ["b"], "b": ["a"]}
+    cited_by = {"a": ["b"], "b": ["c"]}
+    order = CitationOrder.build(["c", "b", "a"], lambda n: citations.get(n, []), lambda n: cited_by.get(n, []))
+    assert order.label("a") < order.label("b") < order.label("c")
+    assert order.would_cycle("a", "c")
+
+
+def test_graph_rejects_cycles_on_deep_chain(graph):
+    ids = [graph.new(f"N{i}") for i in range(1500)]
+    with graph.batch():
+        for prev, node in zip(ids, ids[1:]):
+            graph.add_citation(node, prev)
+    with pytest.raises(ValueError, match="cycle"):
+        graph.add_citation(ids[0], ids[-1])
+    with pytest.raises(ValueError, match="cycle"):
+        graph.add_citation(ids[0], ids[0])
@@ -0,0 +1,81 @@
+import pytest
+from chatcli.core.edge_index import ReverseEdgeIndex
+from chatcli.core.graph import ConversationGraph
+
+
+def _scan_parents(graph, node_id):
+    return [n["id"] for n in graph.data.values() if node_id in n.get("children", [])]
+
+
+def _scan_cited_by(graph, node_id):
+    return [n["id"] for n in graph.data.values() if node_id in n.get("citations", [])]
+
+
+def test_index_tracks_mutations(graph):
+    a = graph.new("A")
+    assert graph.get_parents(a) == []  # builds the index
+    b = graph.reply(a, "B")
+    c = graph.reply(b, "C")
+    graph.add_citation(b, a)
+    graph.add_citation(c, a)
+    doc = graph.improve_doc(c)
+    web = graph.save_web_result({"title": "T", "snippet": "S", "url": "u"}, a)
+    graph.update_last_smart_ask(a, "Q?", "Answer", [b])
+    promoted = graph.promote_smart_ask(a)
+
+    for node_id in (a, b, c, doc, web, promoted):
+        assert graph.get_parents(node_id) == _scan_parents(graph, node_id)
+        assert graph.get_cited_by(node_id) == _scan_cited_by(graph, node_id)
+    assert graph.get_cited_by(a) == [b, c]
+    assert graph.get_parents(doc) == [c]
+
+
+class _NoScanDict(dict):
+    def values(self):
+        raise AssertionError("lookup scanned every node")
+
+
+def test_lookups_do_not_scan_nodes(graph, monkeypatch):
+    builds = []
+    original = ReverseEdgeIndex.build.__func__
+    monkeypatch.setattr(ReverseEdgeIndex, "build", classmethod(lambda cls, data: (builds.append(1), original(cls, data))[1]))
+    graph._data = _NoScanDict()
+    a = graph.new("A")
+    b = graph.reply(a, "B")
+    graph.add_citation(b, a)
+    for _ in range(3):
+        assert graph.get_parents(b) == [a]
+        assert graph.get_cited_by(a) == [b]
+        assert graph.filter_related(b) == [a]
+    assert len(builds) == 1
+
+
+def test_index_rebuilt_after_load_and_rollback(tmp_path):
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path)
+    a = g.new("A")
+    b = g.reply(a, "B")
+    g.add_citation(b, a)
+
+    g2 = ConversationGraph(storage_path=path)
+    assert g2.get_parents(b) == [a]
+    assert g2.get_cited_by(a) == [b]
+
+    with pytest.raises(RuntimeError):
+        with g2.batch():
+            c = g2.reply(a, "C")
+            g2.add_citation(c, a)
+            raise RuntimeError("boom")
+    assert g2.get_cited_by(a) == [b]
+    assert g2.get_parents(c) == []
+
+
+def test_build_from_dict():
+    data = {
+        "a": {"id": "a", "children": ["b"]},
+        "b": {"id": "b", "children": [], "citations": ["a"]},
+    }
+    index = ReverseEdgeIndex.build(data)
+    assert index.parents("b") == ["a"]
+    assert index.cited_by("a") == ["b"]
+    assert index.parents("a") == []
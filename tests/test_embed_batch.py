@@ -0,0 +1,87 @@
+import pytest
+from chatcli.core.embedding_provider import EmbeddingProvider
+
+
+class CountingProvider(EmbeddingProvider):
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, text):
+        self.calls.append(1)
+        return [float(len(text)), 1.0]
+
+    def embed_batch(self, texts, batch_size=32):
+        self.calls.append(len(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+@pytest.fixture
+def provider(graph):
+    provider = CountingProvider()
+    graph._embedding_provider = provider
+    graph._vector_index.clear()
+    return provider
+
+
+def test_default_embed_batch_loops_over_embed():
+    class Single(EmbeddingProvider):
+        def embed(self, text):
+            return [float(len(text))]
+
+    assert Single().embed_batch(["a", "bcd"]) == [[1.0], [3.0]]
+
+
+def test_batch_exit_embeds_in_provider_batches(graph, provider):
+    graph._config["embedding"] = {"provider": "mock", "batch_size": 4}
+    with graph.batch():
+        root = graph.new("Root")
+        for i in range(9):
+            graph.reply(root, f"Child {i}")
+    assert provider.calls == [4, 4, 2]
+    assert len(graph._vector_index) == 10
+    assert all("embedding" in node for node in graph.data.values())
+
+
+def test_embed_all_only_embeds_missing_nodes(graph, provider):
+    graph._config["auto_embed"] = False
+    a, b, c = graph.new("A"), graph.new("B"), graph.new("C")
+    graph.embed_node(a)
+    provider.calls.clear()
+
+    assert graph.embed_all() == 2
+    assert provider.calls == [2]
+    assert graph.embed_all() == 0
+    assert provider.calls == [2]
+
+
+def test_reembed_all_recomputes_every_node(graph, provider):
+    nodes = [graph.new(f"N{i}") for i in range(3)]
+    provider.calls.clear()
+    # A different model misses the embedding cache, so every node is recomputed.
+    graph._config["embedding"] = {"provider": "mock", "model": "other"}
+    assert graph.reembed_all() == 3
+    assert provider.calls == [3]
+    assert {nid for nid, _ in graph.simsearch("x", top_k=5, min_score=-1)} == set(nodes)
+
+
+def test_embed_nodes_dry_run_computes_nothing(graph, provider, capsys):
+    graph._config["auto_embed"] = False
+    nid = graph.new("Dry")
+    assert graph.embed_nodes([nid], dry_run=True) == 1
+    assert provider.calls == []
+    assert "embedding" not in graph.data[nid]
+    assert "Would embed 1 nodes" in capsys.readouterr().out
+
+
+def test_embed_nodes_rejects_unknown_ids(graph, provider):
+    with pytest.raises(ValueError):
+        graph.embed_nodes(["missing"])
+    assert provider.calls == []
+
+
+def test_embedded_vectors_are_normalized(graph, provider):
+    graph._config["auto_embed"] = False
+    nid = graph.new("Unit")
+    graph.embed_nodes([nid])
+    vector = graph.data[nid]["embedding"]
+    assert sum(x * x for x in vector) == pytest.approx(1.0)
@@ -0,0 +1,138 @@
+from unittest.mock import patch
+
+import pytest
+from chatcli.core.embedding_provider import EmbeddingProvider
+from chatcli.core.graph import ConversationGraph
+from chatcli.core.graph_llm import embedding_is_current
+
+
+class CountingProvider(EmbeddingProvider):
+    def __init__(self):
+        self.texts = []
+
+    def embed(self, text):
+        self.texts.append(text)
+        return [float(len(text)), 1.0]
+
+
+def _lazy(graph):
+    provider = CountingProvider()
+    graph._embedding_provider = provider
+    graph._config["embedding"] = {"provider": "mock", "lazy": True}
+    graph._vector_index.clear()
+    return provider
+
+
+def test_lazy_mutations_do_not_embed(graph):
+    provider = _lazy(graph)
+    root = graph.new("Root")
+    child = graph.reply(root, "Child")
+    assert provider.texts == []
+    assert list(graph._stale_embeddings) == [root, child]
+    assert "embedding" not in graph.data[root]
+
+
+def test_search_drains_pending_first(graph):
+    provider = _lazy(graph)
+    nid = graph.new("Root")
+    results = graph.simsearch("query", top_k=3, min_score=-1)
+    assert [r[0] for r in results] == [nid]
+    assert graph._stale_embeddings == {}
+    assert embedding_is_current(graph.data[nid])
+
+    graph.edit_response(nid, "A much longer response than before")
+    assert nid in graph._stale_embeddings
+    old = list(graph.data[nid]["embedding"])
+    graph.simsearch("query", top_k=3, min_score=-1)
+    assert graph.data[nid]["embedding"] != pytest.approx(old)
+
+
+def test_embed_pending_counts_and_empties_queue(graph):
+    _lazy(graph)
+    for i in range(3):
+        graph.new(f"N{i}")
+    assert graph.embed_pending(dry_run=True) == 3
+    assert len(graph._stale_embeddings) == 3
+    assert graph.embed_pending() == 3
+    assert graph.embed_pending() == 0
+
+
+def test_only_text_changes_make_embeddings_stale(graph):
+    provider = _lazy(graph)
+    a, b = graph.new("A"), graph.new("B")
+    graph.embed_pending()
+    provider.texts.clear()
+
+    graph.add_citation(a, b)
+    graph.add_comment(a, "note")
+    graph.tag_node(a, "x")
+    assert graph._stale_embeddings == {}
+
+    graph.retry(b, "B, rephrased")
+    assert list(graph._stale_embeddings) == [b]
+    assert graph.embed_pending() == 1
+
+
+def test_eager_mode_embeds_once_per_batch(graph):
+    provider = CountingProvider()
+    graph._embedding_provider = provider
+    graph._vector_index.clear()
+    with graph.batch():
+        nid = graph.new("Eager")
+        graph.edit_response(nid, "Edited")
+        assert provider.texts == []
+    assert provider.texts == ["Eager\nEdited"]
+    assert graph._stale_embeddings == {}
+
+
+def test_embedding_version_survives_reload(tmp_path):
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path, journal=True)
+    nid = g.new("Persisted")
+    assert embedding_is_current(g.data[nid])
+    g.close()
+
+    reopened = ConversationGraph(storage_path=path, journal=True)
+    assert embedding_is_current(reopened.data[nid])
+    reopened._config["embedding"] = {"provider": "mock", "lazy": True}
+    reopened.add_comment(nid, "unchanged text")
+    assert reopened._stale_embeddings == {}
+    reopened.close()
+
+
+def test_queue_left_at_exit_is_embedded_after_reopen(tmp_path):
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path)
+    _lazy(g)
+    nid = g.new("Giraffe")
+    g.embed_pending()
+    g.edit_response(nid, "An elephant, not a giraffe")
+    fresh = g.new("Never embedded")
+    assert not embedding_is_current(g.data[nid])
+    g.close()
+
+    reopened = ConversationGraph(storage_path=path)
+    provider = _lazy(reopened)
+    reopened.rebuild_vector_index()
+    assert not embedding_is_current(reopened.data[nid])
+    results = reopened.simsearch("query", top_k=3, min_score=-1)
+    assert {r[0] for r in results} == {nid, fresh}
+    assert embedding_is_current(reopened.data[nid])
+    assert sorted(provider.texts[:-1]) == sorted(["Never embedded\n[MOCK RESPONSE to: Never embedded]",
+                                             "Giraffe\nAn elephant, not a giraffe"])
+    assert provider.texts[-1] == "query"
+    assert reopened.embed_pending() == 0
+    reopened.close()
+
+
+def test_shell_embed_pending(capsys):
+    from chatcli.shell import ChatCLIShell
+    with patch("chatcli.shell.PromptSession"):
+        shell = ChatCLIShell()
+    _lazy(shell.graph)
+    shell.onecmd("new Pending node")
+    capsys.readouterr()
+    shell.onecmd("embed_pending")
+    assert "Embedded 1 nodes" in capsys.readouterr().out
+    shell.onecmd("embed_pending")
+    assert "No pending embeddings" in capsys.readouterr().out
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from chatcli.core.embedding_cache import EmbeddingCache, cache_key
+from chatcli.core.embedding_provider import EmbeddingProvider
+from chatcli.core.graph import ConversationGraph
+
+
+class CountingProvider(EmbeddingProvider):
+    def __init__(self):
+        self.texts = []
+
+    def embed(self, text):
+        self.texts.append(text)
+        return [float(len(text)), 1.0]
+
+
+def test_key_depends_on_namespace_and_text():
+    assert cache_key("mock:", "hello") == cache_key("mock:", "hello")
+    assert cache_key("mock:", "hello") != cache_key("mock:", "hello!")
+    assert cache_key("mock:", "hello") != cache_key("sentence-transformers:all-MiniLM-L6-v2", "hello")
+
+
+def test_cache_persists_across_reopen(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.db")
+    cache.put("k", [0.6, 0.8])
+    cache.close()
+
+    reopened = EmbeddingCache(tmp_path / "cache.db")
+    assert reopened.get("k").tolist() == pytest.approx([0.6, 0.8])
+    assert reopened.get("missing") is None
+    assert reopened.get("k").dtype == np.float32
+
+
+def test_cache_evicts_least_recently_used():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    cache.get("a")
+    cache.put("c", [3.0])
+    assert len(cache) == 2
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+
+
+def test_unchanged_text_is_not_reembedded(graph):
+    provider = CountingProvider()
+    graph._embedding_provider = provider
+    graph._vector_index.clear()
+    nid = graph.new("Same text")
+    first = graph.data[nid]["embedding"]
+    provider.texts.clear()
+
+    graph.embed_node(nid)
+    graph.embed_nodes([nid])
+    assert provider.texts == []
+    assert graph.data[nid]["embedding"] == pytest.approx(first)
+
+    graph.data[nid]["response"] = "changed"
+    graph.embed_node(nid)
+    assert len(provider.texts) == 1
+
+
+def test_model_switch_misses_cache(graph):
+    provider = CountingProvider()
+    graph._embedding_provider = provider
+    graph.get_embedding("query")
+    graph._config["embedding"] = {"provider": "mock", "model": "other"}
+    graph.get_embedding("query")
+    assert provider.texts == ["query", "query"]
+
+
+def test_cache_can_be_disabled(graph):
+    provider = CountingProvider()
+    graph._embedding_provider = provider
+    graph._config["embedding"] = {"provider": "mock", "cache": False}
+    graph.get_embedding("query")
+    graph.get_embedding("query")
+    assert provider.texts == ["query", "query"]
+    assert graph._embedding_cache is None
+
+
+def test_reimport_hits_shared_cache(tmp_path):
+    g1 = ConversationGraph(storage_path=tmp_path / "a.json")
+    root = g1.new("Root")
+    for i in range(5):
+        g1.reply(root, f"Child {i}")
+    g1.export_to_file("export.json")
+    g1.close()
+
+    g2 = ConversationGraph(storage_path=tmp_path / "b.json")
+    provider = CountingProvider()
+    g2._embedding_provider = provider
+    g2.import_from_file("export.json")
+    assert len(g2.data) == 6
+    assert provider.texts == []
+    assert (tmp_path / "embedding_cache.db").exists()
+    g2.close()
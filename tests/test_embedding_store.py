@@ -0,0 +1,149 @@
+import json
+
+import numpy as np
+import pytest
+from chatcli.core.embedding_store import EmbeddingStore
+from chatcli.core.graph import ConversationGraph
+
+
+def test_store_writes_only_changed_rows(tmp_path):
+    store = EmbeddingStore(tmp_path / "g.emb.npy")
+    assert store.put("a", [1.0, 2.0]) == 0
+    assert store.put("b", [3.0, 4.0]) == 1
+    store.flush()
+
+    # Unchanged nodes keep their row and queue nothing.
+    assert store.put("a", [1.0, 2.0]) == 0
+    assert store._pending == {}
+
+    store.mark_dirty("b")
+    assert store.put("b", [5.0, 6.0]) == 1
+    assert list(store._pending) == [1]
+    store.flush()
+
+    reopened = EmbeddingStore(tmp_path / "g.emb.npy", readonly=True)
+    assert isinstance(reopened.get(1), np.memmap)
+    assert reopened.get(1).tolist() == [5.0, 6.0]
+
+
+def test_store_switches_to_a_new_width(tmp_path):
+    store = EmbeddingStore(tmp_path / "g.emb.npy")
+    store.put("a", [1.0, 2.0])
+    store.put("b", [3.0, 4.0])
+    store.flush()
+    # A leftover vector of another width is not stored...
+    assert store.put("c", [1.0, 2.0, 3.0]) is None
+
+    # ...but a re-embedded one switches the store and rebuilds the file.
+    assert store.mark_dirty("b", 3)
+    assert store.put("a", [1.0, 2.0]) is None
+    assert store.put("b", [5.0, 6.0, 7.0]) == 0
+    store.flush()
+    reopened = EmbeddingStore(tmp_path / "g.emb.npy", readonly=True)
+    assert reopened.dim == 3
+    assert reopened.get(0).tolist() == [5.0, 6.0, 7.0]
+
+
+@pytest.mark.parametrize("journal", [False, True])
+def test_graph_survives_embedding_model_switch(tmp_path, monkeypatch, journal):
+    import numpy as np
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path, journal=journal)
+    g._config["embedding"] = {"provider": "mock", "cache": False}
+    width = {"dim": 8}
+    monkeypatch.setattr(g, "get_embedding", lambda text: np.ones(width["dim"]).tolist())
+    monkeypatch.setattr(g, "get_embeddings", lambda texts, batch_size=None, quiet=False:
+                        np.ones((len(texts), width["dim"])).tolist())
+    nodes = [g.new(f"N{i}") for i in range(3)]
+
+    width["dim"] = 4
+    g.embed_node(nodes[0])  # partly re-embedded graphs still save
+    assert g.reembed_all() == 3
+    g.close()
+
+    reopened = ConversationGraph(storage_path=path, journal=journal)
+    assert all(len(reopened.data[nid]["embedding"]) == 4 for nid in nodes)
+    assert reopened._vector_index.dim == 4
+    assert len(reopened._vector_index) == 3
+
+
+def test_graph_json_keeps_row_reference_only(tmp_path):
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path)
+    nid = g.new("Embed me")
+    g.embed_node(nid)
+
+    node = json.loads(path.read_text())["nodes"][nid]
+    assert "embedding" not in node
+    assert node["embedding_row"] == 0
+    assert (tmp_path / "graph.emb.npy").exists()
+
+
+def test_graph_reload_maps_embeddings(tmp_path):
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path)
+    nid = g.new("Embed me")
+    g.embed_node(nid)
+    expected = list(g.data[nid]["embedding"])
+
+    g2 = ConversationGraph(storage_path=path)
+    assert isinstance(g2.data[nid]["embedding"], np.memmap)
+    assert g2.data[nid]["embedding"].tolist() == pytest.approx(expected)
+
+
+def test_legacy_inline_embeddings_still_load(tmp_path):
+    path = tmp_path / "graph.json"
+    path.write_text(json.dumps({
+        "nodes": {"abc": {"id": "abc", "prompt": "Old", "response": "", "parent_id": None,
+                          "children": [], "tags": [], "embedding": [0.5] * 4}},
+        "last_smart_ask": None,
+    }))
+    g = ConversationGraph(storage_path=path)
+    assert g.data["abc"]["embedding"] == [0.5] * 4
+
+    g._save()
+    assert "embedding_row" in json.loads(path.read_text())["nodes"]["abc"]
+
+
+def test_old_model_vectors_are_dropped_after_switch(tmp_path, monkeypatch):
+    import numpy as np
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path)
+    g._config["embedding"] = {"provider": "mock", "cache": False}
+    width = {"dim": 8}
+    monkeypatch.setattr(g, "get_embedding", lambda text: np.ones(width["dim"]).tolist())
+    a, b = g.new("A"), g.new("B")
+    width["dim"] = 4
+    g.embed_node(a)
+    g.close()
+
+    reopened = ConversationGraph(storage_path=path)
+    assert len(reopened.data[a]["embedding"]) == 4
+    assert "embedding" not in reopened.data[b]
+    assert reopened._embedded_ids() == {a}
+
+
+def test_lazy_nodes_drop_rows_after_model_switch(tmp_path):
+    path = tmp_path / "graph.json"
+
+    def open_graph(dim):
+        g = ConversationGraph(storage_path=path)
+        g._config["storage"] = {"lazy_bodies": True}
+        g._config["embedding"] = {"provider": "mock", "cache": False}
+        g.get_embedding = lambda text: [float(text[1])] * dim  # N0 -> [0.0, ...], N1 -> [1.0, ...]
+        return g
+
+    g = open_graph(4)
+    nodes = [g.new(f"N{i}") for i in range(3)]
+    g.close()
+
+    g = open_graph(6)
+    g.embed_node(nodes[1])
+    g.embed_node(nodes[2])
+    assert "embedding" not in g.data[nodes[0]]  # its old row now holds another node's vector
+    g.close()
+
+    reopened = open_graph(6)
+    assert "embedding" not in reopened.data[nodes[0]]
+    assert list(reopened.data[nodes[1]]["embedding"]) == [1.0] * 6
+    assert list(reopened.data[nodes[2]]["embedding"]) == [2.0] * 6
@@ -0,0 +1,137 @@
+import threading
+import time
+
+import pytest
+from chatcli.core.embedding_provider import EmbeddingProvider
+from chatcli.core.graph import ConversationGraph
+from chatcli.core.graph_llm import embedding_is_current
+
+
+class GatedProvider(EmbeddingProvider):
+    """Batch calls block until `gate` is set, like a slow model."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.batches = []
+
+    def embed(self, text):
+        return [float(len(text)), 1.0]
+
+    def embed_batch(self, texts, batch_size=32):
+        self.gate.wait(5)
+        self.batches.append(len(texts))
+        return [self.embed(text) for text in texts]
+
+
+@pytest.fixture
+def background(graph):
+    provider = GatedProvider()
+    graph._embedding_provider = provider
+    graph._config["embedding"] = {"provider": "mock", "background": True, "background_linger": 0.01,
+                                  "cache": False}
+    graph._vector_index.clear()
+    yield provider
+    provider.gate.set()
+    graph.close()
+
+
+def test_new_returns_before_embedding(graph, background):
+    start = time.monotonic()
+    nid = graph.new("Quick")
+    assert time.monotonic() - start < 1
+    assert "embedding" not in graph.data[nid]
+
+    background.gate.set()
+    assert graph.wait_for_embeddings(timeout=5)
+    assert embedding_is_current(graph.data[nid])
+    assert len(graph._vector_index) == 1
+
+
+def test_future_resolves_when_written(graph, background):
+    graph._config["auto_embed"] = False
+    nodes = [graph.new(f"N{i}") for i in range(10)]
+    future = graph.embed_async(nodes)
+    assert not future.done()
+    background.gate.set()
+    future.result(timeout=5)
+    assert all(embedding_is_current(graph.data[nid]) for nid in nodes)
+    # Queued nodes are embedded together, not one provider call each.
+    assert sum(background.batches) == 10 and len(background.batches) < 10
+
+
+def test_simsearch_waits_for_pending_jobs(graph, background):
+    nid = graph.new("Searchable")
+    threading.Timer(0.1, background.gate.set).start()
+    assert [r[0] for r in graph.simsearch("query", top_k=3, min_score=-1)] == [nid]
+
+
+def test_edit_during_embedding_is_not_overwritten(graph, background):
+    nid = graph.new("First")
+    time.sleep(0.05)  # let the worker pick up the first job
+    graph.edit_response(nid, "Second, longer text")
+    background.gate.set()
+    assert graph.wait_for_embeddings(timeout=5)
+    assert embedding_is_current(graph.data[nid])
+
+
+def test_wait_while_holding_lock_embeds_inline(graph, background):
+    with graph._lock:
+        nid = graph.new("Pending")
+        time.sleep(0.05)  # the worker takes the job, then blocks on the lock
+        background.gate.set()
+        with graph.batch():
+            assert graph.wait_for_embeddings(timeout=5)
+        assert embedding_is_current(graph.data[nid])
+        vector = list(graph.data[nid]["embedding"])
+    assert graph.wait_for_embeddings(timeout=5)
+    assert graph.data[nid]["embedding"] == pytest.approx(vector)
+
+
+def test_graph_lock_knows_its_owner(graph):
+    seen = []
+    with graph._lock:
+        with graph._lock:
+            assert graph._lock.held()
+        assert graph._lock.held()  # still held after the inner release
+        thread = threading.Thread(target=lambda: seen.append(graph._lock.held()))
+        thread.start()
+        thread.join()
+    assert seen == [False]
+    assert not graph._lock.held()
+
+
+def test_shell_commands_do_not_deadlock(background, capsys):
+    from unittest.mock import patch
+    from chatcli.shell import ChatCLIShell
+    with patch("chatcli.shell.PromptSession"):
+        shell = ChatCLIShell()
+    shell.graph._embedding_provider = background
+    shell.graph._config["embedding"] = {"provider": "mock", "background": True, "background_linger": 0.5,
+                                        "cache": False}
+    background.gate.set()
+
+    def run():
+        shell.onecmd("new Background node")
+        shell.onecmd("simsearch Background")
+        shell.onecmd("embed_pending")
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert shell.current_id in capsys.readouterr().out
+    assert embedding_is_current(shell.graph.data[shell.current_id])
+    shell.graph.close()
+
+
+def test_close_finishes_queued_jobs(tmp_path):
+    g = ConversationGraph(storage_path=tmp_path / "graph.json")
+    provider = GatedProvider()
+    provider.gate.set()
+    g._embedding_provider = provider
+    g._config["embedding"] = {"provider": "mock", "background": True}
+    nodes = [g.new(f"N{i}") for i in range(5)]
+    g.close()
+
+    reopened = ConversationGraph(storage_path=tmp_path / "graph.json")
+    assert all(embedding_is_current(reopened.data[nid]) for nid in nodes)
@@ -0,0 +1,104 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from chatcli.core.vector_index import VectorIndex, normalize
+
+
+def _brute(vectors, query, ids, top_k):
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    ranked = sorted(ids, key=lambda i: -float(unit[i] @ query))
+    return ranked[:top_k]
+
+
+@pytest.fixture
+def random_index():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(10_000, 8)).astype(np.float32)
+    index = VectorIndex()
+    index._reset(8)
+    index._index.add_with_ids(normalize(vectors), np.arange(10_000, dtype=np.int64))
+    index._labels = {f"n{i}": i for i in range(10_000)}
+    index._node_ids = {i: f"n{i}" for i in range(10_000)}
+    index._next_label = 10_000
+    return index, vectors, rng
+
+
+@pytest.mark.parametrize("size", [50, 3000, 9000])
+def test_every_plan_matches_brute_force(random_index, size):
+    index, vectors, rng = random_index
+    query = rng.random(8, dtype=np.float32)
+    subset = rng.choice(10_000, size=size, replace=False)
+    got = [nid for nid, _ in index.search(query, top_k=10, ids={f"n{i}" for i in subset})]
+    assert got == [f"n{i}" for i in _brute(vectors, query, subset, 10)]
+
+
+def test_accept_predicate_post_filters(random_index):
+    index, vectors, rng = random_index
+    query = rng.random(8, dtype=np.float32)
+    odd = [i for i in range(10_000) if i % 97 == 1]  # rare: forces k to widen
+    got = [nid for nid, _ in index.search(query, top_k=5, accept=lambda nid: int(nid[1:]) % 97 == 1)]
+    assert got == [f"n{i}" for i in _brute(vectors, query, odd, 5)]
+
+
+class _NoSearch:
+    def __init__(self, inner):
+        self._inner = inner
+
+    def __getattr__(self, name):
+        if name == "search":
+            raise AssertionError("small scopes should not search the whole index")
+        return getattr(self._inner, name)
+
+
+def test_small_scope_skips_full_index_search(random_index):
+    index, vectors, rng = random_index
+    index._index = _NoSearch(index._index)
+    assert len(index.search(rng.random(8, dtype=np.float32), top_k=3, ids={"n1", "n2", "n3", "n4"})) == 3
+
+
+def _scoped_graph(graph, monkeypatch):
+    a = graph.new("Thread A")
+    a1 = graph.reply(a, "A1")
+    b = graph.new("Thread B")
+    doc = graph.improve_doc(a1)
+    graph.tag_node(b, "keep")
+    vectors = {a: [1.0, 0.0], b: [1.0, 0.2], a1: [1.0, 1.0], doc: [0.0, 1.0]}
+    graph._vector_index.clear()
+    for nid, vec in vectors.items():
+        graph._vector_index.add(nid, vec)
+    monkeypatch.setattr(graph, "get_embedding", lambda text: [1.0, 0.0])
+    return a, a1, b, doc
+
+
+def test_simsearch_filters(graph, monkeypatch):
+    a, a1, b, doc = _scoped_graph(graph, monkeypatch)
+    ids = lambda results: [nid for nid, _ in results]
+    assert ids(graph.simsearch("q", top_k=4)) == [a, b, a1, doc]
+    assert ids(graph.simsearch("q", top_k=4, subtree=a1)) == [a1, doc]
+    assert ids(graph.simsearch("q", top_k=4, subtree=a, exclude=[a])) == [a1, doc]
+    assert ids(graph.simsearch("q", top_k=4, node_type="doc")) == [doc]
+    assert ids(graph.simsearch("q", top_k=4, tags=["keep"], subtree=a)) == []
+    with pytest.raises(ValueError):
+        graph.simsearch("q", subtree="missing")
+
+
+def test_smart_ask_scoped_to_thread(graph, monkeypatch):
+    a, a1, b, doc = _scoped_graph(graph, monkeypatch)
+    graph.smart_ask("q", from_node_id=a1, top_k=4, mode="vector", subtree=a, exclude=[doc])
+    assert graph._last_smart_ask["citations"] == [a, a1]
+
+
+def test_shell_simsearch_flags(monkeypatch, capsys):
+    from chatcli.shell import ChatCLIShell
+    with patch("chatcli.shell.PromptSession"):
+        shell = ChatCLIShell()
+    a, a1, b, doc = _scoped_graph(shell.graph, monkeypatch)
+    shell.current_id = a1
+    capsys.readouterr()
+    shell.onecmd(f"simsearch q --here --exclude {doc}")
+    out = capsys.readouterr().out
+    assert a1 in out and doc not in out and b not in out
+    shell.onecmd("simsearch q --type doc")
+    out = capsys.readouterr().out
+    assert doc in out and a not in out
@@ -0,0 +1,107 @@
+import pytest
+from chatcli.core.graph import ConversationGraph
+
+
+@pytest.fixture
+def file_graph(tmp_path):
+    return ConversationGraph(storage_path=tmp_path / "graph.json")
+
+
+def _count_saves(graph, monkeypatch):
+    calls = []
+    original = graph.save_to_file
+    monkeypatch.setattr(graph, "save_to_file", lambda filename: (calls.append(filename), original(filename)))
+    return calls
+
+
+def _count_embeds(graph, monkeypatch):
+    calls = []
+    original = graph._store_embedding
+    monkeypatch.setattr(graph, "_store_embedding", lambda node_id, vector, version=None: (calls.append(node_id), original(node_id, vector, version)))
+    return calls
+
+
+def test_batch_saves_once(file_graph, monkeypatch):
+    saves = _count_saves(file_graph, monkeypatch)
+    with file_graph.batch():
+        root = file_graph.new("Root")
+        for i in range(5):
+            file_graph.reply(root, f"Child {i}")
+        assert saves == []
+    assert len(saves) == 1
+
+
+def test_reply_saves_once(file_graph, monkeypatch):
+    root = file_graph.new("Root")
+    saves = _count_saves(file_graph, monkeypatch)
+    file_graph.reply(root, "Child")
+    assert len(saves) == 1
+
+
+def test_batch_deduplicates_auto_embeds(file_graph, monkeypatch):
+    a = file_graph.new("A")
+    b = file_graph.new("B")
+    c = file_graph.new("C")
+    embeds = _count_embeds(file_graph, monkeypatch)
+    with file_graph.batch():
+        file_graph.add_citation(a, b)
+        file_graph.add_citation(a, c)
+        file_graph.edit_response(a, "Updated")
+    assert embeds == [a]
+
+
+def test_import_from_file_writes_once(tmp_path, monkeypatch):
+    src = ConversationGraph(storage_path=tmp_path / "src.json")
+    with src.batch():
+        for i in range(20):
+            src.new(f"Node {i}")
+    src.export_to_file("export.json")
+
+    g = ConversationGraph(storage_path=tmp_path / "graph.json")
+    saves = _count_saves(g, monkeypatch)
+    embeds = _count_embeds(g, monkeypatch)
+    g.import_from_file("export.json")
+    assert len(saves) == 1
+    # Exported embeddings carry their content version, so none is recomputed.
+    assert embeds == []
+    assert len(g._vector_index) == 20
+
+
+def test_promote_smart_ask_embeds_once(graph, monkeypatch):
+    parent = graph.new("Parent")
+    refs = [graph.new(f"Ref {i}") for i in range(3)]
+    graph.update_last_smart_ask(parent, "Question?", "Answer", refs)
+    embeds = _count_embeds(graph, monkeypatch)
+
+    new_id = graph.promote_smart_ask(parent)
+    assert embeds == [new_id]
+    assert graph.data[new_id]["citations"] == refs
+
+
+def test_batch_rolls_back_on_error(file_graph, monkeypatch):
+    root = file_graph.new("Root")
+    file_graph.edit_response(root, "Original")
+    saves = _count_saves(file_graph, monkeypatch)
+
+    with pytest.raises(RuntimeError):
+        with file_graph.batch():
+            child = file_graph.reply(root, "Child")
+            file_graph.edit_response(root, "Changed")
+            file_graph.tag_node(root, "temp")
+            raise RuntimeError("boom")
+
+    assert child not in file_graph.data
+    assert file_graph.data[root]["children"] == []
+    assert file_graph.data[root]["response"] == "Original"
+    assert file_graph.data[root]["tags"] == []
+    assert child not in file_graph._vector_index
+    assert saves == []
+
+
+def test_nested_batches_join_outer(file_graph, monkeypatch):
+    saves = _count_saves(file_graph, monkeypatch)
+    with file_graph.batch():
+        with file_graph.batch():
+            file_graph.new("Inner")
+        assert saves == []
+    assert len(saves) == 1
@@ -0,0 +1,110 @@
+import json
+
+from chatcli.core.graph import ConversationGraph
+
+
+def _build(g):
+    root = g.new("Root")
+    child = g.reply(root, "Child")
+    g.edit_response(child, "Edited")
+    g.add_comment(root, "note")
+    g.tag_node(child, "important")
+    g.add_citation(child, root)
+    return root, child
+
+
+def test_journal_appends_instead_of_rewriting(tmp_path):
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path, journal=True)
+    _build(g)
+
+    assert not path.exists()  # no snapshot until compaction
+    lines = (tmp_path / "graph.journal").read_text().splitlines()
+    ops = {json.loads(line)["op"] for line in lines}
+    assert {"add_node", "set", "tag", "add_citation", "embed"} <= ops
+
+
+def test_tags_committed_with_their_node_replay_once(tmp_path):
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path, journal=True)
+    with g.batch():
+        a = g.add_node("alpha")
+        g.tag_node(a, "x")
+    g.tag_node(a, "x")
+    assert g.data[a]["tags"] == ["x"]
+    g.close()
+
+    reopened = ConversationGraph(storage_path=path, journal=True)
+    assert reopened.data[a]["tags"] == ["x"]
+    assert reopened.nodes_with_tag("x") == [a]
+    reopened.close()
+
+
+def test_journal_replay_restores_graph(tmp_path):
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path, journal=True)
+    root, child = _build(g)
+
+    g2 = ConversationGraph(storage_path=path, journal=True)
+    assert g2.data[child]["response"] == "Edited"
+    assert g2.data[root]["comment"] == "note"
+    assert g2.data[child]["tags"] == ["important"]
+    assert g2.data[child]["citations"] == [root]
+    assert g2.data[root]["children"] == [child]
+    assert list(g2.data[child]["embedding"]) == list(g.data[child]["embedding"])
+    assert child in g2._vector_index
+
+
+def test_journal_compacts_past_threshold(tmp_path):
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path, journal=True)
+    g._backend.max_bytes = 1
+    root, child = _build(g)
+
+    assert path.exists()
+    assert (tmp_path / "graph.journal").read_text() == ""
+    assert json.loads(path.read_text())["journal_seq"] == g._backend.seq
+
+    g2 = ConversationGraph(storage_path=path, journal=True)
+    assert g2.data[child]["tags"] == ["important"]
+
+
+def test_journal_records_already_in_snapshot_are_skipped(tmp_path):
+    path = tmp_path / "graph.json"
+    journal_path = tmp_path / "graph.journal"
+    g = ConversationGraph(storage_path=path, journal=True)
+    root, child = _build(g)
+
+    # Simulate a crash after the snapshot was written but before the log was truncated.
+    log = journal_path.read_text()
+    g._snapshot()
+    journal_path.write_text(log)
+
+    g2 = ConversationGraph(storage_path=path, journal=True)
+    assert g2.data[child]["tags"] == ["important"]
+    assert g2.data[root]["children"] == [child]
+
+
+def test_disabling_journal_folds_log_into_snapshot(tmp_path):
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path, journal=True)
+    root, child = _build(g)
+
+    g2 = ConversationGraph(storage_path=path, journal=False)
+    assert not (tmp_path / "graph.journal").exists()
+    assert child in json.loads(path.read_text())["nodes"]
+    assert g2.data[child]["response"] == "Edited"
+
+
+def test_torn_tail_is_cut_before_new_writes(tmp_path):
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path, journal=True)
+    first = g.new("first")
+    with open(tmp_path / "graph.journal", "a") as f:
+        f.write('{"op": "add_node", "node": {"id": "tor')  # crash mid-append
+
+    g2 = ConversationGraph(storage_path=path, journal=True)
+    second = g2.new("second")
+
+    g3 = ConversationGraph(storage_path=path, journal=True)
+    assert [g3.data[nid]["prompt"] for nid in (first, second)] == ["first", "second"]
@@ -0,0 +1,106 @@
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip("msgpack")
+
+from chatcli.core.graph import ConversationGraph
+from chatcli.core.graph_snapshot import MAGIC, convert, is_binary_snapshot, read_snapshot
+
+
+def _build(g):
+    root = g.new("Root")
+    child = g.reply(root, "Child")
+    g.update_last_smart_ask(root, "Question?", "Answer", [child])
+    g.tag_node(child, "important")
+    g.add_citation(child, root)
+    return root, child
+
+
+def test_binary_storage_roundtrip(tmp_path):
+    path = tmp_path / "graph.csg"
+    g = ConversationGraph(storage_path=path)
+    root, child = _build(g)
+
+    assert path.read_bytes().startswith(MAGIC)
+    g2 = ConversationGraph(storage_path=path)
+    assert g2.data[child]["tags"] == ["important"]
+    assert g2.data[child]["citations"] == [root]
+    assert g2.data[root]["children"] == [child]
+    assert g2._last_smart_ask["question"] == "Question?"
+    assert np.array_equal(g2.data[child]["embedding"], np.asarray(g.data[child]["embedding"], dtype=np.float32))
+    assert g2.simsearch("child", top_k=1)[0][0] in (root, child)
+
+
+def test_binary_detected_by_magic_bytes(tmp_path):
+    src = ConversationGraph(storage_path=tmp_path / "src.json")
+    root, child = _build(src)
+    src.export_to_file("export.csg")
+    (tmp_path / "export.csg").rename(tmp_path / "export.bin")
+
+    g = ConversationGraph(storage_path=tmp_path / "graph.json")
+    g.import_from_file("export.bin")
+    assert set(g.data) == {root, child}
+
+
+def test_convert_json_to_binary_and_back(tmp_path):
+    src = ConversationGraph(storage_path=tmp_path / "src.json")
+    root, child = _build(src)
+
+    assert convert(tmp_path / "src.json", tmp_path / "out.csg") == 2
+    assert is_binary_snapshot(tmp_path / "out.csg")
+    nodes, last_smart_ask, _ = read_snapshot(tmp_path / "out.csg")
+    assert nodes[child]["prompt"] == "Child"
+    assert len(nodes[child]["embedding"]) == 768
+
+    convert(tmp_path / "out.csg", tmp_path / "back.json")
+    payload = json.loads((tmp_path / "back.json").read_text())
+    assert payload["nodes"][child]["citations"] == [root]
+    assert payload["last_smart_ask"]["question"] == "Question?"
+    back = ConversationGraph(storage_path=tmp_path / "back.json")
+    assert np.allclose(back.data[child]["embedding"], nodes[child]["embedding"])
+
+
+def test_binary_snapshot_with_journal(tmp_path):
+    path = tmp_path / "graph.csg"
+    g = ConversationGraph(storage_path=path, journal=True)
+    g._backend.max_bytes = 1
+    root, child = _build(g)
+
+    _, _, meta = read_snapshot(path)
+    assert meta["journal_seq"] == g._backend.seq
+    g2 = ConversationGraph(storage_path=path, journal=True)
+    assert g2.data[child]["tags"] == ["important"]
+
+
+def test_binary_snapshot_without_embeddings(tmp_path):
+    path = tmp_path / "graph.csg"
+    g = ConversationGraph(storage_path=path)
+    g._config["auto_embed"] = False
+    root, child = _build(g)
+    g.export_to_file("export.csg")
+
+    for saved in (path, tmp_path / "export.csg"):
+        nodes, last_smart_ask, _ = read_snapshot(saved)
+        assert set(nodes) == {root, child}
+        assert not any("embedding" in node for node in nodes.values())
+        assert last_smart_ask["question"] == "Question?"
+
+
+def test_binary_snapshot_after_model_switch(tmp_path):
+    path = tmp_path / "graph.csg"
+    g = ConversationGraph(storage_path=path)
+    g._config["embedding"] = {"provider": "mock", "cache": False}
+    root, child = _build(g)
+    g.close()
+
+    g = ConversationGraph(storage_path=path)
+    g._config["embedding"] = {"provider": "mock", "cache": False}
+    g.get_embedding = lambda text: [1.0, 0.0, 0.0, 0.0]
+    g.embed_node(child)  # the root still has its 768-wide vector
+    g.close()
+
+    nodes, _, _ = read_snapshot(path)
+    assert list(nodes[child]["embedding"]) == [1.0, 0.0, 0.0, 0.0]
+    assert "embedding" not in nodes[root]
@@ -0,0 +1,118 @@
+import sqlite3
+
+import pytest
+from chatcli.core.graph import ConversationGraph
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'graph.db'}"
+
+
+def test_sqlite_roundtrip(db_url, tmp_path):
+    g = ConversationGraph(storage_path=db_url)
+    root = g.new("Root")
+    child = g.reply(root, "Child")
+    g.edit_response(child, "Edited")
+    g.add_comment(root, "note")
+    g.tag_node(child, "important")
+    g.add_citation(child, root)
+
+    g2 = ConversationGraph(storage_path=db_url)
+    assert len(g2.data) == 2
+    node = g2.data[child]
+    assert node["response"] == "Edited"
+    assert node["tags"] == ["important"]
+    assert node["citations"] == [root]
+    assert node["parent_id"] == root
+    assert g2.data[root]["children"] == [child]
+    assert g2.data[root]["comment"] == "note"
+    assert len(node["embedding"]) == 768
+    assert not (tmp_path / "graph.json").exists()
+
+
+def test_sqlite_pages_nodes_lazily(db_url):
+    g = ConversationGraph(storage_path=db_url)
+    ids = [g.new(f"Node {i}") for i in range(5)]
+
+    g2 = ConversationGraph(storage_path=db_url)
+    assert len(g2.data._cache) == 0
+    assert ids[3] in g2.data
+    assert g2.data[ids[3]]["prompt"] == "Node 3"
+    assert list(g2.data._cache) == [ids[3]]
+    assert list(g2.data) == ids
+
+
+def test_sqlite_indexed_parent_and_cited_by(db_url):
+    g = ConversationGraph(storage_path=db_url)
+    a = g.new("A")
+    b = g.reply(a, "B")
+    c = g.reply(b, "C")
+    g.add_citation(b, a)
+    g.add_citation(c, a)
+
+    g2 = ConversationGraph(storage_path=db_url)
+    assert g2.get_parents(b) == [a]
+    assert g2.get_cited_by(a) == [b, c]
+    assert g2.filter_related(b) == [a]
+
+
+def test_sqlite_uses_wal_and_row_writes(db_url, tmp_path):
+    g = ConversationGraph(storage_path=db_url)
+    a = g.new("A")
+    conn = sqlite3.connect(tmp_path / "graph.db")
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("SELECT prompt FROM nodes WHERE id = ?", (a,)).fetchone()[0] == "A"
+    assert conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] == 1
+
+
+def test_sqlite_import_replaces_contents(db_url, tmp_path):
+    src = ConversationGraph(storage_path=tmp_path / "src.json")
+    root = src.new("Imported root")
+    src.export_to_file("export.json")
+
+    g = ConversationGraph(storage_path=db_url)
+    g.new("Old node")
+    g.import_from_file("export.json")
+
+    g2 = ConversationGraph(storage_path=db_url)
+    assert list(g2.data) == [root]
+    assert g2.simsearch("root", top_k=1)[0][0] == root
+
+
+def test_sqlite_mapping_includes_uncommitted_nodes(db_url):
+    g = ConversationGraph(storage_path=db_url)
+    g._config["auto_embed"] = False
+    with g.batch():
+        a = g.new("A")
+        b = g.reply(a, "B")
+        assert a in g.data
+        assert len(g.data) == 2
+        assert list(g.data) == [a, b]
+        assert g.find_by_tags(none=["missing"]) == {a, b}
+        assert g.embed_all() == 2
+        assert g.embed_all() == 0
+    assert list(g.data) == [a, b]
+    assert len(g.data) == 2
+
+
+def test_sqlite_tags_are_stored_once(db_url, tmp_path):
+    g = ConversationGraph(storage_path=db_url)
+    with g.batch():
+        a = g.add_node("alpha")
+        g.tag_node(a, "x")
+    g.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        g._backend._conn.execute("SELECT 1")  # close() releases the connection
+
+    db = tmp_path / "graph.db"
+    conn = sqlite3.connect(db)
+    with conn:  # a database written before tags were unique
+        conn.execute("DROP INDEX tags_unique")
+        conn.execute("INSERT INTO tags (node_id, tag) VALUES (?, 'x')", (a,))
+    conn.close()
+
+    reopened = ConversationGraph(storage_path=db_url)
+    assert reopened.data[a]["tags"] == ["x"]
+    assert reopened.nodes_with_tag("x") == [a]
+    reopened.close()
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+from chatcli.core.graph import ConversationGraph
+from chatcli.core.graph_io import _import_stream
+from chatcli.core.graph_stream import iter_graph_json
+
+
+@pytest.fixture
+def export(tmp_path):
+    src = ConversationGraph(storage_path=tmp_path / "src.json")
+    root = src.new("Root")
+    child = src.reply(root, "Child")
+    src.edit_response(child, 'Body with "quotes", {braces} and 12345')
+    src.update_last_smart_ask(root, "Question?", "Answer", [child])
+    src.tag_node(child, "important")
+    src.export_to_file("export.json")
+    return tmp_path / "export.json", root, child
+
+
+def test_iter_graph_json_matches_json_load(export):
+    path, root, child = export
+    payload = json.loads(path.read_text())
+    entries = list(iter_graph_json(path, chunk_size=7))  # force values to straddle chunks
+
+    nodes = {key: value for kind, key, value in entries if kind == "node"}
+    meta = {key: value for kind, key, value in entries if kind == "meta"}
+    assert nodes == payload["nodes"]
+    assert meta["last_smart_ask"] == payload["last_smart_ask"]
+
+
+def test_import_merges_into_existing_graph(export, tmp_path):
+    path, root, child = export
+    g = ConversationGraph(storage_path=tmp_path / "graph.json")
+    local = g.new("Local")
+    g.import_from_file(path.name, merge=True)
+
+    assert set(g.data) == {local, root, child}
+    assert g.data[root]["children"] == [child]
+    assert g._last_smart_ask is None  # merge keeps local smart-ask state
+
+    g.import_from_file(path.name, merge=True)
+    assert len(g.data) == 3
+
+
+def test_import_streams_into_sqlite_in_chunks(export, tmp_path):
+    path, root, child = export
+    g = ConversationGraph(storage_path=f"sqlite:///{tmp_path / 'graph.db'}")
+    g.new("Old node")
+    stats = _import_stream(g, path, chunk_size=1)
+
+    assert stats == {"imported": 2, "skipped": 0}
+    g2 = ConversationGraph(storage_path=f"sqlite:///{tmp_path / 'graph.db'}")
+    assert list(g2.data) == [root, child]
+    assert g2.data[child]["tags"] == ["important"]
+    assert g2.get_parents(child) == [root]
+
+
+def test_invalid_node_rolls_back_import(tmp_path, capsys):
+    path = tmp_path / "bad.json"
+    path.write_text(json.dumps({"nodes": {"a": {"id": "a", "prompt": "A"}, "b": {"id": "wrong"}}}))
+    g = ConversationGraph(storage_path=tmp_path / "graph.json")
+    keep = g.new("Keep")
+    g.import_from_file(path.name)
+
+    assert list(g.data) == [keep]
+    assert "failed to import" in capsys.readouterr().out
+
+
+def test_values_spanning_many_chunks_are_decoded_once(tmp_path, monkeypatch):
+    import random
+    from chatcli.core import graph_stream
+
+    rng = random.Random(0)
+    alphabet = 'ab "\\{}[]:,\n\u00e9'
+    nodes = {f"n{i}": {"id": f"n{i}", "prompt": "".join(rng.choice(alphabet) for _ in range(rng.randrange(200))),
+                       "embedding": [rng.random() for _ in range(rng.randrange(20))], "depth": i, "ok": True}
+             for i in range(50)}
+    path = tmp_path / "big.json"
+    path.write_text(json.dumps({"last_smart_ask": None, "nodes": nodes, "count": 50}))
+
+    calls = []
+
+    class CountingDecoder(json.JSONDecoder):
+        def raw_decode(self, s, idx=0):
+            calls.append(idx)
+            return super().raw_decode(s, idx)
+
+    monkeypatch.setattr(graph_stream, "_decoder", CountingDecoder())
+    for chunk_size in (1, 3, 64, 1 << 20):
+        calls.clear()
+        entries = list(iter_graph_json(path, chunk_size=chunk_size))
+        assert {key: value for kind, key, value in entries if kind == "node"} == nodes
+        assert [(key, value) for kind, key, value in entries if kind == "meta"] == [("last_smart_ask", None),
+                                                                                   ("count", 50)]
+        assert len(calls) == 2 * len(nodes) + 5  # one decode per key and value
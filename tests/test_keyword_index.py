@@ -0,0 +1,89 @@
+import pytest
+from chatcli.core.graph import ConversationGraph
+from chatcli.core.keyword_index import KeywordIndex, tokenize
+
+
+def test_tokenize_keeps_identifiers_whole():
+    assert tokenize("Call get_node() -> KeyError: 'x1'") == ["call", "get_node", "keyerror", "x1"]
+
+
+def test_bm25_ranks_rare_terms_and_updates_in_place():
+    index = KeywordIndex()
+    index.add("a", "faiss index build")
+    index.add("b", "graph index index index")
+    index.add("c", "unrelated text")
+    assert index.search("faiss")[0][0] == "a"
+    assert index.search("index")[0][0] == "b"
+    assert {nid for nid, _ in index.search("index faiss")} == {"a", "b"}
+
+    index.add("a", "nothing left")  # replace
+    assert index.search("faiss") == []
+    assert index.remove("b") and not index.remove("b")
+    assert index.search("index") == []
+
+
+def test_keyword_search_tracks_mutations(graph):
+    a = graph.new("How do I call get_node?")
+    assert graph.keyword_search("get_node")[0][0] == a  # builds the index
+    b = graph.reply(a, "Second question")
+    graph.edit_response(b, "Traceback: KeyError raised in load_graph_state")
+    graph.add_comment(a, "see Pearce Kelly paper")
+    assert graph.keyword_search("load_graph_state")[0][0] == b
+    assert graph.keyword_search("pearce")[0][0] == a
+
+    try:
+        with graph.batch():
+            graph.edit_response(b, "rewritten")
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert graph.keyword_search("load_graph_state")[0][0] == b
+    assert graph.keyword_search("rewritten") == []
+
+
+def test_index_persisted_and_caught_up_by_journal(tmp_path):
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path, journal=True)
+    a = g.new("alpha question")
+    g.keyword_search("alpha")
+    g._snapshot()
+    assert (tmp_path / "graph.bm25.json").exists()
+    b = g.reply(a, "beta question")  # only in the journal
+    g.edit_response(a, "gamma answer")
+
+    g2 = ConversationGraph(storage_path=path, journal=True)
+    assert g2.keyword_search("beta")[0][0] == b
+    assert g2.keyword_search("gamma")[0][0] == a
+
+
+@pytest.mark.parametrize("journal", [False, True])
+def test_edits_made_without_searching_invalidate_sidecar(tmp_path, journal):
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path, journal=journal)
+    a = g.new("Animal")
+    g.edit_response(a, "giraffe")
+    g.keyword_search("giraffe")
+    g._snapshot()
+    g.close()
+
+    g2 = ConversationGraph(storage_path=path, journal=journal)
+    g2.edit_response(a, "elephant")  # no search: the keyword index is never loaded
+    g2._snapshot()
+    g2.close()
+
+    g3 = ConversationGraph(storage_path=path, journal=journal)
+    assert g3.keyword_search("giraffe") == []
+    assert g3.keyword_search("elephant")[0][0] == a
+    g3.close()
+
+
+def test_sqlite_graph_rebuilds_stale_sidecar(tmp_path):
+    url = f"sqlite:///{tmp_path / 'g.db'}"
+    g = ConversationGraph(storage_path=url)
+    a = g.new("alpha")
+    g.keyword_search("alpha")
+    g._on_snapshot()
+    g.edit_response(a, "delta")
+
+    g2 = ConversationGraph(storage_path=url)
+    assert g2.keyword_search("delta")[0][0] == a
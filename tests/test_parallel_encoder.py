@@ -0,0 +1,121 @@
+import os
+import sys
+import types
+from functools import partial
+
+import numpy as np
+import pytest
+from chatcli.core.embedding_provider import EmbeddingProvider, ParallelEncoder, SentenceTransformerProvider
+
+_loads = 0
+
+
+class FakeModel:
+    def __init__(self):
+        global _loads
+        _loads += 1
+
+    def encode(self, texts, batch_size=32):
+        return [[float(len(text)), float(os.getpid()), float(_loads)] for text in texts]
+
+
+class StubSentenceTransformer:
+    """Stands in for `sentence_transformers.SentenceTransformer`; rows are (text length, pid)."""
+
+    def __init__(self, model_name, device=None):
+        self.model_name = model_name
+
+    def encode(self, texts, batch_size=32):
+        return np.array([[float(len(text)), float(os.getpid())] for text in texts], dtype=np.float32)
+
+
+def _load_stub(model_name):
+    return StubSentenceTransformer(model_name, device="cpu")
+
+
+@pytest.fixture
+def stub_sentence_transformers(monkeypatch):
+    module = types.ModuleType("sentence_transformers")
+    module.SentenceTransformer = StubSentenceTransformer
+    monkeypatch.setitem(sys.modules, "sentence_transformers", module)
+
+
+@pytest.fixture
+def encoder():
+    # fork: the workers inherit FakeModel instead of importing this test module.
+    encoder = ParallelEncoder(FakeModel, workers=2, chunk_size=3, context="fork")
+    yield encoder
+    encoder.close()
+
+
+def test_results_come_back_in_input_order(encoder):
+    texts = ["x" * n for n in range(1, 11)]
+    vectors = encoder.encode(texts)
+    assert vectors.shape == (10, 3)
+    assert vectors[:, 0].tolist() == list(range(1, 11))
+
+
+def test_each_worker_loads_the_model_once(encoder):
+    vectors = encoder.encode(["t"] * 30)
+    assert set(vectors[:, 2].tolist()) == {1.0}
+    assert len(set(vectors[:, 1].tolist())) <= 2
+    assert os.getpid() not in set(vectors[:, 1].tolist())
+
+
+def test_encode_stream_yields_rows_in_order(encoder):
+    stream = encoder.encode_stream(["a", "bb", "ccc", "dddd"])
+    assert [row[0] for row in stream] == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_embed_nodes_uses_provider_bulk_size(graph):
+    class Bulk(EmbeddingProvider):
+        calls = []
+
+        def embed(self, text):
+            return [1.0, 0.0]
+
+        def embed_batch(self, texts, batch_size=32):
+            self.calls.append(len(texts))
+            return [self.embed(text) for text in texts]
+
+        def bulk_size(self, batch_size=32):
+            return batch_size * 4
+
+    graph._config["auto_embed"] = False
+    graph._config["embedding"] = {"provider": "mock", "batch_size": 2, "cache": False}
+    graph._embedding_provider = Bulk()
+    graph._vector_index.clear()
+    nodes = [graph.new(f"N{i}") for i in range(10)]
+    assert graph.embed_nodes(nodes) == 10
+    assert Bulk.calls == [8, 2]
+
+
+def test_provider_workers_zero_means_one_per_core(stub_sentence_transformers):
+    assert SentenceTransformerProvider("stub", workers=0).workers == (os.cpu_count() or 1)
+    provider = SentenceTransformerProvider("stub", workers=1, chunk_size=2)
+    assert provider.bulk_size(32) == 32
+    provider.embed_batch(["t"] * 10)
+    assert provider._encoder is None  # one worker never starts a pool
+
+
+def test_provider_pools_only_bulk_calls(stub_sentence_transformers):
+    # Default spawn start method: the workers import this module to unpickle `_load_stub`.
+    provider = SentenceTransformerProvider("stub", workers=2, chunk_size=3)
+    provider._load_model = partial(_load_stub, "stub")
+    assert provider.bulk_size(4) == 6
+
+    small = provider.embed_batch(["a", "bb", "ccc"])
+    assert [row[1] for row in small] == [os.getpid()] * 3
+    assert provider._encoder is None  # the pool starts lazily, on the first bulk call
+
+    texts = ["x" * n for n in range(1, 11)]
+    bulk = provider.embed_batch(texts)
+    assert [row[0] for row in bulk] == list(range(1, 11))
+    assert os.getpid() not in {row[1] for row in bulk}
+    processes = list(provider._encoder._pool._pool)
+    assert len(processes) == 2
+
+    provider.close()
+    assert provider._encoder is None
+    assert not any(process.is_alive() for process in processes)
+    assert [row[1] for row in provider.embed_batch(["a"])] == [os.getpid()]
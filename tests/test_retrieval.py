@@ -0,0 +1,47 @@
+import pytest
+from chatcli.core.retrieval import reciprocal_rank_fusion
+
+
+def test_rrf_rewards_agreement_and_respects_weights():
+    vector = [("a", 0.9), ("b", 0.8), ("c", 0.1)]
+    lexical = [("b", 12.0), ("d", 3.0)]
+    fused = reciprocal_rank_fusion([vector, lexical], k=60)
+    assert [nid for nid, _ in fused] == ["b", "a", "d", "c"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+
+    lexical_heavy = reciprocal_rank_fusion([vector, lexical], weights=[1.0, 3.0], k=60)
+    assert [nid for nid, _ in lexical_heavy][:2] == ["b", "d"]
+
+
+def _graph_with_identifier(graph, monkeypatch):
+    nodes = [graph.new(f"General note {i}") for i in range(5)]
+    target = graph.reply(nodes[0], "Why does parse_sqlite_path fail?")
+    # Vector search ranks the identifier node last.
+    ranking = [(nid, 1.0 - i / 10) for i, nid in enumerate(nodes + [target])]
+    monkeypatch.setattr(graph, "simsearch", lambda q, top_k=3, tags=None: ranking[:top_k])
+    return nodes, target
+
+
+def test_hybrid_search_surfaces_exact_terms(graph, monkeypatch):
+    nodes, target = _graph_with_identifier(graph, monkeypatch)
+    assert target not in [nid for nid, _ in graph.hybrid_search("parse_sqlite_path", top_k=2, mode="vector")]
+    assert graph.hybrid_search("parse_sqlite_path", top_k=2, mode="keyword")[0][0] == target
+    hybrid = [nid for nid, _ in graph.hybrid_search("parse_sqlite_path", top_k=2)]
+    assert hybrid[0] == target and nodes[0] in hybrid
+
+    graph._config["retrieval"] = {"keyword_weight": 0.0}
+    assert graph.hybrid_search("parse_sqlite_path", top_k=1)[0][0] == nodes[0]
+    with pytest.raises(ValueError):
+        graph.hybrid_search("x", mode="fuzzy")
+
+
+def test_hybrid_search_honours_tag_filter(graph, monkeypatch):
+    nodes, target = _graph_with_identifier(graph, monkeypatch)
+    graph.tag_node(nodes[1], "keep")
+    assert graph.hybrid_search("parse_sqlite_path", mode="keyword", tags=["keep"]) == []
+
+
+def test_smart_ask_cites_keyword_matches(graph, monkeypatch):
+    nodes, target = _graph_with_identifier(graph, monkeypatch)
+    graph.smart_ask("parse_sqlite_path error", from_node_id=nodes[0], top_k=2)
+    assert target in graph._last_smart_ask["citations"]
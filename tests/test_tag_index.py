@@ -0,0 +1,93 @@
+from unittest.mock import patch
+
+from chatcli.core.graph import ConversationGraph
+
+
+def _scan(graph, all=(), any=(), none=()):
+    return {
+        nid for nid, node in graph.data.items()
+        if set(all) <= set(node["tags"])
+        and (not any or set(any) & set(node["tags"]))
+        and not set(none) & set(node["tags"])
+    }
+
+
+def _tagged_graph(graph):
+    a = graph.new("A")
+    b = graph.reply(a, "B")
+    c = graph.reply(a, "C")
+    graph.tag_node(a, "python")
+    graph.tag_node(b, "python")
+    graph.tag_node(b, "draft")
+    graph.tag_node(c, "rust")
+    return a, b, c
+
+
+def test_boolean_queries_match_a_scan(graph):
+    a, b, c = _tagged_graph(graph)
+    graph.nodes_with_tag("python")  # build the index, then keep mutating
+    doc = graph.improve_doc(c)
+    graph.tag_node(doc, "rust")
+
+    queries = [
+        {"all": ["python"]},
+        {"all": ["python", "draft"]},
+        {"any": ["draft", "rust"]},
+        {"all": ["python"], "none": ["draft"]},
+        {"none": ["python"]},
+        {"all": ["missing"]},
+        {"any": ["doc"], "all": ["rust"]},
+    ]
+    for query in queries:
+        assert graph.find_by_tags(**query) == _scan(graph, **query)
+    assert graph.nodes_with_tag("python") == [a, b]
+    assert graph.find_by_tags(all=["rust"], none=["doc"]) == {c}
+
+
+def test_index_follows_reload_and_rollback(tmp_path):
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path)
+    a, b, c = _tagged_graph(g)
+
+    g2 = ConversationGraph(storage_path=path)
+    assert g2.find_by_tags(all=["python"]) == {a, b}
+
+    try:
+        with g2.batch():
+            g2.tag_node(c, "python")
+            assert g2.find_by_tags(all=["python"]) == {a, b, c}
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert g2.find_by_tags(all=["python"]) == {a, b}
+
+
+def test_sqlite_backend_queries_tags_table(tmp_path):
+    g = ConversationGraph(storage_path=f"sqlite:///{tmp_path / 'g.db'}")
+    a, b, c = _tagged_graph(g)
+    assert g.nodes_with_tag("python") == [a, b]
+    assert g.find_by_tags(any=["python", "rust"], none=["draft"]) == {a, c}
+
+
+def test_simsearch_prefilter_by_tag(graph):
+    a, b, c = _tagged_graph(graph)
+    for nid in (a, b, c):
+        graph.embed_node(nid)
+    results = graph.simsearch("B", top_k=3, tags=["python"])
+    assert {nid for nid, _ in results} == {a, b}
+    assert [nid for nid, _ in graph.simsearch("B", tags={"none": ["python"]})] == [c]
+    assert graph.simsearch("B", tags=["missing"]) == []
+
+
+def test_shell_tagged(capsys):
+    from chatcli.shell import ChatCLIShell
+    with patch("chatcli.shell.PromptSession"):
+        shell = ChatCLIShell()
+    a, b, c = _tagged_graph(shell.graph)
+    capsys.readouterr()
+    shell.onecmd("tagged python --none draft")
+    out = capsys.readouterr().out
+    assert f"[{a}] A" in out and b not in out
+    shell.onecmd("tagged --any draft,rust")
+    out = capsys.readouterr().out
+    assert b in out and c in out and a not in out
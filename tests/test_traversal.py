@@ -0,0 +1,54 @@
+from chatcli.core.traversal import bfs, dfs, has_tag, has_type
+
+
+def _tree(graph):
+    root = graph.new("Root")
+    a = graph.reply(root, "A")
+    a1 = graph.reply(a, "A1")
+    b = graph.reply(root, "B")
+    graph.tag_node(a1, "keep")
+    return root, a, a1, b
+
+
+def test_dfs_and_bfs_orders(graph):
+    root, a, a1, b = _tree(graph)
+    assert [n for n, _ in dfs(graph, root)] == [root, a, a1, b]
+    assert [n for n, _ in bfs(graph, root)] == [root, a, b, a1]
+    assert dict(dfs(graph, root)) == {root: 0, a: 1, a1: 2, b: 1}
+
+
+def test_depth_limit_predicate_and_prune(graph):
+    root, a, a1, b = _tree(graph)
+    assert [n for n, _ in dfs(graph, root, max_depth=1)] == [root, a, b]
+    assert [n for n, _ in bfs(graph, root, max_depth=1, include_start=False)] == [a, b]
+    assert [n for n, _ in dfs(graph, root, predicate=has_tag("keep"))] == [a1]
+    assert [n for n, _ in dfs(graph, root, prune=lambda node: node["id"] == a)] == [root, a, b]
+    assert list(dfs(graph, root, predicate=has_type("doc"))) == []
+
+
+def test_deep_chain_without_recursion_error(graph):
+    node = root = graph.new("Root")
+    with graph.batch():
+        for i in range(3000):
+            node = graph.reply(node, f"N{i}")
+    assert len(graph.descendants(root)) == 3000
+    walk = dfs(graph, root)
+    assert next(walk) == (root, 0)  # lazy: first result without walking the chain
+
+
+def test_citation_walk_visits_shared_nodes_once(graph):
+    a, b, c, d = (graph.new(x) for x in "ABCD")
+    graph.add_citations([(a, b), (a, c), (b, d), (c, d)])
+    assert sorted(n for n, _ in dfs(graph, a, edges="citations")) == sorted([a, b, c, d])
+
+
+def test_print_tree_depth_and_embed_subtree(graph, capsys):
+    root, a, a1, b = _tree(graph)
+    graph.print_tree(root, max_depth=1)
+    out = capsys.readouterr().out
+    assert "A1" not in out and "  [" in out
+    graph.print_tree("root")
+    assert capsys.readouterr().out.count("[" + a1 + "]") == 1  # only real roots are expanded
+
+    assert graph.embed_subtree(a) == 2
+    assert a1 in graph._vector_index
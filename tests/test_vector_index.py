@@ -0,0 +1,172 @@
+import pytest
+from chatcli.core.graph import ConversationGraph
+from chatcli.core.vector_index import VectorIndex
+
+
+def test_vector_index_add_replace_remove():
+    index = VectorIndex()
+    index.add("a", [1.0, 0.0])
+    index.add("b", [0.0, 1.0])
+    assert len(index) == 2
+
+    index.add("a", [0.6, 0.8])  # replace, not duplicate
+    assert len(index) == 2
+    assert index.search([0.0, 1.0], top_k=2)[0][0] == "b"
+
+    assert index.remove("b")
+    assert not index.remove("b")
+    assert [nid for nid, _ in index.search([0.0, 1.0], top_k=5)] == ["a"]
+
+
+def test_vector_index_rejects_wrong_query_dimension():
+    index = VectorIndex()
+    index.add("a", [1.0, 0.0])
+    with pytest.raises(ValueError):
+        index.search([1.0, 0.0, 0.0])
+
+
+def test_embed_node_updates_index(graph):
+    nid = graph.new("Index me")
+    graph.embed_node(nid)
+    assert nid in graph._vector_index
+    assert len(graph._vector_index) == 1
+
+
+def test_simsearch_does_not_scan_nodes(graph, monkeypatch):
+    nid = graph.new("Halide schedules")
+    graph.embed_node(nid)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("simsearch should not walk graph.data")
+
+    monkeypatch.setattr(graph, "_embedded_nodes", fail)
+    assert [r[0] for r in graph.simsearch("Halide")] == [nid]
+
+
+def test_vector_index_persists_next_to_storage(tmp_path):
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path)
+    nid = g.new("Persist my vector")
+    g.embed_node(nid)
+    assert (tmp_path / "graph.faiss").exists()
+
+    g2 = ConversationGraph(storage_path=path)
+    assert nid in g2._vector_index
+    assert g2.simsearch("vector", top_k=1)[0][0] == nid
+
+
+def test_vector_index_rebuilt_when_out_of_sync(tmp_path):
+    path = tmp_path / "graph.json"
+    g = ConversationGraph(storage_path=path)
+    nid = g.new("Stale sidecar")
+    g.embed_node(nid)
+    (tmp_path / "graph.faiss").unlink()
+
+    g2 = ConversationGraph(storage_path=path)
+    assert nid in g2._vector_index
+
+
+def test_index_spec_auto_tiers():
+    from chatcli.core.vector_index import index_spec
+    cfg = {"index": "auto", "auto_hnsw_min": 100, "auto_ivfpq_min": 20_000, "pq_m": 16}
+    assert index_spec(cfg, 50)["type"] == "flat"
+    assert index_spec(cfg, 500)["type"] == "hnsw"
+    spec = index_spec(cfg, 50_000, dim=24)
+    assert spec["type"] == "ivfpq" and spec["pq_m"] == 12 and spec["nlist"] == 1024
+    assert index_spec({"index": "ivf"}, 100)["type"] == "flat"  # too few vectors to train
+    with pytest.raises(ValueError):
+        index_spec({"index": "annoy"}, 10)
+
+
+def _clustered(n, dim=16, seed=0):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, dim))
+    return (centers[rng.integers(0, 20, n)] + 0.5 * rng.normal(size=(n, dim))).astype("float32")
+
+
+@pytest.mark.parametrize("kind", ["hnsw", "ivf", "ivfpq"])
+def test_ann_index_types_build_search_remove_and_persist(tmp_path, kind):
+    vectors = _clustered(10_000)
+    cfg = {"index": kind, "ivf_nlist": 64, "ivf_nprobe": 64, "pq_m": 4}
+    index = VectorIndex.build(((f"n{i}", v) for i, v in enumerate(vectors)), cfg)
+    assert index.spec["type"] == kind
+    near = lambda vec, k=1: [nid for nid, _ in index.search(vec, top_k=k if kind != "ivfpq" else 10)]
+    assert "n5" in near(vectors[5])  # PQ codes are lossy: only ask for the top 10 there
+    assert [nid for nid, _ in index.search(vectors[5], top_k=2, ids={"n5", "n6"})][0] == "n5"
+
+    index.remove("n5")
+    assert "n5" not in [nid for nid, _ in index.search(vectors[5], top_k=5)]
+    index.add("n_new", vectors[7])
+    assert "n_new" in [nid for nid, _ in index.search(vectors[7], top_k=5)]
+
+    index.save(tmp_path / "x.faiss")
+    loaded = VectorIndex.load(tmp_path / "x.faiss")
+    assert loaded.spec == index.spec and len(loaded) == len(index)
+    index = loaded
+    assert "n9" in near(vectors[9])
+
+
+def test_hnsw_tombstones_trigger_rebuild():
+    vectors = _clustered(200)
+    index = VectorIndex.build(((f"n{i}", v) for i, v in enumerate(vectors)), {"index": "hnsw"})
+    for i in range(150):
+        index.remove(f"n{i}")
+    assert index.tombstones == 150
+    assert len(index.search(vectors[0], top_k=10)) == 10  # widens past the dead entries
+    assert not index.outgrown(index.spec)
+    for i in range(150, 200):
+        index.add(f"n{i}", vectors[i])  # replacing also leaves tombstones
+    for i in range(1000):
+        index.add("churn", vectors[0])
+    assert index.outgrown(index.spec)
+
+
+def test_graph_switches_index_type_as_it_grows(graph, monkeypatch):
+    import numpy as np
+    graph._config["embedding"] = {"provider": "mock", "index": "auto", "auto_hnsw_min": 30}
+    rng = np.random.default_rng(1)
+    monkeypatch.setattr(graph, "get_embedding", lambda text: rng.random(8).tolist())
+    monkeypatch.setattr(graph, "get_embeddings", lambda texts, batch_size=None: rng.random((len(texts), 8)).tolist())
+    nodes = [graph.new(f"N{i}") for i in range(40)]
+    assert graph._vector_index.spec["type"] == "hnsw"
+    assert len(graph._vector_index) == 40
+    assert {nid for nid, _ in graph.simsearch("q", top_k=40)} == set(nodes)
+
+
+def test_scores_are_cosine_and_norm_invariant():
+    index = VectorIndex()
+    index.add("same", [2.0, 0.0])
+    index.add("orthogonal", [0.0, 5.0])
+    index.add("opposite", [-0.1, 0.0])
+    results = dict(index.search([10.0, 0.0], top_k=3))
+    assert results["same"] == pytest.approx(1.0)
+    assert results["orthogonal"] == pytest.approx(0.0, abs=1e-6)
+    assert results["opposite"] == pytest.approx(-1.0)
+    assert dict(index.search([0.5, 0.0], top_k=3)) == pytest.approx(results)
+
+
+def test_l2_era_sidecar_is_rebuilt(tmp_path):
+    import json
+    index = VectorIndex()
+    index.add("a", [1.0, 0.0])
+    index.save(tmp_path / "x.faiss")
+    ids_path = tmp_path / "x.faiss.ids.json"
+    meta = json.loads(ids_path.read_text())
+    del meta["metric"]
+    ids_path.write_text(json.dumps(meta))
+    assert VectorIndex.load(tmp_path / "x.faiss") is None
+
+
+def test_min_score_cuts_weak_matches(graph, monkeypatch):
+    vectors = {name: graph.new(name) for name in ("close", "far")}
+    graph._vector_index.clear()
+    graph._vector_index.add(vectors["close"], [1.0, 0.1])
+    graph._vector_index.add(vectors["far"], [0.0, 1.0])
+    monkeypatch.setattr(graph, "get_embedding", lambda text: [1.0, 0.0])
+    assert len(graph.simsearch("q", top_k=5)) == 2
+    assert [nid for nid, _ in graph.simsearch("q", top_k=5, min_score=0.5)] == [vectors["close"]]
+
+    graph._config["retrieval"] = {"min_score": 0.5, "mode": "vector"}
+    graph.smart_ask("q", from_node_id=vectors["close"], top_k=5)
+    assert graph._last_smart_ask["citations"] == [vectors["close"]]